@@ -0,0 +1,483 @@
+"""Модуль HTTP/JSON-сервиса для совместной работы с базой кадрового агентства
+
+Сервис работает на asyncio без внешних зависимостей. Блокирующие вызовы HRDatabase выполняются
+в ограниченном пуле потоков (у каждого потока свое подключение для чтения), одинаковые одновременные
+запросы на чтение объединяются в один вызов, а длинные списки отдаются по частям (chunked).
+
+Пример: python cli.py serve --port 8080
+    GET    /candidates                  все кандидаты (потоком)
+    GET    /candidates?limit=100&after_id=200&order_by=experience&after_value=5&descending=1
+    GET    /candidates/{id}
+    POST   /candidates                  {"name": ..., "skills": ..., "experience": ...}
+    PUT    /candidates/{id}
+    DELETE /candidates/{id}
+    (то же для /vacancies с полями title, employer_id, requirements)
+    GET    /search/candidates?skills=Python,SQL[&fulltext=1][&limit=50][&after_id=..]
+    GET    /search/candidates?skills=Python&min_experience=5[&max_experience=10]
+    GET    /search/candidates?skills=Pyhton&fuzzy=1 (с исправлением опечаток в навыках: поле corrections ответа,
+                                                  для потокового ответа - заголовок X-Corrections)
+    GET    /search/vacancies?skills=...
+    GET    /match?top=10[&vacancy=1&vacancy=2]
+    GET    /employers[?id=1&id=2]         сводка: число вакансий и подходящих кандидатов
+    GET    /employers/{id}/matches?top=10  вакансии работодателя с лучшими кандидатами
+    GET    /stats
+"""
+
+import asyncio
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from classes import Candidate, Vacancy
+from hr_database import DB_NAME, PAGE_LIMIT, HRDatabase
+from matching import MATCH_TOP_K
+
+API_HOST = "127.0.0.1"
+API_PORT = 8080
+API_WORKERS = 8  # Размер пула потоков для запросов к базе
+STREAM_CHUNK_ROWS = 1000  # Строк в одной части потокового ответа
+MAX_PAGE_LIMIT = 10000  # Максимальный размер страницы
+MAX_HEADERS = 100
+MAX_BODY_SIZE = 1024 * 1024
+KEEP_ALIVE_TIMEOUT = 30  # Секунд ожидания следующего запроса в открытом соединении
+
+MATCH_COLUMNS = ["vacancy_id", "title", "candidate_id", "name", "score"]
+EMPLOYER_STATS_COLUMNS = ["employer_id", "name", "vacancies", "candidates"]
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message=None):
+        super().__init__(message or HTTPStatus(status).phrase)
+        self.status = status
+
+
+class Request:
+    def __init__(self, method, path, query, headers, body):
+        self.method = method
+        self.path = path
+        self.query = query  # параметр -> список значений
+        self.headers = headers
+        self.body = body
+
+    def param(self, name, default=None, convert=str):
+        # Значение параметра строки запроса с преобразованием типа (ошибка преобразования - 400)
+        values = self.query.get(name)
+        if not values:
+            return default
+        try:
+            return convert(values[-1])
+        except ValueError:
+            raise HTTPError(400, f"Некорректный параметр {name}")
+
+    def limit(self, default=None):
+        # Размер страницы: не больше MAX_PAGE_LIMIT; значение меньше 1 - ошибка 400
+        # (иначе LIMIT -1 в SQLite вернул бы все строки)
+        limit = self.param("limit", default, int)
+        if limit is None:
+            return None
+        if limit < 1:
+            raise HTTPError(400, "Параметр limit должен быть не меньше 1")
+        return min(limit, MAX_PAGE_LIMIT)
+
+    def flag(self, name):
+        return self.param(name, "0") not in ("0", "false", "")
+
+    def json(self):
+        try:
+            data = json.loads(self.body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Некорректный JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Ожидается JSON-объект")
+        return data
+
+
+# Потоковый ответ обработчика с дополнительными заголовками (обработчик может вернуть и сами части тела)
+class StreamResponse:
+    def __init__(self, chunks, headers=()):
+        self.chunks = chunks
+        self.headers = list(headers)
+
+
+# Маршруты: (метод, шаблон пути, имя обработчика); группы шаблона передаются обработчику
+ROUTES = [
+    ("GET", r"/candidates", "list_records"),
+    ("POST", r"/candidates", "create_candidate"),
+    ("GET", r"/candidates/(\d+)", "get_record"),
+    ("PUT", r"/candidates/(\d+)", "update_candidate"),
+    ("DELETE", r"/candidates/(\d+)", "delete_record"),
+    ("GET", r"/vacancies", "list_records"),
+    ("POST", r"/vacancies", "create_vacancy"),
+    ("GET", r"/vacancies/(\d+)", "get_record"),
+    ("PUT", r"/vacancies/(\d+)", "update_vacancy"),
+    ("DELETE", r"/vacancies/(\d+)", "delete_record"),
+    ("GET", r"/search/(candidates|vacancies)", "search"),
+    ("GET", r"/match", "match"),
+    ("GET", r"/employers", "employers"),
+    ("GET", r"/employers/(\d+)/matches", "employer_matches"),
+    ("GET", r"/stats", "stats"),
+]
+COMPILED_ROUTES = [(method, re.compile(pattern), handler) for method, pattern, handler in ROUTES]
+
+# Таблица по первому сегменту пути: (таблица, метод одной записи, метод страницы, метод удаления)
+RESOURCES = {
+    "candidates": ("Candidates", "get_candidate", "get_candidates_page", "delete_candidate"),
+    "vacancies": ("Vacancies", "get_vacancy", "get_vacancies_page", "delete_vacancy"),
+}
+SEARCH_METHODS = {  # категория -> (страница поиска по навыкам, полнотекстовый поиск)
+    "candidates": ("find_matching_candidates_page", "search_candidates"),
+    "vacancies": ("find_vacancies_by_skill_page", "search_vacancies"),
+}
+
+
+# Сервис: маршрутизация запросов к методам HRDatabase
+class HRService:
+    def __init__(self, db_name=DB_NAME, workers=API_WORKERS, replica=False, write_back="interval"):
+        self.db = HRDatabase(db_name, replica, write_back)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hr-api")
+        self.inflight = {}  # (метод, аргументы) -> Future выполняющегося вызова
+        self.columns = {table: self.db.table_columns(table) for table in ("Candidates", "Vacancies")}
+        self.tasks = set()  # Задачи открытых соединений (отменяются при остановке)
+        self.requests = 0
+        self.coalesced = 0
+
+    async def call(self, method, *args):
+        # Вызов метода HRDatabase в пуле потоков
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(getattr(self.db, method), *args))
+
+    async def read(self, method, *args):
+        # Чтение с объединением: одинаковый вызов, который уже выполняется, не запускается повторно
+        key = (method, args)
+        future = self.inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+        future = asyncio.ensure_future(self.call(method, *args))
+        self.inflight[key] = future
+        future.add_done_callback(lambda _: self.inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.db.close()
+
+    async def dispatch(self, request):
+        # Поиск обработчика по методу и пути; возвращает (статус, данные) или асинхронный генератор частей ответа
+        self.requests += 1
+        allowed = False
+        for method, pattern, handler in COMPILED_ROUTES:
+            match = pattern.fullmatch(request.path)
+            if match:
+                allowed = True
+                if method == request.method:
+                    return await getattr(self, handler)(request, *match.groups())
+        raise HTTPError(405 if allowed else 404)
+
+    def records(self, table, rows):
+        columns = self.columns[table]
+        return [dict(zip(columns, row)) for row in rows]
+
+    async def list_records(self, request):
+        # Страница записей (при limit) или весь список потоком
+        table, _, page_method, _ = RESOURCES[request.path.strip("/")]
+        order_by = request.param("order_by", "id")
+        descending = request.flag("descending")
+        after_id = request.param("after_id", None, int)
+        after_value = request.param("after_value")
+        if after_value is not None and order_by in ("experience", "employer_id"):
+            after_value = request.param("after_value", None, int)
+        limit = request.limit()
+        if limit is not None:
+            rows = await self.read(page_method, after_id, limit, order_by, descending, after_value)
+            return 200, self.page(table, rows, limit, order_by)
+
+        async def fetch(after):
+            return await self.read(page_method, after, STREAM_CHUNK_ROWS, "id", False)
+        return self.stream(table, fetch)
+
+    def page(self, table, rows, limit, order_by="id"):
+        # Страница с ключом продолжения (None - страница последняя)
+        result = {"items": self.records(table, rows), "next": None}
+        if len(rows) >= limit and rows:
+            last = dict(zip(self.columns[table], rows[-1]))
+            result["next"] = {"after_id": last["id"]}
+            if order_by != "id":
+                result["next"]["after_value"] = last[order_by]
+        return result
+
+    async def stream(self, table, fetch):
+        # Потоковый ответ: JSON-массив, который отдается частями по STREAM_CHUNK_ROWS строк (страницы по ключу);
+        # строки кодируются в пуле потоков, чтобы цикл событий не простаивал на больших списках
+        loop = asyncio.get_running_loop()
+        yield b"["
+        after, first = None, True
+        while True:
+            rows = await fetch(after)
+            if rows:
+                chunk = await loop.run_in_executor(self.executor, self.encode_rows, table, rows)
+                yield chunk if first else b"," + chunk
+                first = False
+            if len(rows) < STREAM_CHUNK_ROWS:
+                break
+            after = rows[-1][0]
+        yield b"]"
+
+    def encode_rows(self, table, rows):
+        # JSON-объекты строк через запятую (без скобок массива)
+        return json.dumps(self.records(table, rows), ensure_ascii=False)[1:-1].encode("utf-8")
+
+    async def get_record(self, request, record_id):
+        table, get_method, _, _ = RESOURCES[request.path.split("/")[1]]
+        row = await self.read(get_method, int(record_id))
+        if row is None:
+            raise HTTPError(404)
+        return 200, self.records(table, [row])[0]
+
+    async def delete_record(self, request, record_id):
+        _, _, _, delete_method = RESOURCES[request.path.split("/")[1]]
+        if not await self.call(delete_method, int(record_id)):
+            raise HTTPError(404)
+        return 200, {"deleted": int(record_id)}
+
+    @staticmethod
+    def candidate_fields(data):
+        try:
+            name, skills, experience = str(data["name"]).strip(), str(data["skills"]).strip(), int(data["experience"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPError(400, "Нужны поля name, skills и experience (целое число)")
+        if not name or not skills or experience < 0:
+            raise HTTPError(400, "Введите корректные данные")
+        return name, skills, experience
+
+    @staticmethod
+    def vacancy_fields(data):
+        try:
+            title, employer_id = str(data["title"]).strip(), int(data["employer_id"])
+            requirements = str(data["requirements"]).strip()
+        except (KeyError, TypeError, ValueError):
+            raise HTTPError(400, "Нужны поля title, employer_id (целое число) и requirements")
+        if not title or not requirements:
+            raise HTTPError(400, "Введите корректные данные")
+        return title, employer_id, requirements
+
+    async def create_candidate(self, request):
+        candidate_id = await self.call("add_candidate", Candidate(*self.candidate_fields(request.json())))
+        if candidate_id is None:
+            raise HTTPError(409, "Кандидат с таким именем уже есть")
+        return 201, {"id": candidate_id}
+
+    async def update_candidate(self, request, candidate_id):
+        if not await self.call("edit_candidate", int(candidate_id), *self.candidate_fields(request.json())):
+            raise HTTPError(404)
+        return 200, {"id": int(candidate_id)}
+
+    async def create_vacancy(self, request):
+        vacancy_id = await self.call("add_vacancy", Vacancy(*self.vacancy_fields(request.json())))
+        return 201, {"id": vacancy_id}
+
+    async def update_vacancy(self, request, vacancy_id):
+        if not await self.call("edit_vacancy", int(vacancy_id), *self.vacancy_fields(request.json())):
+            raise HTTPError(404)
+        return 200, {"id": int(vacancy_id)}
+
+    async def search(self, request, category):
+        # Поиск по навыкам: страница при limit, иначе весь результат потоком; полнотекстовый - с ранжированием.
+        # Кандидатов можно искать также по диапазону опыта (тогда навыки можно не указывать)
+        skills = request.param("skills", "").strip()
+        experience = ()
+        if category == "candidates":
+            experience = (request.param("min_experience", None, int), request.param("max_experience", None, int))
+        by_experience = any(value is not None for value in experience)
+        if not skills and not by_experience:
+            raise HTTPError(400, "Не указан параметр skills")
+        if by_experience and request.flag("fulltext"):
+            raise HTTPError(400, "Полнотекстовый поиск не поддерживает диапазон опыта")
+        page_method, fulltext_method = SEARCH_METHODS[category]
+        table = RESOURCES[category][0]
+        limit = request.limit()
+        fulltext = request.flag("fulltext")
+        corrections = {}
+        if request.flag("fuzzy") and skills:
+            skills, corrections = await self.read("correct_skills", skills, None, fulltext)
+        if fulltext:
+            rows = await self.read(fulltext_method, skills, limit or PAGE_LIMIT)
+            result = {"items": self.records(table, rows), "next": None}
+            if corrections:
+                result["corrections"] = corrections
+            return 200, result
+        if limit is not None:
+            rows = await self.read(page_method, skills, request.param("after_id", None, int),
+                                   limit, False, *experience)
+            page = self.page(table, rows, limit)
+            if corrections:
+                page["corrections"] = corrections
+            return 200, page
+
+        async def fetch(after):
+            return await self.read(page_method, skills, after, STREAM_CHUNK_ROWS, False, *experience)
+        # Тело потокового ответа - массив записей, поэтому исправления передаются в заголовке
+        headers = [f"X-Corrections: {json.dumps(corrections)}"] if corrections else []
+        return StreamResponse(self.stream(table, fetch), headers)
+
+    async def match(self, request):
+        top = request.param("top", MATCH_TOP_K, int)
+        try:
+            vacancy_ids = tuple(int(v) for v in request.query.get("vacancy", [])) or None
+        except ValueError:
+            raise HTTPError(400, "Некорректный параметр vacancy")
+        rows = await self.read("match_vacancies", top, vacancy_ids)
+        return 200, [dict(zip(MATCH_COLUMNS, row)) for row in rows]
+
+    async def employers(self, request):
+        try:
+            employer_ids = tuple(int(v) for v in request.query.get("id", [])) or None
+        except ValueError:
+            raise HTTPError(400, "Некорректный параметр id")
+        rows = await self.read("employer_stats", employer_ids)
+        return 200, [dict(zip(EMPLOYER_STATS_COLUMNS, row)) for row in rows]
+
+    async def employer_matches(self, request, employer_id):
+        rows = await self.read("employer_matches", int(employer_id), request.param("top", MATCH_TOP_K, int))
+        return 200, [dict(zip(MATCH_COLUMNS, row)) for row in rows]
+
+    async def stats(self, request):
+        return 200, {"requests": self.requests, "coalesced": self.coalesced, "inflight": len(self.inflight),
+                     "cache": self.db.cache_stats(), "queries": self.db.stats.to_dict()}
+
+    async def handle_connection(self, reader, writer):
+        # Обработка соединения: запросы HTTP/1.1 по очереди, пока клиент держит соединение открытым
+        task = asyncio.current_task()
+        self.tasks.add(task)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(read_request(reader), KEEP_ALIVE_TIMEOUT)
+                except HTTPError as e:
+                    await send_json(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                try:
+                    result = await self.dispatch(request)
+                except HTTPError as e:
+                    await send_json(writer, e.status, {"error": str(e)}, keep_alive)
+                except ValueError as e:
+                    await send_json(writer, 400, {"error": str(e)}, keep_alive)
+                except Exception as e:
+                    await send_json(writer, 500, {"error": str(e)}, keep_alive)
+                else:
+                    if isinstance(result, tuple):
+                        await send_json(writer, *result, keep_alive)
+                    else:
+                        if not isinstance(result, StreamResponse):
+                            result = StreamResponse(result)
+                        if not await send_stream(writer, result.chunks, keep_alive, result.headers):
+                            break
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass  # Клиент закрыл соединение, истек таймаут ожидания или сервис останавливается
+        finally:
+            self.tasks.discard(task)
+            writer.close()
+
+
+async def read_request(reader):
+    # Чтение одного HTTP-запроса; None - клиент закрыл соединение
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, version = line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise HTTPError(431)
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if version == "HTTP/1.0" and headers.get("connection", "").lower() != "keep-alive":
+        headers["connection"] = "close"
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPError(400, "Некорректный заголовок Content-Length")
+    if length < 0:
+        raise HTTPError(400, "Некорректный заголовок Content-Length")
+    if length > MAX_BODY_SIZE:
+        raise HTTPError(413)
+    body = await reader.readexactly(length) if length else b""
+    url = urlsplit(target)
+    return Request(method.upper(), url.path.rstrip("/") or "/", parse_qs(url.query), headers, body)
+
+
+def response_head(status, headers, keep_alive):
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}", "Content-Type: application/json; charset=utf-8",
+             f"Connection: {'keep-alive' if keep_alive else 'close'}"] + headers
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def send_json(writer, status, data, keep_alive=True):
+    body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    writer.write(response_head(status, [f"Content-Length: {len(body)}"], keep_alive) + body)
+    await writer.drain()
+
+
+async def send_stream(writer, chunks, keep_alive=True, headers=()):
+    # Ответ с Transfer-Encoding: chunked; каждая часть отправляется по мере готовности.
+    # Возвращает False, если ответ прерван ошибкой: заголовки уже отправлены, поэтому ответить ошибкой нельзя -
+    # тело завершается (JSON в нем остается незаконченным), и соединение нужно закрыть
+    writer.write(response_head(200, ["Transfer-Encoding: chunked", *headers], keep_alive))
+    completed = True
+    try:
+        async for chunk in chunks:
+            if chunk:
+                writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                await writer.drain()
+    except ConnectionError:
+        raise
+    except Exception:
+        completed = False
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+    return completed
+
+
+async def serve(db_name=DB_NAME, host=API_HOST, port=API_PORT, workers=API_WORKERS, ready=None, replica=False,
+                write_back="interval"):
+    # Запуск сервиса до отмены задачи; ready(server) вызывается после открытия порта.
+    # replica - чтение из копии базы в памяти (см. HRDatabase)
+    service = HRService(db_name, workers, replica, write_back)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    if ready is not None:
+        ready(server)
+    try:
+        await server.serve_forever()
+    finally:
+        # Открытые соединения закрываются до ожидания остановки сервера, иначе ожидание не закончится
+        server.close()
+        for task in list(service.tasks):
+            task.cancel()
+        await asyncio.gather(*service.tasks, return_exceptions=True)
+        await server.wait_closed()
+        service.close()
+
+
+def run_server(db_name=DB_NAME, host=API_HOST, port=API_PORT, workers=API_WORKERS, replica=False,
+               write_back="interval"):
+    def ready(server):
+        address = server.sockets[0].getsockname()
+        print(f"Сервис запущен: http://{address[0]}:{address[1]}", flush=True)
+    try:
+        asyncio.run(serve(db_name, host, port, workers, ready, replica, write_back))
+    except KeyboardInterrupt:
+        pass
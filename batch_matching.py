@@ -0,0 +1,133 @@
+"""Модуль пакетного подбора: все вакансии против всех кандидатов на всех ядрах процессора
+
+Кандидаты делятся на шарды по диапазонам id. Каждый шард обрабатывается в отдельном процессе со своим
+подключением только для чтения. Лучшие k кандидатов шарда для каждой вакансии сохраняются сразу после
+его обработки, поэтому прерванное задание продолжается с необработанных шардов. После всех шардов
+списки объединяются в таблицу MatchResults одной транзакцией.
+
+Пример: python cli.py batch-match --top 10 --workers 8
+"""
+
+import multiprocessing
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from urllib.request import pathname2url
+
+from columnar import SkillColumns
+from matching import MATCH_TOP_K, MatchEngine
+
+SHARDS_PER_WORKER = 4  # Шардов на процесс: мелкие шарды выравнивают нагрузку и теряют меньше работы при сбое
+
+
+def connect_read_only(db_name):
+    # Подключение только для чтения (в процессе-обработчике шарда)
+    conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(db_name))}?mode=ro", uri=True)
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+def match_shard(db_name, low_id, high_id, k):
+    # k лучших кандидатов из диапазона id [low_id, high_id) для каждой вакансии: строки (вакансия, кандидат, оценка)
+    conn = connect_read_only(db_name)
+    try:
+        candidates = SkillColumns.from_connection(conn, "Candidates", (low_id, high_id))
+        vacancies = SkillColumns.from_connection(conn, "Vacancies")
+    finally:
+        conn.close()
+    if not len(candidates):
+        return []
+    top = MatchEngine.from_columns(candidates, vacancies).top_candidates(k)
+    return [(vacancy_id, candidate_id, score) for vacancy_id, matches in top.items()
+            for candidate_id, score in matches]
+
+
+def shard_ranges(conn, shards):
+    # Диапазоны id с примерно равным числом кандидатов; первый и последний диапазоны открыты,
+    # чтобы в задание попали и кандидаты, добавленные до его возобновления
+    total = conn.execute("SELECT COUNT(*) FROM Candidates").fetchone()[0]
+    bounds = []
+    for i in range(1, shards):
+        row = conn.execute("SELECT id FROM Candidates ORDER BY id LIMIT 1 OFFSET ?", (total * i // shards,)).fetchone()
+        if row is not None and (not bounds or row[0] > bounds[-1]):
+            bounds.append(row[0])
+    edges = [None] + bounds + [None]
+    return list(zip(edges, edges[1:]))
+
+
+def _start_job(db, k, shards):
+    # Новое задание; незавершенные задания удаляются вместе с промежуточными результатами
+    with db.manager.write():
+        unfinished = [row[0] for row in db.conn.execute("SELECT id FROM MatchJobs WHERE finished_at IS NULL")]
+        for job_id in unfinished:
+            _delete_job_data(db, job_id)
+            db.conn.execute("DELETE FROM MatchJobs WHERE id = ?", (job_id,))
+        job_id = db.conn.execute("INSERT INTO MatchJobs (k, started_at) VALUES (?, ?)", (k, time.time())).lastrowid
+        db.conn.executemany("INSERT INTO MatchJobShards (job_id, shard, low_id, high_id) VALUES (?, ?, ?, ?)",
+                            [(job_id, shard, low, high) for shard, (low, high) in
+                             enumerate(shard_ranges(db.conn, shards))])
+    return job_id
+
+
+def _delete_job_data(db, job_id):
+    db.conn.execute("DELETE FROM MatchShardResults WHERE job_id = ?", (job_id,))
+    db.conn.execute("DELETE FROM MatchJobShards WHERE job_id = ?", (job_id,))
+
+
+def run_batch_match(db, k=MATCH_TOP_K, workers=None, shards=None, restart=False, progress=None):
+    # Пакетный подбор k лучших кандидатов для всех вакансий. Незавершенное задание с тем же k продолжается
+    # (restart=True начинает заново). progress(обработано шардов, всего шардов) вызывается после каждого шарда.
+    # Возвращает статистику задания
+    if db.manager.in_memory:
+        raise ValueError("Пакетный подбор выполняется только для базы в файле")
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    job = None if restart else db.conn.execute(
+        "SELECT id FROM MatchJobs WHERE finished_at IS NULL AND k = ? ORDER BY id DESC LIMIT 1", (k,)).fetchone()
+    job_id = job[0] if job else _start_job(db, k, shards or workers * SHARDS_PER_WORKER)
+
+    all_shards = db.conn.execute("SELECT shard, low_id, high_id, done_at FROM MatchJobShards WHERE job_id = ?",
+                                 (job_id,)).fetchall()
+    pending = [(shard, low, high) for shard, low, high, done_at in all_shards if done_at is None]
+    done = len(all_shards) - len(pending)
+    resumed = done
+    if progress is not None:
+        progress(done, len(all_shards))
+
+    if pending:
+        # Процессы читают файл базы, поэтому изменения реплики в памяти сначала записываются в него
+        db.flush()
+        # Процессы запускаются через spawn: дочерний процесс не наследует открытые подключения SQLite
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending)), mp_context=context) as pool:
+            futures = {pool.submit(match_shard, db.manager.db_name, low, high, k): shard
+                       for shard, low, high in pending}
+            for future in as_completed(futures):
+                rows = future.result()
+                with db.manager.write():
+                    db.conn.executemany('''INSERT OR REPLACE INTO MatchShardResults
+                                               (job_id, shard, vacancy_id, candidate_id, score)
+                                           VALUES (?, ?, ?, ?, ?)''',
+                                        [(job_id, futures[future]) + row for row in rows])
+                    db.conn.execute("UPDATE MatchJobShards SET done_at = ? WHERE job_id = ? AND shard = ?",
+                                    (time.time(), job_id, futures[future]))
+                done += 1
+                if progress is not None:
+                    progress(done, len(all_shards))
+
+    # Объединение списков шардов: k лучших по убыванию оценки, при равенстве - по id (как в MatchEngine)
+    with db.manager.write():
+        db.conn.execute("DELETE FROM MatchResults")
+        db.conn.execute('''INSERT INTO MatchResults (vacancy_id, rank, candidate_id, score, job_id)
+                           SELECT vacancy_id, rank, candidate_id, score, job_id FROM (
+                               SELECT vacancy_id, candidate_id, score, job_id,
+                                      ROW_NUMBER() OVER (PARTITION BY vacancy_id
+                                                         ORDER BY score DESC, candidate_id) AS rank
+                               FROM MatchShardResults WHERE job_id = ?)
+                           WHERE rank <= ?''', (job_id, k))
+        rows = db.conn.execute("SELECT COUNT(*), COUNT(DISTINCT vacancy_id) FROM MatchResults").fetchone()
+        _delete_job_data(db, job_id)
+        db.conn.execute("UPDATE MatchJobs SET finished_at = ? WHERE id = ?", (time.time(), job_id))
+    return {"job_id": job_id, "k": k, "shards": len(all_shards), "resumed_shards": resumed, "workers": workers,
+            "results": rows[0], "vacancies": rows[1], "seconds": time.perf_counter() - start}
@@ -0,0 +1 @@
+"""Пакет с генератором синтетических данных и замерами производительности"""
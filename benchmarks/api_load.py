@@ -0,0 +1,156 @@
+"""Модуль с нагрузочным замером HTTP/JSON-сервиса: пропускная способность и задержки при N одновременных клиентах
+
+Пример: python -m benchmarks.api_load --size 100000 --clients 200 --duration 20 --workers 8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.generator import BASE_SKILLS, write_dataset
+from hr_database import HRDatabase
+
+# Доли запросов в смеси: (название, вес)
+WORKLOAD = [("search", 40), ("page", 20), ("get", 25), ("match", 5), ("edit", 5), ("stream", 5)]
+
+
+def start_server(db_file, workers):
+    # Сервис в отдельном процессе, чтобы клиенты замера не делили с ним GIL; порт выбирается системой
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen([sys.executable, os.path.join(root, "cli.py"), "--db", db_file, "serve",
+                                "--port", "0", "--workers", str(workers)],
+                               cwd=root, stdout=subprocess.PIPE, text=True, encoding="utf-8")
+    line = process.stdout.readline()  # "Сервис запущен: http://127.0.0.1:PORT"
+    if not line:
+        raise RuntimeError("Сервис не запустился")
+    port = int(line.rsplit(":", 1)[1])
+
+    def stop():
+        process.send_signal(signal.SIGINT)
+        process.wait()
+    return port, stop
+
+
+async def request(reader, writer, method, path, body=None):
+    # Один запрос по открытому соединению; возвращает статус, тело читается целиком (с учетом chunked)
+    data = json.dumps(body).encode("utf-8") if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(data)}\r\n\r\n"
+                 .encode("latin-1") + data)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if headers.get("transfer-encoding") == "chunked":
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    else:
+        await reader.readexactly(int(headers.get("content-length", 0)))
+    return status
+
+
+async def client(port, deadline, rnd, ids, vacancy_ids, results):
+    # Один рекрутер: запросы подряд по одному соединению до окончания замера
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    names, weights = zip(*WORKLOAD)
+    try:
+        while time.perf_counter() < deadline:
+            kind = rnd.choices(names, weights)[0]
+            if kind == "search":
+                skills = ",".join(rnd.sample(BASE_SKILLS[:20], rnd.choice((1, 2))))
+                args = ("GET", f"/search/candidates?skills={skills}&limit=50")
+            elif kind == "page":
+                args = ("GET", f"/candidates?limit=100&after_id={rnd.choice(ids)}")
+            elif kind == "get":
+                args = ("GET", f"/candidates/{rnd.choice(ids)}")
+            elif kind == "match":
+                args = ("GET", f"/match?top=10&vacancy={rnd.choice(vacancy_ids)}")
+            elif kind == "edit":
+                candidate_id = rnd.choice(ids)
+                args = ("PUT", f"/candidates/{candidate_id}",
+                        {"name": f"Кандидат {candidate_id}", "skills": ", ".join(rnd.sample(BASE_SKILLS, 3)),
+                         "experience": rnd.randint(0, 20)})
+            else:
+                args = ("GET", f"/search/vacancies?skills={rnd.choice(BASE_SKILLS[:5])}")
+            start = time.perf_counter()
+            status = await request(reader, writer, *args)
+            results.setdefault(kind, []).append((time.perf_counter() - start) * 1000)
+            if status >= 500:
+                results.setdefault("errors", []).append(status)
+    finally:
+        writer.close()
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+async def run_clients(port, clients, duration, seed, ids, vacancy_ids):
+    results = {}
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(client(port, deadline, random.Random(seed + i), ids, vacancy_ids, results)
+                           for i in range(clients)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный замер HTTP/JSON-сервиса")
+    parser.add_argument("--size", type=int, default=100000, help="Количество кандидатов")
+    parser.add_argument("--clients", type=int, default=200, help="Одновременных клиентов (рекрутеров)")
+    parser.add_argument("--duration", type=float, default=20, help="Длительность замера в секундах")
+    parser.add_argument("--workers", type=int, default=8, help="Потоков сервиса для запросов к базе")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Файл для сохранения результатов (JSON)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        data_file = os.path.join(workdir, "data.json")
+        db_file = os.path.join(workdir, "api.db")
+        write_dataset(data_file, args.size, max(1, args.size // 10), args.seed)
+        db = HRDatabase(db_file)
+        db.load_from_file(data_file)
+        ids, vacancy_ids = db.get_ids("Candidates"), db.get_ids("Vacancies")
+
+        port, stop = start_server(db_file, args.workers)
+        try:
+            results = asyncio.run(run_clients(port, args.clients, args.duration, args.seed, ids, vacancy_ids))
+        finally:
+            stop()
+            db.close()
+
+    errors = len(results.pop("errors", []))
+    total = sum(len(timings) for timings in results.values())
+    report = {"size": args.size, "clients": args.clients, "workers": args.workers, "duration": args.duration,
+              "requests": total, "errors": errors, "requests_per_second": round(total / args.duration, 1),
+              "latency_ms": {}}
+    for kind, timings in sorted(results.items()):
+        report["latency_ms"][kind] = {"count": len(timings), "median": round(statistics.median(timings), 2),
+                                      "p95": round(percentile(timings, 0.95), 2),
+                                      "p99": round(percentile(timings, 0.99), 2)}
+    print(f"{total} запросов за {args.duration} с: {report['requests_per_second']} запросов/с, ошибок: {errors}")
+    for kind, result in report["latency_ms"].items():
+        print(f"    {kind:<8} {result['count']:>8} медиана {result['median']:>8.2f} мс  "
+              f"p95 {result['p95']:>8.2f} мс  p99 {result['p99']:>8.2f} мс")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Модуль-генератор синтетических кандидатов и вакансий в формате input_data.json"""
+
+import argparse
+import json
+import random
+from itertools import accumulate
+
+# Популярные навыки (в порядке убывания частоты); хвост распределения дополняется редкими навыками
+BASE_SKILLS = [
+    "Python", "SQL", "JavaScript", "Java", "Git", "Docker", "Linux", "React", "HTML", "CSS",
+    "TypeScript", "C#", ".NET", "PostgreSQL", "Django", "Node.js", "Kubernetes", "AWS", "C++", "Spring",
+    "Flask", "MySQL", "MongoDB", "Go", "PHP", "Laravel", "Agile", "Scrum", "Figma", "Excel",
+    "Machine Learning", "TensorFlow", "Pandas", "Data Analysis", "Azure", "DevOps", "Kotlin", "Swift",
+    "Android Development", "iOS Development", "Qt", "OpenGL", "Redis", "Kafka", "Rust", "Scala",
+    "Project Management", "Marketing", "SEO", "Google Analytics", "UI/UX Design", "Adobe XD", "1C",
+]
+FIRST_NAMES = ["Александр", "Мария", "Дмитрий", "Анна", "Сергей", "Елена", "Алексей", "Ольга", "Иван",
+               "Наталья", "Максим", "Светлана", "Павел", "Ирина", "Николай", "Виктория", "Григорий", "Сельгира"]
+LAST_NAMES = ["Иванов", "Смирнов", "Кузнецов", "Попов", "Сидоров", "Петров", "Волков", "Николаев",
+              "Васильев", "Крылов", "Орлов", "Михайлов", "Сергеев", "Романов", "Шестаков", "Горяев"]
+ROLES = ["Backend-разработчик", "Frontend-разработчик", "Data Scientist", "DevOps-инженер", "Аналитик",
+         "Тестировщик", "Project Manager", "Mobile-разработчик", "Дизайнер", "Маркетолог", "Архитектор"]
+LEVELS = ["Junior", "Middle", "Senior", "Lead"]
+
+ZIPF_EXPONENT = 1.1  # Показатель степенного распределения частот навыков
+
+
+def skill_vocabulary(size):
+    # Словарь навыков: базовые навыки и редкие "хвостовые" навыки до нужного размера
+    skills = list(BASE_SKILLS[:size])
+    skills += [f"Skill-{i}" for i in range(len(skills), size)]
+    return skills
+
+
+class RecordGenerator:
+    def __init__(self, seed=42, vocabulary_size=2000):
+        self.random = random.Random(seed)
+        self.skills = skill_vocabulary(vocabulary_size)
+        # Накопленные веса распределения Ципфа: навык с рангом r встречается с частотой ~ 1 / r^s
+        self.cum_weights = list(accumulate(1 / (rank ** ZIPF_EXPONENT) for rank in range(1, vocabulary_size + 1)))
+
+    def pick_skills(self, count):
+        # Набор из count разных навыков с учетом популярности
+        picked = []
+        while len(picked) < count:
+            for skill in self.random.choices(self.skills, cum_weights=self.cum_weights, k=count):
+                if skill not in picked and len(picked) < count:
+                    picked.append(skill)
+        return ", ".join(picked)
+
+    def candidate(self, i):
+        # Имя дополняется номером, чтобы кандидаты не отбрасывались как дубликаты по имени
+        name = f"{self.random.choice(FIRST_NAMES)} {self.random.choice(LAST_NAMES)} {i}"
+        experience = min(int(self.random.expovariate(1 / 4)), 40)
+        return {"name": name, "skills": self.pick_skills(self.random.randint(2, 7)), "experience": experience}
+
+    def vacancy(self, i, employers):
+        title = f"{self.random.choice(LEVELS)} {self.random.choice(ROLES)} #{i}"
+        return {"title": title, "employer_id": self.random.randint(1, employers),
+                "requirements": self.pick_skills(self.random.randint(2, 5))}
+
+
+def write_dataset(filename, candidates, vacancies, seed=42, vocabulary_size=2000, employers=None):
+    # Запись набора данных в формате input_data.json; записи пишутся по одной, без накопления в памяти
+    generator = RecordGenerator(seed, vocabulary_size)
+    employers = employers or max(1, vacancies // 10)
+    with open(filename, "w", encoding="utf-8") as file:
+        file.write('{\n    "candidates": [')
+        for i in range(candidates):
+            file.write((",\n        " if i else "\n        ") + json.dumps(generator.candidate(i), ensure_ascii=False))
+        file.write('\n    ],\n    "vacancies": [')
+        for i in range(vacancies):
+            file.write((",\n        " if i else "\n        ") +
+                       json.dumps(generator.vacancy(i, employers), ensure_ascii=False))
+        file.write("\n    ]\n}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генерация синтетических кандидатов и вакансий")
+    parser.add_argument("output", help="Путь к создаваемому .json файлу")
+    parser.add_argument("--candidates", type=int, default=1000)
+    parser.add_argument("--vacancies", type=int, default=None, help="По умолчанию - десятая часть кандидатов")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skills", type=int, default=2000, help="Размер словаря навыков")
+    args = parser.parse_args()
+    vacancies = args.vacancies if args.vacancies is not None else max(1, args.candidates // 10)
+    write_dataset(args.output, args.candidates, vacancies, args.seed, args.skills)
+
+
+if __name__ == "__main__":
+    main()
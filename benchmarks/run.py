@@ -0,0 +1,190 @@
+"""Модуль с замерами производительности HRDatabase и интерфейса на синтетических данных
+
+Пример: python -m benchmarks.run --sizes 1000 10000 --output bench_results.json --compare old_results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.generator import BASE_SKILLS, write_dataset
+from hr_database import HRDatabase
+
+REGRESSION_THRESHOLD = 0.2  # Замедление медианы больше чем на 20% считается регрессией
+MATCH_MAX_SIZE = 100000  # Подбор по всем вакансиям замеряется только до этого размера
+
+
+def measure(func, repeat):
+    # Время выполнения func в миллисекундах за repeat запусков
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(timings), 3), "min_ms": round(min(timings), 3),
+            "max_ms": round(max(timings), 3), "runs": repeat}
+
+
+def run_size(size, repeat, seed, workdir, gui):
+    # Все сценарии для набора данных из size кандидатов (и size / 10 вакансий)
+    results = {}
+    data_file = os.path.join(workdir, f"data_{size}.json")
+    db_file = os.path.join(workdir, f"bench_{size}.db")
+    write_dataset(data_file, size, max(1, size // 10), seed)
+
+    db = HRDatabase(db_file)
+    results["load_from_file"] = measure(lambda: db.load_from_file(data_file), 1)
+    # После первого чтения у файла есть снимок (см. snapshot): повторные чтения идут из него
+    results["read_data_file_snapshot"] = measure(lambda: db.read_data_file(data_file), repeat)
+    results["columns_from_file"] = measure(lambda: db.columns_from_file(data_file), repeat)
+    # Потоковая загрузка того же файла (разбор частями в процессах, см. importers) с заменой данных
+    results["import_file_stream"] = measure(lambda: db.import_file(data_file, replace=True), 1)
+    rnd = random.Random(seed)
+    ids = [row[0] for row in db.conn.execute("SELECT id FROM Candidates")]
+    vacancy_ids = [row[0] for row in db.conn.execute("SELECT id FROM Vacancies")]
+
+    def cold(func):
+        # Замер без учета кэша результатов поиска
+        def run():
+            db.cache.clear()
+            func()
+        return run
+
+    queries = {
+        "find_matching_candidates": lambda: db.find_matching_candidates(rnd.choice(BASE_SKILLS[:20])),
+        "find_matching_candidates_2skills": lambda: db.find_matching_candidates(
+            ", ".join(rnd.sample(BASE_SKILLS[:20], 2))),
+        "find_vacancies_by_skill": lambda: db.find_vacancies_by_skill(rnd.choice(BASE_SKILLS[:20])),
+        "get_candidates_filter": lambda: db.get_candidates(rnd.choice(BASE_SKILLS[:20])),
+    }
+    for name, func in queries.items():
+        results[name] = measure(cold(func), repeat)
+    results["find_matching_candidates_cached"] = measure(lambda: db.find_matching_candidates("Python, SQL"), repeat)
+    results["correct_skills"] = measure(lambda: db.correct_skills("Pyhton, Djnago, Kubernets"), repeat)
+    results["get_candidates"] = measure(db.get_candidates, repeat)
+    if db.fts_enabled:
+        results["search_candidates"] = measure(lambda: db.search_candidates(rnd.choice(BASE_SKILLS[:20])), repeat)
+    results["edit_candidate"] = measure(lambda: db.edit_candidate(
+        rnd.choice(ids), f"Кандидат {rnd.random()}", ", ".join(rnd.sample(BASE_SKILLS, 3)), rnd.randint(0, 20)),
+        repeat)
+    results["edit_vacancy"] = measure(lambda: db.edit_vacancy(
+        rnd.choice(vacancy_ids), f"Вакансия {rnd.random()}", 1, ", ".join(rnd.sample(BASE_SKILLS, 3))), repeat)
+    if size <= MATCH_MAX_SIZE:
+        results["match_vacancies"] = measure(db.match_vacancies, 1)
+    if gui:
+        results.update(run_gui(db, repeat))
+    db.close()
+    return results
+
+
+def run_gui(db, repeat):
+    # Открытие таблицы кандидатов в HRApp.show_table на offscreen-платформе Qt
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PyQt5.QtCore import QTimer
+        from PyQt5.QtWidgets import QApplication
+    except ImportError:
+        return {}
+    app = QApplication.instance() or QApplication([])
+    from main import HRApp
+    window = HRApp(db, data_file=None)
+
+    def show_table():
+        # Диалог закрывается сразу после того, как таблица отрисована
+        QTimer.singleShot(0, lambda: app.activeModalWidget().accept())
+        window.show_table("Кандидаты", table="Candidates")
+
+    results = {"show_table": measure(show_table, repeat)}
+    window.queries.cancel_all()
+    window.queries.pool.waitForDone()
+    return results
+
+
+def run_startup(repeat, workdir):
+    # Время запуска отдельного процесса: импорт ядра, команда CLI и (для сравнения) импорт модуля интерфейса
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    db_file = os.path.join(workdir, "startup.db")
+    commands = {
+        "startup_python": [sys.executable, "-c", "pass"],
+        "startup_import_core": [sys.executable, "-c", "import hr_database"],
+        "startup_cli_search": [sys.executable, os.path.join(root, "cli.py"), "--db", db_file,
+                               "search", "candidates", "Python"],
+        "startup_import_gui": [sys.executable, "-c", "import main"],
+    }
+    results = {}
+    for name, command in commands.items():
+        def run():
+            subprocess.run(command, cwd=root, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            results[name] = measure(run, repeat)
+        except subprocess.CalledProcessError:
+            pass  # Например, PyQt5 не установлен
+    return results
+
+
+def compare(current, previous, threshold=REGRESSION_THRESHOLD):
+    # Сравнение медиан с предыдущим запуском; возвращает список регрессий
+    regressions = []
+    for size, scenarios in current["results"].items():
+        for name, result in scenarios.items():
+            old = previous.get("results", {}).get(size, {}).get(name)
+            if not old or not old["median_ms"]:
+                continue
+            ratio = result["median_ms"] / old["median_ms"]
+            marker = ""
+            if ratio > 1 + threshold:
+                marker = "  <-- регрессия"
+                regressions.append((size, name, ratio))
+            print(f"{size:>10} {name:<36} {old['median_ms']:>12.3f} -> {result['median_ms']:>12.3f} ms "
+                  f"(x{ratio:.2f}){marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры производительности кадрового агентства")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000],
+                        help="Количество кандидатов (от 10^3 до 10^7)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_results.json", help="Файл для сохранения результатов")
+    parser.add_argument("--compare", help="Файл результатов предыдущего запуска для сравнения")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--no-gui", action="store_true", help="Не замерять show_table")
+    args = parser.parse_args()
+
+    report = {"meta": {"python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                       "platform": platform.platform(), "seed": args.seed, "repeat": args.repeat,
+                       "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")},
+              "results": {}}
+    with tempfile.TemporaryDirectory() as workdir:
+        print("Время запуска", flush=True)
+        report["results"]["startup"] = run_startup(args.repeat, workdir)
+        for name, result in report["results"]["startup"].items():
+            print(f"    {name:<36} {result['median_ms']:>12.3f} ms")
+        for size in args.sizes:
+            print(f"Набор данных: {size} кандидатов", flush=True)
+            results = run_size(size, args.repeat, args.seed, workdir, not args.no_gui)
+            report["results"][str(size)] = results
+            for name, result in results.items():
+                print(f"    {name:<36} {result['median_ms']:>12.3f} ms")
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            regressions = compare(report, json.load(file), args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,25 @@
 """Модуль, где инициализируются классы"""
 
-# Модели данных для кандидатов и вакансий
+# Модели данных для кандидатов, работодателей и вакансий (__slots__ вместо __dict__ экономит память на каждую запись)
+class Employer:
+    __slots__ = ("name", "industry", "description")
+
+    def __init__(self, name, industry, description):
+        self.name = name  # Название работодателя
+        self.industry = industry  # Отрасль
+        self.description = description  # Описание работодателя
+
 class Candidate:
+    __slots__ = ("name", "skills", "experience")
+
     def __init__(self, name, skills, experience):
         self.name = name  # Имя кандидата
         self.skills = skills  # Навыки кандидата
         self.experience = experience  # Опыт кандидата (в годах)
 
 class Vacancy:
+    __slots__ = ("title", "employer_id", "requirements")
+
     def __init__(self, title, employer_id, requirements):
         self.title = title  # Название вакансии
         self.employer_id = employer_id  # ID работодателя, которому принадлежит вакансия
@@ -0,0 +1,217 @@
+"""Модуль командной строки: поиск, подбор, импорт и экспорт без загрузки графического интерфейса
+
+Примеры:
+    python cli.py search candidates "Python, SQL"
+    python cli.py search candidates Python --min-experience 5
+    python cli.py search candidates "Pyhton, Djnago" --fuzzy
+    python cli.py match --top 5
+    python cli.py import input_data.json
+    python cli.py import partners.jsonl --workers 8 --errors errors.jsonl
+    python cli.py export backup.json
+    python cli.py export pool.csv --max-rows 1000000
+    python cli.py export python.jsonl --skills Python --min-experience 5
+    python cli.py serve --port 8080
+    python cli.py batch-match --top 10 --workers 8
+    python cli.py employers --matches 3 --top 5
+    python cli.py --replica serve --port 8080
+"""
+
+import argparse
+import json
+import sys
+
+from hr_database import DB_NAME, HRDatabase
+
+
+def print_rows(rows, columns, output_format):
+    # Вывод строк результата в формате tsv или json (по одной записи в строке)
+    if output_format == "json":
+        for row in rows:
+            print(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+    else:
+        print("\t".join(columns))
+        for row in rows:
+            print("\t".join(str(value) for value in row))
+
+
+def cmd_search(db, args):
+    # Результаты поиска по навыкам выводятся по мере чтения из курсора, без загрузки в память целиком
+    experience = (args.min_experience, args.max_experience)
+    if experience != (None, None) and (args.fulltext or args.category != "candidates"):
+        sys.exit("Диапазон опыта задается только для поиска кандидатов по навыкам (без --fulltext)")
+    if args.fuzzy:
+        args.skills, corrections = db.correct_skills(args.skills, fulltext=args.fulltext)
+        for skill, correction in corrections.items():
+            print(f"Исправлено: {skill} -> {correction}", file=sys.stderr)
+    if args.category == "candidates":
+        rows = db.search_candidates(args.skills, args.limit) if args.fulltext else \
+            db.iter_matching_candidates(args.skills, None, *experience)
+        columns = db.table_columns("Candidates")
+    else:
+        rows = db.search_vacancies(args.skills, args.limit) if args.fulltext else \
+            db.iter_vacancies_by_skill(args.skills)
+        columns = db.table_columns("Vacancies")
+    print_rows(rows, columns, args.format)
+
+
+def cmd_match(db, args):
+    rows = db.match_vacancies(args.top, args.vacancy)
+    print_rows(rows, ["vacancy_id", "title", "candidate_id", "name", "score"], args.format)
+
+
+def cmd_employers(db, args):
+    # Сводка по работодателям или вакансии одного работодателя с лучшими кандидатами (--matches)
+    if args.matches is not None:
+        print_rows(db.employer_matches(args.matches, args.top),
+                   ["vacancy_id", "title", "candidate_id", "name", "score"], args.format)
+    else:
+        print_rows(db.employer_stats(args.id), ["employer_id", "name", "vacancies", "candidates"], args.format)
+
+
+def cmd_batch_match(db, args):
+    # Пакетный подбор на всех ядрах; прогресс выводится в stderr
+    from batch_matching import run_batch_match
+
+    def progress(done, total):
+        print(f"Шардов обработано: {done}/{total}", file=sys.stderr, flush=True)
+
+    stats = run_batch_match(db, args.top, args.workers, args.shards, args.restart, progress)
+    print(json.dumps(stats, ensure_ascii=False), file=sys.stderr)
+    if args.print:
+        print_rows(db.iter_match_results(args.vacancy), ["vacancy_id", "title", "candidate_id", "name", "score"],
+                   args.format)
+
+
+def cmd_import(db, args):
+    # .jsonl и .csv (или --stream) загружаются потоково с разбором в нескольких процессах и пропуском
+    # некорректных записей, .json и .txt - синхронизацией или полной перезагрузкой (--replace)
+    if args.stream or args.workers or args.errors or not args.file.endswith((".json", ".txt")):
+        stats = db.import_file(args.file, None, args.workers, args.replace, args.errors)
+    else:
+        stats = db.load_from_file(args.file) if args.replace else db.sync_from_file(args.file)
+    print(json.dumps(stats, ensure_ascii=False))
+
+
+def cmd_export(db, args):
+    # .json - экспорт кандидатов и вакансий в формате input_data.json, иначе - одной таблицы или результата
+    # поиска (подбора) в CSV, JSON Lines или колоночный формат. Записи пишутся по одной прямо из курсора
+    if args.to is not None or not args.file.endswith(".json"):
+        stats = db.export(args.file, args.source, args.to, args.max_rows, args.skills, args.min_experience,
+                          args.max_experience, args.top)
+        print(json.dumps(stats, ensure_ascii=False))
+        return
+    with open(args.file, "w", encoding="utf-8") as file:
+        file.write('{\n    "candidates": [')
+        for i, (_, name, skills, experience) in enumerate(db.iter_candidates()):
+            record = {"name": name, "skills": skills, "experience": experience}
+            file.write((",\n        " if i else "\n        ") + json.dumps(record, ensure_ascii=False))
+        file.write('\n    ],\n    "vacancies": [')
+        for i, (_, title, employer_id, requirements) in enumerate(db.iter_vacancies()):
+            record = {"title": title, "employer_id": employer_id, "requirements": requirements}
+            file.write((",\n        " if i else "\n        ") + json.dumps(record, ensure_ascii=False))
+        file.write("\n    ]\n}\n")
+
+
+def cmd_serve(db, args):
+    # HTTP/JSON-сервис (модуль импортируется только для этой команды)
+    from api_server import run_server
+    db.close()
+    run_server(args.db, args.host, args.port, args.workers, args.replica, args.write_back)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Кадровое агентство: работа с базой из командной строки")
+    parser.add_argument("--db", default=DB_NAME, help="Файл базы данных")
+    parser.add_argument("--format", choices=["tsv", "json"], default="tsv", help="Формат вывода результатов")
+    parser.add_argument("--stats", choices=["json", "prometheus"],
+                        help="Вывести статистику запросов в stderr после выполнения команды")
+    parser.add_argument("--replica", action="store_true",
+                        help="Читать из копии базы в памяти, изменения записывать в файл способом --write-back")
+    parser.add_argument("--write-back", choices=["interval", "commit"], default="interval",
+                        help="interval - периодически и при завершении (по умолчанию), commit - при каждой записи "
+                             "(без потери изменений при сбое)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser("search", help="Поиск кандидатов или вакансий по навыкам")
+    search.add_argument("category", choices=["candidates", "vacancies"])
+    search.add_argument("skills", nargs="?", default="",
+                        help='Навыки через запятую, например "Python, SQL" (можно не указывать при поиске по опыту)')
+    search.add_argument("--fulltext", action="store_true", help="Полнотекстовый поиск с ранжированием")
+    search.add_argument("--fuzzy", action="store_true", help="Исправить опечатки в навыках по словарю навыков базы")
+    search.add_argument("--limit", type=int, default=50, help="Количество результатов полнотекстового поиска")
+    search.add_argument("--min-experience", type=int, help="Минимальный опыт кандидата в годах")
+    search.add_argument("--max-experience", type=int, help="Максимальный опыт кандидата в годах")
+    search.set_defaults(handler=cmd_search)
+
+    match = commands.add_parser("match", help="Подбор лучших кандидатов для вакансий")
+    match.add_argument("--top", type=int, default=10, help="Количество кандидатов на вакансию")
+    match.add_argument("--vacancy", type=int, nargs="+", help="ID вакансий (по умолчанию - все)")
+    match.set_defaults(handler=cmd_match)
+
+    batch = commands.add_parser("batch-match", help="Пакетный подбор для всех вакансий на всех ядрах процессора "
+                                                    "с сохранением в таблицу MatchResults")
+    batch.add_argument("--top", type=int, default=10, help="Количество кандидатов на вакансию")
+    batch.add_argument("--workers", type=int, help="Количество процессов (по умолчанию - число ядер)")
+    batch.add_argument("--shards", type=int, help="Количество шардов (по умолчанию - 4 на процесс)")
+    batch.add_argument("--restart", action="store_true", help="Начать заново, не продолжая прерванное задание")
+    batch.add_argument("--print", action="store_true", help="Вывести результаты")
+    batch.add_argument("--vacancy", type=int, nargs="+", help="Выводить только эти вакансии")
+    batch.set_defaults(handler=cmd_batch_match)
+
+    employers = commands.add_parser("employers", help="Сводка по работодателям: число вакансий и кандидатов, "
+                                                      "подходящих хотя бы к одной вакансии")
+    employers.add_argument("--id", type=int, nargs="+", help="ID работодателей (по умолчанию - все)")
+    employers.add_argument("--matches", type=int, metavar="ID", help="Вакансии работодателя с лучшими кандидатами")
+    employers.add_argument("--top", type=int, default=10, help="Количество кандидатов на вакансию (с --matches)")
+    employers.set_defaults(handler=cmd_employers)
+
+    load = commands.add_parser("import", help="Импорт кандидатов и вакансий из .json, .txt, .jsonl или .csv файла")
+    load.add_argument("file")
+    load.add_argument("--replace", action="store_true", help="Полная перезагрузка вместо синхронизации изменений")
+    load.add_argument("--stream", action="store_true",
+                      help="Потоковая загрузка .json (добавление записей, с --replace - замена)")
+    load.add_argument("--workers", type=int, help="Процессов для разбора файла (по умолчанию - число ядер)")
+    load.add_argument("--errors", help="Записать ошибки некорректных записей в этот файл (JSON Lines)")
+    load.set_defaults(handler=cmd_import)
+
+    export = commands.add_parser("export", help="Экспорт кандидатов и вакансий в .json файл или таблицы "
+                                                "(результата поиска) в .csv, .jsonl, .hrcol")
+    export.add_argument("file")
+    export.add_argument("--to", choices=["csv", "jsonl", "columnar"], help="Формат (по умолчанию - по расширению)")
+    export.add_argument("--source", choices=["candidates", "vacancies", "employers", "matches", "batch-matches"],
+                        default="candidates", help="Что экспортировать (кроме .json)")
+    export.add_argument("--skills", help="Только результаты поиска по навыкам")
+    export.add_argument("--min-experience", type=int, help="Минимальный опыт кандидата в годах")
+    export.add_argument("--max-experience", type=int, help="Максимальный опыт кандидата в годах")
+    export.add_argument("--top", type=int, default=10, help="Количество кандидатов на вакансию (для matches)")
+    export.add_argument("--max-rows", type=int, help="Разбить на файлы не больше чем по столько строк")
+    export.set_defaults(handler=cmd_export)
+
+    serve = commands.add_parser("serve", help="HTTP/JSON-сервис для совместной работы с базой")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--workers", type=int, default=8, help="Потоков для запросов к базе")
+    serve.set_defaults(handler=cmd_serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # serve открывает базу (и реплику) в сервисе сам, поэтому здесь реплика для него не создается
+    db = HRDatabase(args.db, args.replica and args.handler is not cmd_serve, args.write_back)
+    if args.stats:
+        db.set_stats_enabled(True)
+    try:
+        args.handler(db, args)
+    except ValueError as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if args.stats:
+            print(db.stats.to_json() if args.stats == "json" else db.stats.to_prometheus(), file=sys.stderr)
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
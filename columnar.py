@@ -0,0 +1,117 @@
+"""Модуль с компактным колоночным представлением кандидатов и вакансий в памяти"""
+
+import sys
+from array import array
+from bisect import bisect_left
+
+# Источник колонок в базе: таблица -> (числовой столбец, связующая таблица навыков, ключ записи в ней)
+SOURCES = {
+    "Candidates": ("experience", "CandidateSkills", "candidate_id"),
+    "Vacancies": ("employer_id", "VacancySkills", "vacancy_id"),
+}
+
+
+def range_condition(column, id_range):
+    # Условие WHERE для диапазона id (от включительно, до не включительно) и его параметры
+    conditions, params = [], []
+    low, high = id_range or (None, None)
+    if low is not None:
+        conditions.append(f"{column} >= ?")
+        params.append(low)
+    if high is not None:
+        conditions.append(f"{column} < ?")
+        params.append(high)
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+
+# Колоночный контейнер записей с навыками: id и числовое поле (опыт кандидата или id работодателя) лежат
+# в массивах array, навыки записи i - в skills[offsets[i]:offsets[i + 1]] (формат CSR) в виде id навыков.
+# Вместо объекта на запись хранится несколько десятков байт, что позволяет держать в памяти весь пул кандидатов
+class SkillColumns:
+    def __init__(self, ids, values, offsets, skills, skill_names=None):
+        self.ids = ids  # array('q'): id записей по возрастанию
+        self.values = values  # array('i'): опыт кандидата или id работодателя
+        self.offsets = offsets  # array('I'): начало навыков записи i, длина len(ids) + 1
+        self.skills = skills  # array('i'): id навыков всех записей подряд
+        self.skill_names = skill_names  # id навыка -> название (если известно)
+
+    @classmethod
+    def from_connection(cls, conn, table="Candidates", id_range=None):
+        # Построение из базы за два прохода по связующей таблице: подсчет навыков каждой записи и раскладка
+        # по позициям. Таблица читается в порядке первичного ключа (навык, запись), без сортировки в SQLite.
+        # id_range=(от, до) ограничивает записи диапазоном id (см. range_condition)
+        value_column, junction, key = SOURCES[table]
+        where, params = range_condition("id", id_range)
+        junction_where, _ = range_condition(key, id_range)
+        ids, values = array('q'), array('i')
+        index = {}
+        for record_id, value in conn.execute(f"SELECT id, {value_column} FROM {table}{where} ORDER BY id", params):
+            index[record_id] = len(ids)
+            ids.append(record_id)
+            values.append(value or 0)
+
+        counts = array('I', bytes(4 * len(ids)))
+        for (record_id,) in conn.execute(f"SELECT {key} FROM {junction}{junction_where}", params):
+            i = index.get(record_id)
+            if i is not None:
+                counts[i] += 1
+        offsets = array('I', [0])
+        for count in counts:
+            offsets.append(offsets[-1] + count)
+
+        skills = array('i', bytes(4 * offsets[-1]))
+        positions = array('I', offsets[:-1])
+        for skill_id, record_id in conn.execute(f"SELECT skill_id, {key} FROM {junction}{junction_where}", params):
+            i = index.get(record_id)
+            if i is not None:
+                skills[positions[i]] = skill_id
+                positions[i] += 1
+        skill_names = dict(conn.execute("SELECT id, name FROM Skills"))
+        return cls(ids, values, offsets, skills, skill_names)
+
+    @classmethod
+    def from_records(cls, records, value_field, skills_field, split):
+        # Построение из словарей записей (например, из файла импорта); id записей - их номера начиная с 1,
+        # названия навыков (после split) получают собственные id в порядке первого появления
+        ids, values, offsets, skills = array('q'), array('i'), array('I', [0]), array('i')
+        interned = {}
+        for number, record in enumerate(records, 1):
+            ids.append(number)
+            values.append(record.get(value_field) or 0)
+            for skill in split(record.get(skills_field) or ""):
+                skills.append(interned.setdefault(skill, len(interned) + 1))
+            offsets.append(len(skills))
+        return cls(ids, values, offsets, skills, {skill_id: name for name, skill_id in interned.items()})
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        # Запись по позиции: (id, числовое поле, кортеж id навыков)
+        return self.ids[i], self.values[i], tuple(self.skills_at(i))
+
+    def skills_at(self, i):
+        # id навыков записи по позиции i (срез массива)
+        return self.skills[self.offsets[i]:self.offsets[i + 1]]
+
+    def position(self, record_id):
+        # Позиция записи по id (или None); id отсортированы, поэтому поиск двоичный
+        i = bisect_left(self.ids, record_id)
+        return i if i < len(self.ids) and self.ids[i] == record_id else None
+
+    def skill_lists(self):
+        # {id записи: список id навыков}
+        return {self.ids[i]: list(self.skills_at(i)) for i in range(len(self.ids))}
+
+    def postings(self):
+        # Инвертированный индекс: id навыка -> array('i') позиций записей с этим навыком
+        postings = {}
+        offsets, skills = self.offsets, self.skills
+        for i in range(len(self.ids)):
+            for j in range(offsets[i], offsets[i + 1]):
+                postings.setdefault(skills[j], array('i')).append(i)
+        return postings
+
+    def nbytes(self):
+        # Объем памяти под колонки (без словаря названий навыков)
+        return sum(sys.getsizeof(column) for column in (self.ids, self.values, self.offsets, self.skills))
@@ -0,0 +1,354 @@
+"""Модуль для управления подключениями к базе данных
+
+Реплика в памяти (ConnectionManager.enable_replica): файл базы при запуске копируется через backup API
+в копию в каталоге REPLICA_DIR (/dev/shm - файловая система в оперативной памяти), и все чтения идут из нее,
+не обращаясь к файлу базы. Копия - обычная база с журналом WAL: чистая база SQLite в памяти (":memory:",
+VFS memdb) не поддерживает WAL, и открытый курсор чтения (например, в таблице интерфейса) блокировал бы запись.
+Изменения записываются в файл одним из способов (WRITE_BACK_MODES):
+    interval - копией реплики через backup API каждые write_back_interval секунд и при закрытии
+               (быстрая запись; при аварийном завершении теряются изменения за последний интервал).
+               Каждый раз копируется вся база, а не только изменения, поэтому объем записи на диск
+               пропорционален размеру базы; запись в реплику на время копирования не останавливается
+               (копируется согласованный снимок через отдельное подключение для чтения);
+    commit   - каждая транзакция записи выполняется и в файле, и в реплике (файл фиксируется первым),
+               поэтому зафиксированные изменения не теряются; запись при этом не быстрее, чем без реплики.
+Реплика предполагает, что файл базы изменяется только этим процессом: изменения других процессов
+в ней не видны, а в режиме interval затираются при записи копии.
+"""
+
+import atexit
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import warnings
+from contextlib import contextmanager
+
+from instrumentation import QueryStats
+
+BUSY_TIMEOUT = 30  # Сколько секунд ждать снятия блокировки базы другим подключением или процессом
+REPLICA_WRITE_BACK_INTERVAL = 30  # Раз в сколько секунд изменения реплики в памяти записываются в файл
+WRITE_BACK_MODES = ("interval", "commit")  # Способы записи изменений реплики в файл (см. описание модуля)
+# Каталог для реплик в памяти; если /dev/shm нет, реплика создается во временном каталоге системы (на диске)
+# с предупреждением RuntimeWarning
+REPLICA_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+# Действия авторизатора SQLite, которые изменяют базу или состояние транзакции (см. MirroredConnection)
+WRITE_ACTIONS = frozenset(getattr(sqlite3, f"SQLITE_{name}") for name in (
+    "INSERT", "UPDATE", "DELETE", "CREATE_INDEX", "CREATE_TABLE", "CREATE_TEMP_INDEX", "CREATE_TEMP_TABLE",
+    "CREATE_TEMP_TRIGGER", "CREATE_TEMP_VIEW", "CREATE_TRIGGER", "CREATE_VIEW", "CREATE_VTABLE", "DROP_INDEX",
+    "DROP_TABLE", "DROP_TEMP_INDEX", "DROP_TEMP_TABLE", "DROP_TEMP_TRIGGER", "DROP_TEMP_VIEW", "DROP_TRIGGER",
+    "DROP_VIEW", "DROP_VTABLE", "ALTER_TABLE", "REINDEX", "ANALYZE", "TRANSACTION", "SAVEPOINT", "ATTACH", "DETACH"))
+# Прагмы с аргументом, которые только читают (с аргументом-значением остальные прагмы меняют настройки)
+READ_PRAGMAS = frozenset({"table_info", "table_xinfo", "index_list", "index_info", "index_xinfo",
+                          "foreign_key_list", "integrity_check", "quick_check"})
+
+
+# Подключение для записи реплики в режиме commit: изменяющие запросы выполняются и в файле базы,
+# и в реплике, чтения внутри транзакции записи - только в реплике. Изменяет ли запрос базу, определяет
+# авторизатор SQLite при подготовке запроса в реплике (поэтому у подключения реплики отключен кэш запросов).
+# Фиксируется сначала файл, и если это не удалось, транзакция реплики откатывается.
+# Остальные атрибуты берутся у подключения реплики
+class MirroredConnection:
+    def __init__(self, memory, disk):
+        self.memory = memory
+        self.disk = disk
+        self.writes = False  # Подготовленный в реплике запрос изменяет базу
+        memory.set_authorizer(self._authorize)
+
+    def _authorize(self, action, arg1, arg2, db_name, source):
+        if action in WRITE_ACTIONS or \
+                (action == sqlite3.SQLITE_PRAGMA and arg2 is not None and arg1.lower() not in READ_PRAGMAS):
+            self.writes = True
+        return sqlite3.SQLITE_OK
+
+    def _run(self, method, sql, parameters):
+        # Выполнение в реплике, затем (если запрос изменяет базу) в файле; EXPLAIN только описывает запрос
+        self.writes = False
+        cursor = getattr(self.memory, method)(sql, parameters)
+        if self.writes and sql.lstrip()[:7].upper() != "EXPLAIN":
+            getattr(self.disk, method)(sql, parameters)
+        return cursor
+
+    def execute(self, sql, parameters=()):
+        return self._run("execute", sql, parameters)
+
+    def executemany(self, sql, rows):
+        return self._run("executemany", sql, rows if isinstance(rows, list) else list(rows))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.disk.rollback()
+            self.memory.rollback()
+            return False
+        try:
+            self.disk.commit()
+        except BaseException:
+            self.memory.rollback()
+            raise
+        self.memory.commit()
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self.memory, name)
+
+
+# Менеджер подключений к одному файлу базы: у каждого потока свое подключение для чтения,
+# все записи идут через одно подключение-писатель под блокировкой. Журнал WAL позволяет
+# читать параллельно с записью (в том числе из других процессов)
+class ConnectionManager:
+    def __init__(self, db_name, busy_timeout=BUSY_TIMEOUT):
+        self.db_name = db_name
+        self.busy_timeout = busy_timeout
+        self.in_memory = db_name == ":memory:"
+        self.write_lock = threading.RLock()
+        self.local = threading.local()
+        self.lock = threading.Lock()  # Защищает список открытых подключений
+        self.connections = []
+        self._writer = None
+        self.schema_ready = False  # Таблицы уже созданы через этот менеджер
+        self.fts_enabled = False  # Доступен ли полнотекстовый поиск FTS5
+        self.stats = QueryStats(self.explain)  # Статистика запросов (по умолчанию выключена)
+        self.vocabulary = None  # (последний id навыка, словарь навыков) для исправления опечаток в поиске
+        self.vocabulary_lock = threading.Lock()
+        self.replica = None  # Путь к реплике в памяти (см. enable_replica) или None
+        self.write_back_mode = "interval"
+        self.write_back_interval = REPLICA_WRITE_BACK_INTERVAL
+        self.write_back_error = None  # Последняя ошибка периодической записи реплики в файл
+        self.dirty = False  # Реплика изменена после последней записи в файл
+        self._write_back_stop = None
+        self._write_back_lock = threading.RLock()  # Одна запись реплики в файл за раз; берется до write_lock
+        self._exit_registered = False
+
+    def _connect(self, disk=False, **options):
+        # check_same_thread отключена, чтобы close() мог закрыть подключения всех потоков;
+        # подключение для чтения при этом используется только своим потоком (вызывается под self.lock).
+        # При включенной реплике подключение открывается к ней, если не запрошен файл (disk=True)
+        path = self.replica if self.replica is not None and not disk else self.db_name
+        conn = sqlite3.connect(path, timeout=self.busy_timeout, check_same_thread=False, **options)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}")
+        self.connections.append(conn)
+        if self.stats.enabled:
+            self.stats.attach(conn)
+        return conn
+
+    @property
+    def writer(self):
+        # Подключение для записи (одно на менеджер, используется из разных потоков под write_lock)
+        with self.lock:
+            if self._writer is None:
+                if self.replica is None:
+                    self._writer = self._connect()
+                    if not self.in_memory:
+                        self._set_journal(self._writer)
+                else:
+                    # Реплика в памяти не переживает перезагрузку, поэтому синхронизация с диском ей не нужна
+                    commit = self.write_back_mode == "commit"
+                    self._writer = self._connect(**({"cached_statements": 0} if commit else {}))
+                    self._writer.execute("PRAGMA synchronous = OFF")
+                    if commit:
+                        disk = self._connect(disk=True)
+                        self._set_journal(disk)
+                        self._writer = MirroredConnection(self._writer, disk)
+            return self._writer
+
+    @staticmethod
+    def _set_journal(conn):
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+
+    def reader(self):
+        # Подключение для чтения текущего потока; база ":memory:" существует только в одном подключении
+        if self.in_memory:
+            return self.writer
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            with self.lock:
+                conn = self._connect()
+            conn.execute("PRAGMA query_only = ON")
+            self.local.conn = conn
+        return conn
+
+    def in_write(self):
+        return getattr(self.local, "write_depth", 0) > 0
+
+    def connection(self):
+        # Подключение для текущего потока: писатель внутри транзакции записи, иначе читатель
+        return self.writer if self.in_write() else self.reader()
+
+    @contextmanager
+    def write(self):
+        # Транзакция записи; вложенные вызовы выполняются в рамках внешней транзакции
+        with self.write_lock:
+            depth = getattr(self.local, "write_depth", 0)
+            writer = self.writer
+            self.local.write_depth = depth + 1
+            progress = getattr(self.local, "progress", None) if not depth else None
+            if progress is not None:
+                self.stats.set_progress(writer, *progress)
+            try:
+                if depth:
+                    yield writer
+                else:
+                    tracked = self.replica is not None and self.write_back_mode == "interval"
+                    version = self._version(writer) if tracked else None
+                    with writer:
+                        yield writer
+                    if tracked and self._version(writer) != version:
+                        self.dirty = True
+            finally:
+                self.local.write_depth = depth
+                if progress is not None:
+                    self.stats.set_progress(writer)
+
+    def set_progress(self, callback=None, steps=None):
+        # Обработчик прогресса запросов текущего потока (например, для отмены фонового запроса): ставится на его
+        # подключение для чтения и на подключение для записи на время его транзакций записи; None - снять
+        progress = None if callback is None else (callback,) if steps is None else (callback, steps)
+        self.local.progress = progress
+        self.stats.set_progress(self.reader(), *(progress or ()))
+
+    @staticmethod
+    def _version(conn):
+        # Признак изменения базы подключением: число измененных строк и версия схемы (для индексов и таблиц)
+        return conn.total_changes, conn.execute("PRAGMA schema_version").fetchone()[0]
+
+    def enable_replica(self, write_back="interval", interval=REPLICA_WRITE_BACK_INTERVAL):
+        # Копирование файла базы в реплику в памяти и переключение всех подключений на нее (см. описание
+        # модуля). Повторный вызов меняет только способ записи в файл. Открытые подключения закрываются
+        if self.in_memory:
+            raise ValueError("Реплика в памяти доступна только для базы в файле")
+        if write_back not in WRITE_BACK_MODES:
+            raise ValueError(f"Неизвестный способ записи реплики: {write_back} "
+                             f"(поддерживаются {', '.join(WRITE_BACK_MODES)})")
+        with self._write_back_lock, self.write_lock:
+            if self.replica is None:
+                if REPLICA_DIR is None:
+                    warnings.warn(f"Каталога в оперативной памяти (/dev/shm) нет: реплика базы {self.db_name} "
+                                  f"создается на диске, в {tempfile.gettempdir()}", RuntimeWarning, stacklevel=3)
+                self.close()
+                replica = os.path.join(tempfile.mkdtemp(prefix="hr-replica-", dir=REPLICA_DIR),
+                                       os.path.basename(self.db_name))
+                source = sqlite3.connect(self.db_name, timeout=self.busy_timeout)
+                target = sqlite3.connect(replica)
+                try:
+                    source.backup(target)
+                    target.execute("PRAGMA journal_mode = WAL")
+                except BaseException:
+                    target.close()
+                    shutil.rmtree(os.path.dirname(replica), ignore_errors=True)
+                    raise
+                finally:
+                    source.close()
+                target.close()
+                self.replica = replica
+            else:
+                self.write_back()
+                self.close_connections()
+            self.write_back_mode, self.write_back_interval = write_back, interval
+            if write_back == "interval" and self._write_back_stop is None:
+                self._write_back_stop = threading.Event()
+                threading.Thread(target=self._write_back_loop, args=(self._write_back_stop,),
+                                 name="hr-write-back", daemon=True).start()
+            elif write_back == "commit" and self._write_back_stop is not None:
+                self._write_back_stop.set()
+                self._write_back_stop = None
+            if not self._exit_registered:
+                atexit.register(self.close)
+                self._exit_registered = True
+
+    def _write_back_loop(self, stop):
+        # Периодическая запись реплики в файл; ошибка (например, файл временно недоступен) запоминается
+        # в write_back_error, и запись повторяется через интервал
+        while not stop.wait(self.write_back_interval):
+            try:
+                self.write_back()
+                self.write_back_error = None
+            except sqlite3.Error as e:
+                self.write_back_error = e
+
+    def write_back(self):
+        # Запись реплики в файл базы через backup API, если она изменилась после прошлой записи.
+        # Копируется согласованный снимок реплики (WAL), поэтому блокировка записи нужна только для проверки
+        # признака изменений: изменения, сделанные во время копирования, попадут в следующую запись.
+        # Нельзя вызывать внутри транзакции записи. Возвращает True, если файл обновлен
+        if self.in_write():
+            raise RuntimeError("Запись реплики в файл нельзя выполнять внутри транзакции записи")
+        with self._write_back_lock:
+            with self.write_lock:
+                if self.replica is None or not self.dirty:
+                    return False
+                self.dirty = False
+            try:
+                source = sqlite3.connect(self.replica, timeout=self.busy_timeout)
+                try:
+                    disk = sqlite3.connect(self.db_name, timeout=self.busy_timeout)
+                    try:
+                        self._set_journal(disk)
+                        source.backup(disk)
+                    finally:
+                        disk.close()
+                finally:
+                    source.close()
+            except BaseException:
+                self.dirty = True
+                raise
+            return True
+
+    def explain(self, sql):
+        # План запроса (EXPLAIN QUERY PLAN) через подключение для чтения текущего потока
+        if self.in_memory:
+            with self.write_lock:
+                return self.writer.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+        return self.reader().execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+
+    def set_stats_enabled(self, enabled):
+        # Включение или выключение статистики запросов для всех открытых и будущих подключений
+        with self.lock:
+            connections = list(self.connections)
+        self.stats.set_enabled(enabled, connections)
+
+    def close(self):
+        # Закрытие всех подключений; при следующем обращении они откроются заново. Реплика в памяти
+        # перед этим записывается в файл и отключается (если запись не удалась, реплика остается)
+        with self._write_back_lock, self.write_lock:
+            if self.replica is not None:
+                self.write_back()
+                if self._write_back_stop is not None:
+                    self._write_back_stop.set()
+                    self._write_back_stop = None
+                self.close_connections()
+                shutil.rmtree(os.path.dirname(self.replica), ignore_errors=True)
+                self.replica = None
+            else:
+                self.close_connections()
+
+    def close_connections(self):
+        # Закрытие всех подключений без отключения реплики
+        with self.write_lock:
+            with self.lock:
+                connections, self.connections = self.connections, []
+                self._writer = None
+                self.local = threading.local()
+            for conn in connections:
+                conn.close()
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def shared_manager(db_name):
+    # Общий менеджер для всех экземпляров HRDatabase, работающих с одним файлом базы
+    if db_name == ":memory:":
+        return ConnectionManager(db_name)
+    path = os.path.abspath(db_name)
+    with _managers_lock:
+        if path not in _managers:
+            _managers[path] = ConnectionManager(path)
+        return _managers[path]
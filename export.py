@@ -0,0 +1,193 @@
+"""Модуль потокового экспорта таблиц и результатов поиска в CSV, JSON Lines и сжатый колоночный формат
+
+Строки берутся из итератора (курсора базы, см. HRDatabase._iterate) и записываются сразу, поэтому память
+не зависит от числа строк. Файлы пишутся через буфер EXPORT_BUFFER_SIZE; max_rows разбивает результат
+на несколько файлов: candidates.csv -> candidates.0001.csv, candidates.0002.csv, ...
+
+Колоночный формат (.hrcol, little-endian): сигнатура COLUMNAR_MAGIC, длина и JSON со списком столбцов,
+затем группы строк по COLUMNAR_GROUP_ROWS. Группа - число строк (GROUP) и столбцы подряд: тип ('q' - целые,
+'d' - дробные, 's' - строки), длина и данные, сжатые zlib. Данные столбца - маска пустых значений (по байту
+на строку, если пустые есть) и значения: массив чисел или смещения строк ('Q') и байты UTF-8.
+Группа из нуля строк завершает файл. Файл читается обратно функцией read_columnar.
+"""
+
+import csv
+import json
+import os
+import struct
+import time
+import zlib
+from array import array
+from itertools import islice
+
+EXPORT_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".hrcol": "columnar"}  # Расширение файла -> формат
+EXPORT_BUFFER_SIZE = 1 << 20  # Буфер записи файла
+COLUMNAR_GROUP_ROWS = 65536  # Строк в группе колоночного формата (столбцы группы сжимаются отдельно)
+COLUMNAR_MAGIC = b"HRCOL\x00\x00\x01"
+GROUP = struct.Struct("<I")  # Число строк в группе
+COLUMN = struct.Struct("<cBI")  # Тип столбца, есть ли пустые значения, длина сжатых данных
+
+
+def export_format(filename, fmt=None):
+    # Формат по явному указанию или расширению файла
+    if fmt is None:
+        fmt = EXPORT_FORMATS.get(os.path.splitext(filename)[1].lower())
+    if fmt not in EXPORT_FORMATS.values():
+        raise ValueError(f"Неизвестный формат экспорта: {fmt or filename} "
+                         f"(поддерживаются {', '.join(EXPORT_FORMATS)})")
+    return fmt
+
+
+def part_filename(filename, part):
+    # Имя части файла при разбиении: name.csv -> name.0001.csv
+    root, ext = os.path.splitext(filename)
+    return f"{root}.{part:04d}{ext}"
+
+
+class CsvWriter:
+    def __init__(self, filename, columns):
+        self.file = open(filename, "w", encoding="utf-8", newline="", buffering=EXPORT_BUFFER_SIZE)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class JsonLinesWriter:
+    def __init__(self, filename, columns):
+        self.file = open(filename, "w", encoding="utf-8", buffering=EXPORT_BUFFER_SIZE)
+        self.columns = columns
+
+    def write_rows(self, rows):
+        columns = self.columns
+        self.file.writelines(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in rows)
+
+    def close(self):
+        self.file.close()
+
+
+def _encode_column(values):
+    # Тип столбца группы, признак пустых значений и несжатые данные (см. описание формата)
+    nulls = bytes(value is None for value in values)
+    present = [value for value in values if value is not None]
+    if all(type(value) is int and -2 ** 63 <= value < 2 ** 63 for value in present):
+        kind, data = b"q", array('q', present).tobytes()
+    elif all(type(value) in (int, float) for value in present):
+        kind, data = b"d", array('d', present).tobytes()
+    else:
+        offsets, blob = array('Q', [0]), bytearray()
+        for value in present:
+            blob += str(value).encode("utf-8")
+            offsets.append(len(blob))
+        kind, data = b"s", offsets.tobytes() + blob
+    has_nulls = len(present) < len(values)
+    return kind, has_nulls, (nulls if has_nulls else b"") + data
+
+
+class ColumnarWriter:
+    def __init__(self, filename, columns):
+        self.file = open(filename, "wb", buffering=EXPORT_BUFFER_SIZE)
+        self.columns = columns
+        self.group = []
+        header = json.dumps({"columns": columns}, ensure_ascii=False).encode("utf-8")
+        self.file.write(COLUMNAR_MAGIC + GROUP.pack(len(header)) + header)
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.group.append(row)
+            if len(self.group) >= COLUMNAR_GROUP_ROWS:
+                self._flush()
+
+    def _flush(self):
+        # Запись накопленной группы: строки раскладываются по столбцам, каждый столбец сжимается отдельно
+        self.file.write(GROUP.pack(len(self.group)))
+        for values in zip(*self.group):
+            kind, has_nulls, data = _encode_column(values)
+            data = zlib.compress(data)
+            self.file.write(COLUMN.pack(kind, has_nulls, len(data)) + data)
+        self.group = []
+
+    def close(self):
+        if self.group:
+            self._flush()
+        self.file.write(GROUP.pack(0))
+        self.file.close()
+
+
+WRITERS = {"csv": CsvWriter, "jsonl": JsonLinesWriter, "columnar": ColumnarWriter}
+
+
+def export_rows(rows, columns, filename, fmt=None, max_rows=None, batch_size=1000):
+    # Потоковая запись строк в файл формата fmt (по умолчанию - по расширению) или в несколько файлов
+    # не больше max_rows строк. Возвращает статистику: число строк, список файлов и время.
+    # При ошибке (в том числе при отмене запроса, из курсора которого читаются строки) записанные файлы удаляются
+    fmt = export_format(filename, fmt)
+    start = time.perf_counter()
+    rows = iter(rows)
+    files, total, writer = [], 0, None
+    try:
+        while True:
+            part = rows if max_rows is None else islice(rows, max_rows)  # Строки очередного файла
+            batch = list(islice(part, batch_size))
+            if not batch and files:
+                break
+            name = filename if max_rows is None else part_filename(filename, len(files) + 1)
+            files.append(name)
+            writer = WRITERS[fmt](name, columns)
+            while batch:
+                writer.write_rows(batch)
+                total += len(batch)
+                batch = list(islice(part, batch_size))
+            writer.close()
+            writer = None
+            if max_rows is None:
+                break
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        for name in files:
+            if os.path.exists(name):
+                os.remove(name)
+        raise
+    return {"rows": total, "files": files, "seconds": time.perf_counter() - start}
+
+
+def read_columnar(filename):
+    # Чтение файла колоночного формата: возвращает (столбцы, итератор строк), группы распаковываются по одной
+    file = open(filename, "rb")
+    if file.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+        file.close()
+        raise ValueError(f"Файл не в колоночном формате экспорта: {filename}")
+    (length,) = GROUP.unpack(file.read(GROUP.size))
+    columns = json.loads(file.read(length).decode("utf-8"))["columns"]
+
+    def read_rows():
+        with file:
+            while True:
+                (count,) = GROUP.unpack(file.read(GROUP.size))
+                if not count:
+                    break
+                yield from zip(*(_decode_column(file, count) for _ in columns))
+    return columns, read_rows()
+
+
+def _decode_column(file, count):
+    # Значения столбца группы из count строк (пустые значения - None)
+    kind, has_nulls, length = COLUMN.unpack(file.read(COLUMN.size))
+    data = zlib.decompress(file.read(length))
+    nulls, data = (data[:count], data[count:]) if has_nulls else (bytes(count), data)
+    present = count - sum(nulls)
+    if kind == b"s":
+        offsets = array('Q')
+        offsets.frombytes(data[:8 * (present + 1)])
+        blob = data[8 * (present + 1):]
+        values = iter([blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(present)])
+    else:
+        values = array(kind.decode("ascii"))
+        values.frombytes(data)
+        values = iter(values)
+    return [None if null else next(values) for null in nulls]
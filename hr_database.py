@@ -1,18 +1,239 @@
 """Модуль для работы с базой данных"""
 
+import hashlib
 import json
+import os
+import re
 import sqlite3
-from classes import Candidate, Vacancy
+import time
+from itertools import islice
+from classes import Candidate, Employer, Vacancy
+from columnar import SkillColumns
+from matching import MATCH_TOP_K, SQL_MATCH_MAX_VACANCIES, MatchEngine, score_sql, top_candidates_sql
+from connections import REPLICA_WRITE_BACK_INTERVAL, shared_manager
+from export import export_rows
+from importers import parse_file
+from instrumentation import instrument_public_methods
+from query_cache import shared_cache
+from skill_dictionary import ALIASES_BY_SKILL, SkillDictionary, canonical_skill, normalize_skill
+from snapshot import SnapshotRecords, open_snapshot, write_snapshot
+
+
+def split_skills(skills):
+    # Разбиение строки навыков по запятой на список уникальных нормализованных навыков (синонимы - по словарю)
+    result = []
+    for skill in skills.split(','):
+        skill = canonical_skill(skill)
+        if skill and skill not in result:
+            result.append(skill)
+    return result
+
+
+# Лексемы поискового запроса: фраза в кавычках, скобка или слово (с * на конце для поиска по префиксу)
+FTS_TOKEN_RE = re.compile(r'"[^"]*"|[()]|[^\s,()"]+')
+FTS_OPERATORS = {"or": "OR", "или": "OR", "and": "AND", "и": "AND", "not": "NOT", "не": "NOT"}
+
+
+def build_fts_query(text):
+    # Преобразование пользовательского запроса в выражение MATCH для FTS5:
+    # слова через пробел или запятую объединяются по AND, поддерживаются OR/AND/NOT, скобки и префиксы "pyth*"
+    parts = []
+    for token in FTS_TOKEN_RE.findall(text):
+        # Рядом со скобками FTS5 не объединяет выражения по AND без оператора, поэтому AND добавляется явно
+        if parts and (token == "(" and parts[-1] not in ("(", "OR", "AND", "NOT") or
+                      parts[-1] == ")" and token != ")" and token.casefold() not in FTS_OPERATORS):
+            parts.append("AND")
+        if token in ("(", ")"):
+            parts.append(token)
+        elif token.casefold() in FTS_OPERATORS:
+            parts.append(FTS_OPERATORS[token.casefold()])
+        else:
+            prefix = token.endswith("*")
+            term = token.strip('"*').replace('"', '')
+            if term:
+                parts.append(f'"{term}"' + ("*" if prefix else ""))
+    return " ".join(parts)
+
+
+def is_fts_syntax(token):
+    # Лексема запроса, которая не является навыком: оператор, скобка, фраза в кавычках или префикс "pyth*"
+    return token in ("(", ")") or token.casefold() in FTS_OPERATORS or '"' in token or token.endswith("*")
+
+
+def map_fts_terms(text, replace):
+    # Замена навыков в запросе полнотекстового поиска функцией replace(навык) -> текст: запрос без операторов,
+    # скобок, кавычек и префиксов разбирается как навыки через запятую, иначе заменяются отдельные слова
+    tokens = FTS_TOKEN_RE.findall(text)
+    if any(is_fts_syntax(token) for token in tokens):
+        return " ".join(token if is_fts_syntax(token) else replace(token) for token in tokens)
+    return ", ".join(replace(" ".join(part.split())) for part in text.split(",") if part.strip())
+
+
+def fts_skill_variants(term):
+    # Навык запроса -> выражение, которое находит и каноническое название, и все его синонимы: индекс FTS
+    # строится по тексту навыков как есть ("JS, React"), поэтому "js" и "javascript" раскрываются
+    # в ("javascript" OR "js" OR "java script" OR ...). Навык из нескольких слов, который не является
+    # синонимом или каноническим названием, раскрывается по словам
+    canonical = canonical_skill(term)
+    if canonical == normalize_skill(term) and " " in canonical and canonical not in ALIASES_BY_SKILL:
+        return " ".join(fts_skill_variants(word) for word in term.split())
+    names = [canonical] + ALIASES_BY_SKILL.get(canonical, [])
+    if len(names) == 1:
+        return term
+    return "(" + " OR ".join(f'"{name}"' for name in names) + ")"
+
+
+def correct_fts_query(text, dictionary, max_distance=None):
+    # Исправление опечаток в запросе полнотекстового поиска по словарю навыков (см. SkillDictionary.correct,
+    # map_fts_terms): навык из нескольких слов без близких совпадений исправляется по словам.
+    # Возвращает (запрос, {навык запроса: исправление})
+    corrections = {}
+
+    def correct(term):
+        fixed, found = dictionary.correct(term, max_distance)
+        if not found and " " in term and term not in dictionary:
+            return " ".join(correct(word) for word in term.split())
+        corrections.update(found)
+        return fixed
+    return map_fts_terms(text, correct), corrections
+
+
+# Триггеры синхронизации полнотекстовых индексов с таблицами кандидатов и вакансий
+FTS_TRIGGERS = {
+    "candidates_fts_insert": '''CREATE TRIGGER IF NOT EXISTS candidates_fts_insert AFTER INSERT ON Candidates BEGIN
+            INSERT INTO CandidatesFTS (rowid, skills) VALUES (new.id, new.skills);
+        END''',
+    "candidates_fts_delete": '''CREATE TRIGGER IF NOT EXISTS candidates_fts_delete AFTER DELETE ON Candidates BEGIN
+            INSERT INTO CandidatesFTS (CandidatesFTS, rowid, skills) VALUES ('delete', old.id, old.skills);
+        END''',
+    "candidates_fts_update": '''CREATE TRIGGER IF NOT EXISTS candidates_fts_update AFTER UPDATE ON Candidates BEGIN
+            INSERT INTO CandidatesFTS (CandidatesFTS, rowid, skills) VALUES ('delete', old.id, old.skills);
+            INSERT INTO CandidatesFTS (rowid, skills) VALUES (new.id, new.skills);
+        END''',
+    "vacancies_fts_insert": '''CREATE TRIGGER IF NOT EXISTS vacancies_fts_insert AFTER INSERT ON Vacancies BEGIN
+            INSERT INTO VacanciesFTS (rowid, requirements) VALUES (new.id, new.requirements);
+        END''',
+    "vacancies_fts_delete": '''CREATE TRIGGER IF NOT EXISTS vacancies_fts_delete AFTER DELETE ON Vacancies BEGIN
+            INSERT INTO VacanciesFTS (VacanciesFTS, rowid, requirements) VALUES ('delete', old.id, old.requirements);
+        END''',
+    "vacancies_fts_update": '''CREATE TRIGGER IF NOT EXISTS vacancies_fts_update AFTER UPDATE ON Vacancies BEGIN
+            INSERT INTO VacanciesFTS (VacanciesFTS, rowid, requirements) VALUES ('delete', old.id, old.requirements);
+            INSERT INTO VacanciesFTS (rowid, requirements) VALUES (new.id, new.requirements);
+        END''',
+}
+
+# Вторичные индексы, которые можно удалить на время массовой загрузки и построить заново
+SECONDARY_INDEXES = {
+    "idx_candidate_skills_candidate": "CREATE INDEX IF NOT EXISTS idx_candidate_skills_candidate "
+                                      "ON CandidateSkills (candidate_id, skill_id)",
+    "idx_vacancy_skills_vacancy": "CREATE INDEX IF NOT EXISTS idx_vacancy_skills_vacancy "
+                                  "ON VacancySkills (vacancy_id, skill_id)",
+    # Составной индекс (навык, опыт) для поиска по навыку с диапазоном опыта; candidate_id входит в него
+    # как часть первичного ключа, поэтому индекс покрывающий
+    "idx_candidate_skills_experience": "CREATE INDEX IF NOT EXISTS idx_candidate_skills_experience "
+                                       "ON CandidateSkills (skill_id, experience)",
+    "idx_candidates_experience": "CREATE INDEX IF NOT EXISTS idx_candidates_experience ON Candidates (experience)",
+    "idx_vacancies_employer": "CREATE INDEX IF NOT EXISTS idx_vacancies_employer ON Vacancies (employer_id)",
+}
+
+DB_NAME = "кадровое агентство сельгира.db"  # Файл базы данных по умолчанию
+FETCH_BATCH_SIZE = 1000  # Количество строк, читаемых из курсора за раз при потоковом чтении
+PAGE_LIMIT = 100  # Размер страницы по умолчанию
+BULK_BATCH_SIZE = 10000  # Размер пакета для executemany при массовой загрузке
+SKILL_INDEX_VERSION = 1  # Версия нормализации навыков (PRAGMA user_version); при изменении индекс перестраивается
+PLANNER_PROBE_LIMIT = 10000  # Больше скольких строк планировщик поиска не считает при оценке (чтение только индекса)
+MATCHES_PER_VACANCY = 50  # Сколько лучших кандидатов вакансии хранится в таблице Matches
+PLANNER_SORT_COST = 4  # Стоимость сортировки строки результата в строках индекса (для планировщика поиска)
+IMPORT_STREAMING_MIN_SIZE = 64 << 20  # С какого размера .json загружается потоково, а не чтением целиком
+IMPORT_ERROR_SAMPLES = 20  # Сколько первых ошибок импорта возвращается в статистике
+EMPLOYER_COUNT_WINDOW = 1 << 16  # Диапазон id кандидатов за один проход подсчета по работодателям (маски по 8 КБ)
+
+
+def experience_condition(column, min_experience=None, max_experience=None):
+    # Условия диапазона опыта (границы включительно) и их параметры
+    conditions, params = [], []
+    if min_experience is not None:
+        conditions.append(f"{column} >= ?")
+        params.append(min_experience)
+    if max_experience is not None:
+        conditions.append(f"{column} <= ?")
+        params.append(max_experience)
+    return conditions, params
+
+
+def file_checksum(filename, chunk_size=1 << 20):
+    # Контрольная сумма файла (читается блоками, без загрузки в память целиком)
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sync_key(kind, record):
+    # Естественный ключ и хэш содержимого записи исходного файла
+    if kind == "candidate":
+        key = record['name']
+        content = [record['name'], record['skills'], record['experience']]
+    else:
+        key = json.dumps([record['title'], record['employer_id']], ensure_ascii=False)
+        content = [record['title'], record['employer_id'], record['requirements']]
+    content_hash = hashlib.sha1(json.dumps(content, ensure_ascii=False).encode('utf-8')).hexdigest()
+    return key, content_hash
+
 
 # Класс для работы с базой данных
+@instrument_public_methods
 class HRDatabase:
-    def __init__(self, db_name="кадровое агентство сельгира.db"):
-        self.conn = sqlite3.connect(db_name)  # Подключение к базе данных
-        self.create_tables()  # Создание таблиц при инициализации базы данных
+    def __init__(self, db_name=DB_NAME, replica=False, write_back="interval",
+                 write_back_interval=REPLICA_WRITE_BACK_INTERVAL):
+        self.db_name = db_name
+        # Подключения к базе: свое для чтения в каждом потоке и общее для записи
+        self.manager = shared_manager(db_name)
+        if replica:
+            # Чтение из копии базы в памяти, изменения записываются в файл способом write_back
+            # ("interval" или "commit", см. connections.py). Копия общая для всех экземпляров с этим файлом
+            self.manager.enable_replica(write_back, write_back_interval)
+        self.cache = shared_cache(db_name)  # Кэш результатов поиска, общий для подключений к одной базе
+        self.fetch_batch_size = FETCH_BATCH_SIZE
+        if not self.manager.schema_ready:
+            self.create_tables()  # Создание таблиц при первом подключении к базе
+            self.manager.schema_ready = True
+
+    @property
+    def conn(self):
+        # Подключение текущего потока: для записи внутри self.manager.write(), иначе для чтения
+        return self.manager.connection()
+
+    @property
+    def fts_enabled(self):
+        return self.manager.fts_enabled
+
+    @property
+    def stats(self):
+        # Статистика запросов, общая для всех подключений к базе (включается через set_stats_enabled)
+        return self.manager.stats
+
+    def set_stats_enabled(self, enabled=True):
+        self.manager.set_stats_enabled(enabled)
+
+    def flush(self):
+        # Запись изменений реплики в памяти в файл базы, не дожидаясь интервала; без реплики ничего не делает.
+        # Возвращает True, если файл обновлен
+        return self.manager.write_back()
+
+    def close(self):
+        # Закрытие всех подключений к базе (реплика в памяти перед этим записывается в файл)
+        self.manager.close()
 
     def create_tables(self):
         # Создание таблиц в базе данных (если их нет)
-        with self.conn:
+        with self.manager.write():
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS Employers (
+                                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                    name TEXT NOT NULL,
+                                    industry TEXT NOT NULL,
+                                    description TEXT)''')
             self.conn.execute('''CREATE TABLE IF NOT EXISTS Candidates (
                                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                                     name TEXT NOT NULL,
@@ -24,92 +245,1238 @@ class HRDatabase:
                                     employer_id INTEGER NOT NULL,
                                     requirements TEXT,
                                     FOREIGN KEY (employer_id) REFERENCES Employers (id))''')
+            # Словарь нормализованных навыков
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS Skills (
+                                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                    name TEXT NOT NULL UNIQUE)''')
+            # Связующие таблицы: первичный ключ (skill_id, ...) служит покрывающим индексом для поиска,
+            # обратный индекс нужен для удаления навыков при редактировании записи.
+            # Опыт кандидата продублирован в CandidateSkills для составного индекса (навык, опыт)
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS CandidateSkills (
+                                    skill_id INTEGER NOT NULL,
+                                    candidate_id INTEGER NOT NULL,
+                                    experience INTEGER NOT NULL DEFAULT 0,
+                                    PRIMARY KEY (skill_id, candidate_id)) WITHOUT ROWID''')
+            if "experience" not in [row[1] for row in self.conn.execute("PRAGMA table_info(CandidateSkills)")]:
+                # База создана до появления поиска по опыту
+                self.conn.execute("ALTER TABLE CandidateSkills ADD COLUMN experience INTEGER NOT NULL DEFAULT 0")
+                self.conn.execute('''UPDATE CandidateSkills SET experience = (
+                                         SELECT experience FROM Candidates WHERE id = candidate_id)
+                                     WHERE candidate_id IN (SELECT id FROM Candidates)''')
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS VacancySkills (
+                                    skill_id INTEGER NOT NULL,
+                                    vacancy_id INTEGER NOT NULL,
+                                    PRIMARY KEY (skill_id, vacancy_id)) WITHOUT ROWID''')
+            # Состояние инкрементальной синхронизации с исходными файлами:
+            # контрольная сумма файла и хэши содержимого записей по естественным ключам
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS SyncFiles (
+                                    source TEXT PRIMARY KEY,
+                                    checksum TEXT NOT NULL,
+                                    synced_at REAL NOT NULL)''')
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS SyncRecords (
+                                    source TEXT NOT NULL,
+                                    kind TEXT NOT NULL,
+                                    natural_key TEXT NOT NULL,
+                                    content_hash TEXT NOT NULL,
+                                    row_id INTEGER NOT NULL,
+                                    PRIMARY KEY (source, kind, natural_key)) WITHOUT ROWID''')
+            # Пакетный подбор (batch_matching): задания, диапазоны кандидатов по шардам с промежуточными
+            # результатами для возобновления и итоговые k лучших кандидатов для каждой вакансии
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS MatchJobs (
+                                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                    k INTEGER NOT NULL,
+                                    started_at REAL NOT NULL,
+                                    finished_at REAL)''')
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS MatchJobShards (
+                                    job_id INTEGER NOT NULL,
+                                    shard INTEGER NOT NULL,
+                                    low_id INTEGER,
+                                    high_id INTEGER,
+                                    done_at REAL,
+                                    PRIMARY KEY (job_id, shard)) WITHOUT ROWID''')
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS MatchShardResults (
+                                    job_id INTEGER NOT NULL,
+                                    shard INTEGER NOT NULL,
+                                    vacancy_id INTEGER NOT NULL,
+                                    candidate_id INTEGER NOT NULL,
+                                    score REAL NOT NULL,
+                                    PRIMARY KEY (job_id, vacancy_id, shard, candidate_id)) WITHOUT ROWID''')
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS MatchResults (
+                                    vacancy_id INTEGER NOT NULL,
+                                    rank INTEGER NOT NULL,
+                                    candidate_id INTEGER NOT NULL,
+                                    score REAL NOT NULL,
+                                    job_id INTEGER NOT NULL,
+                                    PRIMARY KEY (vacancy_id, rank)) WITHOUT ROWID''')
+            # Лучшие MATCHES_PER_VACANCY кандидатов вакансий, обновляемые при изменении кандидата или вакансии.
+            # Списки заполняются при первом обращении к вакансии; вакансии с заполненным списком - в MatchesComputed
+            # (complete = 1, если в списке все кандидаты хотя бы с одним навыком вакансии)
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS Matches (
+                                    vacancy_id INTEGER NOT NULL,
+                                    candidate_id INTEGER NOT NULL,
+                                    score REAL NOT NULL,
+                                    PRIMARY KEY (vacancy_id, candidate_id)) WITHOUT ROWID''')
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS MatchesComputed (
+                                    vacancy_id INTEGER PRIMARY KEY,
+                                    complete INTEGER NOT NULL)''')
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_matches_rank ON Matches (vacancy_id, score DESC, candidate_id)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_matches_candidate ON Matches (candidate_id)")
+            # Сводка по работодателям, обновляемая при изменении вакансий и кандидатов: число вакансий и число
+            # кандидатов хотя бы с одним навыком из требований его вакансий (NULL - еще не подсчитано, считается
+            # при первом обращении). В EmployerSkills - навыки вакансий работодателя и число вакансий с навыком
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS EmployerStats (
+                                    employer_id INTEGER PRIMARY KEY,
+                                    vacancies INTEGER NOT NULL,
+                                    candidates INTEGER)''')
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS EmployerSkills (
+                                    skill_id INTEGER NOT NULL,
+                                    employer_id INTEGER NOT NULL,
+                                    vacancies INTEGER NOT NULL,
+                                    PRIMARY KEY (skill_id, employer_id)) WITHOUT ROWID''')
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_employer_skills_employer ON EmployerSkills (employer_id)")
+            # Индекс по имени для проверки дубликатов кандидатов
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_candidates_name ON Candidates (name)")
+            self._create_secondary_indexes()
+
+        # Заполнение связующих таблиц для базы, созданной до их появления или до изменения нормализации навыков
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if self._skill_index_missing() or version < SKILL_INDEX_VERSION:
+            self.rebuild_skill_index()
+        # Сводка по работодателям для базы, созданной до ее появления
+        if self.conn.execute("SELECT 1 FROM Vacancies LIMIT 1").fetchone() and \
+                not self.conn.execute("SELECT 1 FROM EmployerStats LIMIT 1").fetchone():
+            with self.manager.write():
+                self._rebuild_employer_stats()
+
+        self.create_fts_tables()
+
+    def create_fts_tables(self):
+        # Полнотекстовые индексы FTS5 по навыкам и требованиям (внешнее содержимое, синхронизация триггерами)
+        existing = {row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        try:
+            with self.manager.write():
+                self.conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS CandidatesFTS
+                                        USING fts5(skills, content='Candidates', content_rowid='id')''')
+                self.conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS VacanciesFTS
+                                        USING fts5(requirements, content='Vacancies', content_rowid='id')''')
+        except sqlite3.OperationalError:
+            self.manager.fts_enabled = False  # SQLite собран без FTS5, полнотекстовый поиск недоступен
+            return
+        self.manager.fts_enabled = True
+
+        with self.manager.write():
+            self._create_fts_triggers()
+            # Индекс только что создан для уже заполненной базы - строим его по существующим данным
+            if "CandidatesFTS" not in existing:
+                self.conn.execute("INSERT INTO CandidatesFTS (CandidatesFTS) VALUES ('rebuild')")
+            if "VacanciesFTS" not in existing:
+                self.conn.execute("INSERT INTO VacanciesFTS (VacanciesFTS) VALUES ('rebuild')")
+
+    def _create_fts_triggers(self):
+        for trigger_sql in FTS_TRIGGERS.values():
+            self.conn.execute(trigger_sql)
+
+    def _create_secondary_indexes(self):
+        for index_sql in SECONDARY_INDEXES.values():
+            self.conn.execute(index_sql)
+
+    def _drop_secondary_indexes(self):
+        # Удаление индексов и триггеров, которые дешевле перестроить после загрузки, чем обновлять построчно.
+        # DDL до первого изменения данных sqlite3 выполняет вне транзакции, поэтому транзакция начинается явно:
+        # при ошибке загрузки индексы и триггеры восстанавливаются откатом вместе с данными
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN")
+        for index_name in SECONDARY_INDEXES:
+            self.conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+        if self.fts_enabled:
+            for trigger_name in FTS_TRIGGERS:
+                self.conn.execute(f"DROP TRIGGER IF EXISTS {trigger_name}")
+
+    def _rebuild_secondary_indexes(self):
+        self._create_secondary_indexes()
+        if self.fts_enabled:
+            self._create_fts_triggers()
+            self.conn.execute("INSERT INTO CandidatesFTS (CandidatesFTS) VALUES ('rebuild')")
+            self.conn.execute("INSERT INTO VacanciesFTS (VacanciesFTS) VALUES ('rebuild')")
+
+    def _skill_index_missing(self):
+        # Есть записи, но связующие таблицы пусты
+        has_candidates = self.conn.execute("SELECT 1 FROM Candidates LIMIT 1").fetchone()
+        has_candidate_skills = self.conn.execute("SELECT 1 FROM CandidateSkills LIMIT 1").fetchone()
+        has_vacancies = self.conn.execute("SELECT 1 FROM Vacancies LIMIT 1").fetchone()
+        has_vacancy_skills = self.conn.execute("SELECT 1 FROM VacancySkills LIMIT 1").fetchone()
+        return bool(has_candidates and not has_candidate_skills) or bool(has_vacancies and not has_vacancy_skills)
+
+    def rebuild_skill_index(self):
+        # Полное перестроение связующих таблиц навыков по текстовым полям
+        with self.manager.write():
+            self.conn.execute("DELETE FROM CandidateSkills")
+            self.conn.execute("DELETE FROM VacancySkills")
+            self._clear_matches()
+            for candidate_id, skills in self.conn.execute("SELECT id, skills FROM Candidates").fetchall():
+                self._index_candidate_skills(candidate_id, skills)
+            for vacancy_id, requirements in self.conn.execute("SELECT id, requirements FROM Vacancies").fetchall():
+                self._index_vacancy_skills(vacancy_id, requirements)
+            # Навыки, которые больше ни у кого не встречаются (например, синонимы до замены на канонические)
+            self.conn.execute("DELETE FROM Skills WHERE id NOT IN (SELECT skill_id FROM CandidateSkills) "
+                              "AND id NOT IN (SELECT skill_id FROM VacancySkills)")
+            self._rebuild_employer_stats()
+            self.conn.execute(f"PRAGMA user_version = {SKILL_INDEX_VERSION}")
+        self.cache.clear()
+        self.manager.vocabulary = None  # Удаленные навыки не должны предлагаться при исправлении опечаток
+
+    def _skill_ids(self, skills, create=True):
+        # Получение id навыков из словаря (с добавлением новых навыков при create=True)
+        ids = []
+        for skill in split_skills(skills or ""):
+            if create:
+                self.conn.execute("INSERT OR IGNORE INTO Skills (name) VALUES (?)", (skill,))
+            row = self.conn.execute("SELECT id FROM Skills WHERE name = ?", (skill,)).fetchone()
+            if row is None:
+                return None  # Навыка нет в словаре, значит совпадений быть не может
+            ids.append(row[0])
+        return ids
+
+    def _candidate_skill_ids(self, candidate_id):
+        return [row[0] for row in self.conn.execute("SELECT skill_id FROM CandidateSkills WHERE candidate_id = ?",
+                                                    (candidate_id,))]
+
+    def _index_candidate_skills(self, candidate_id, skills):
+        # Запись навыков кандидата в связующую таблицу вместе с опытом из уже обновленной строки кандидата
+        # (вызывается внутри транзакции)
+        old_skill_ids = self._candidate_skill_ids(candidate_id)
+        skill_ids = self._skill_ids(skills)
+        self.conn.execute("DELETE FROM CandidateSkills WHERE candidate_id = ?", (candidate_id,))
+        self.conn.executemany('''INSERT OR IGNORE INTO CandidateSkills (skill_id, candidate_id, experience)
+                                 SELECT ?, id, experience FROM Candidates WHERE id = ?''',
+                              [(skill_id, candidate_id) for skill_id in skill_ids])
+        self._update_employer_candidates(old_skill_ids, skill_ids)
+
+    def _index_vacancy_skills(self, vacancy_id, requirements):
+        # Запись требований вакансии в связующую таблицу (вызывается внутри транзакции)
+        self.conn.execute("DELETE FROM VacancySkills WHERE vacancy_id = ?", (vacancy_id,))
+        self.conn.executemany("INSERT OR IGNORE INTO VacancySkills (skill_id, vacancy_id) VALUES (?, ?)",
+                              [(skill_id, vacancy_id) for skill_id in self._skill_ids(requirements)])
 
     def add_candidate(self, candidate: Candidate):
-        # Добавление нового кандидата в базу данных (если его нет)
-        with self.conn:
+        # Добавление нового кандидата в базу данных (если его нет); возвращает id кандидата или None
+        with self.manager.write():
             existing_candidates = self.conn.execute("SELECT * FROM Candidates WHERE name = ?",
                                                     (candidate.name,)).fetchall()
             if not existing_candidates:  # Если кандидат еще не существует в базе
-                self.conn.execute("INSERT INTO Candidates (name, skills, experience) VALUES (?, ?, ?)",
-                                  (candidate.name, candidate.skills, candidate.experience))
+                cursor = self.conn.execute("INSERT INTO Candidates (name, skills, experience) VALUES (?, ?, ?)",
+                                           (candidate.name, candidate.skills, candidate.experience))
+                self._index_candidate_skills(cursor.lastrowid, candidate.skills)
+                self._update_candidate_matches(cursor.lastrowid)
+            else:
+                return None
+        self._invalidate_candidates(candidate.skills)
+        return cursor.lastrowid
 
     def add_vacancy(self, vacancy: Vacancy):
-        # Добавление новой вакансии в базу данных (если она не существует)
-        with self.conn:
-            existing_vacancies = self.conn.execute("SELECT * FROM Vacancies WHERE title = ?", (vacancy.title,)).fetchall()
-            if not existing_vacancies:  # Если вакансия еще не существует в базе
-                self.conn.execute("INSERT INTO Vacancies (title, employer_id, requirements) VALUES (?, ?, ?)",
-                                  (vacancy.title, vacancy.employer_id, vacancy.requirements))
+        # Добавление новой вакансии в базу данных; возвращает id вакансии
+        with self.manager.write():
+            cursor = self.conn.execute("INSERT INTO Vacancies (title, employer_id, requirements) VALUES (?, ?, ?)",
+                                       (vacancy.title, vacancy.employer_id, vacancy.requirements))
+            self._index_vacancy_skills(cursor.lastrowid, vacancy.requirements)
+            self._update_vacancy_matches(cursor.lastrowid)
+            self._update_employer_vacancies(None, self._vacancy_state(cursor.lastrowid))
+        self._invalidate_vacancies(vacancy.requirements)
+        return cursor.lastrowid
+
+    def _invalidate_candidates(self, *skill_texts):
+        # Сброс кэшированных результатов поиска кандидатов, затронутых изменением навыков (старых и новых)
+        skills = {skill for text in skill_texts for skill in split_skills(text or "")}
+        self.cache.invalidate_skills("candidates", skills)
+        texts = [(text or "").lower() for text in skill_texts]
+        self.cache.invalidate_where("candidate_filter", lambda f: any(f.lower() in text for text in texts))
 
-    def load_from_file(self, filename):
+    def _invalidate_vacancies(self, *requirement_texts):
+        # Сброс кэшированных результатов поиска вакансий, затронутых изменением требований (старых и новых)
+        skills = {skill for text in requirement_texts for skill in split_skills(text or "")}
+        self.cache.invalidate_skills("vacancies", skills)
+
+    def _cached(self, key, compute):
+        # Результат из кэша или вычисленный заново (и запомненный)
+        result = self.cache.get(key)
+        if result is None:
+            generation = self.cache.generation
+            result = tuple(compute())
+            self.cache.put(key, result, generation)
+        return list(result)
+
+    def cache_stats(self):
+        # Статистика попаданий и промахов кэша поиска
+        return self.cache.stats()
+
+    @staticmethod
+    def read_data_file(filename):
+        # Чтение исходного файла с данными (.json или .txt). Если есть актуальный бинарный снимок файла
+        # (см. snapshot), записи читаются из него без разбора файла; иначе файл разбирается и снимок сохраняется.
+        # Отображение снимка в память снимается, когда возвращенные записи больше не используются
+        snapshot = open_snapshot(filename, SKILL_INDEX_VERSION)
+        if snapshot is not None:
+            return snapshot.data()
         with open(filename, 'r', encoding='utf-8') as file:
             if filename.endswith('.json'):
                 data = json.load(file)
             elif filename.endswith('.txt'):
-                import ast
-                data = ast.literal_eval(file.read())
+                text = file.read()
+                try:
+                    data = json.loads(text)  # Файлы .txt обычно совместимы с JSON, а его разбор намного быстрее
+                except ValueError:
+                    import ast
+                    data = ast.literal_eval(text)
             else:
                 raise ValueError("Поддерживаются только файлы .json или .txt")
+        try:
+            write_snapshot(filename, data, split_skills, SKILL_INDEX_VERSION)
+        except (OSError, ValueError):
+            # Снимок только ускоряет повторное чтение: если записать его нельзя (каталог только для чтения,
+            # значения не поддерживаемых снимком типов), данные возвращаются как есть
+            pass
+        return data
 
-        # Очистка таблиц перед загрузкой
-        with self.conn:
-            self.conn.execute("DELETE FROM Candidates")
-            self.conn.execute("DELETE FROM Vacancies")
+    def load_from_file(self, filename, workers=None):
+        # Файлы JSON Lines и CSV, а также .json больше IMPORT_STREAMING_MIN_SIZE загружаются потоково
+        # (см. import_file): с разбором в нескольких процессах и без чтения файла в память целиком
+        if not filename.endswith(('.json', '.txt')) or \
+                (filename.endswith('.json') and os.path.getsize(filename) >= IMPORT_STREAMING_MIN_SIZE):
+            return self.import_file(filename, workers=workers, replace=True)
+        data = self.read_data_file(filename)
+
+        # Загрузка данных в базу одной транзакцией с очисткой таблиц
+        candidates = (Candidate(c['name'], c['skills'], c['experience']) for c in data.get('candidates', []))
+        vacancies = (Vacancy(v['title'], v['employer_id'], v['requirements']) for v in data.get('vacancies', []))
+        return self.bulk_add(candidates, vacancies, clear=True)
+
+    def import_file(self, filename, fmt=None, workers=None, replace=False, errors_file=None):
+        # Потоковый импорт из JSON Lines, CSV или .json (см. importers): части файла разбираются и проверяются
+        # в workers процессах, записи копятся во временных таблицах и переносятся через bulk_add одной
+        # транзакцией. Некорректные записи пропускаются: их число и первые IMPORT_ERROR_SAMPLES попадают
+        # в статистику, а все - в errors_file (JSON Lines), если он задан. replace=True заменяет данные в базе
+        start = time.perf_counter()
+        errors, samples = 0, []
+        error_output = open(errors_file, "w", encoding="utf-8") if errors_file else None
+        try:
+            with self.manager.write():
+                self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS ImportCandidates "
+                                  "(name TEXT, skills TEXT, experience INTEGER)")
+                self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS ImportVacancies "
+                                  "(title TEXT, employer_id INTEGER, requirements TEXT)")
+                self.conn.execute("DELETE FROM ImportCandidates")
+                self.conn.execute("DELETE FROM ImportVacancies")
+                for candidates, vacancies, chunk_errors in parse_file(filename, fmt, workers):
+                    self.conn.executemany("INSERT INTO ImportCandidates VALUES (?, ?, ?)", candidates)
+                    self.conn.executemany("INSERT INTO ImportVacancies VALUES (?, ?, ?)", vacancies)
+                    errors += len(chunk_errors)
+                    samples.extend(chunk_errors[:IMPORT_ERROR_SAMPLES - len(samples)])
+                    if error_output is not None:
+                        error_output.writelines(json.dumps({"location": location, "error": message},
+                                                           ensure_ascii=False) + "\n"
+                                                for location, message in chunk_errors)
+                stats = self.bulk_add(
+                    (Candidate(*row) for row in self._iterate("SELECT * FROM ImportCandidates ORDER BY rowid")),
+                    (Vacancy(*row) for row in self._iterate("SELECT * FROM ImportVacancies ORDER BY rowid")),
+                    rebuild_indexes=replace, clear=replace)
+                self.conn.execute("DELETE FROM ImportCandidates")
+                self.conn.execute("DELETE FROM ImportVacancies")
+        finally:
+            if error_output is not None:
+                error_output.close()
+        elapsed = time.perf_counter() - start
+        rows = stats["candidates"] + stats["vacancies"]
+        stats.update(seconds=elapsed, rows_per_second=rows / elapsed if elapsed > 0 else float(rows),
+                     errors=errors, error_samples=[f"{location}: {message}" for location, message in samples])
+        return stats
+
+    def sync_from_file(self, filename, force=False):
+        # Инкрементальная синхронизация с исходным файлом: если файл не менялся с прошлой синхронизации,
+        # ничего не делается; иначе применяются только изменения файла с прошлого раза (по естественным ключам
+        # и хэшам содержимого). Записи, добавленные или измененные в приложении, при этом сохраняются
+        start = time.perf_counter()
+        source = os.path.abspath(filename)
+        checksum = file_checksum(filename)
+        row = self.conn.execute("SELECT checksum FROM SyncFiles WHERE source = ?", (source,)).fetchone()
+        stats = {"skipped": False, "inserted": 0, "updated": 0, "deleted": 0}
+        if row and row[0] == checksum and not force:
+            stats["skipped"] = True
+            stats["seconds"] = time.perf_counter() - start
+            return stats
+
+        data = self.read_data_file(filename)
+        with self.manager.write():
+            for kind, records in (("candidate", data.get('candidates', [])), ("vacancy", data.get('vacancies', []))):
+                self._sync_records(source, kind, records, stats)
+            self.conn.execute("INSERT OR REPLACE INTO SyncFiles (source, checksum, synced_at) VALUES (?, ?, ?)",
+                              (source, checksum, time.time()))
+        if stats["inserted"] or stats["updated"] or stats["deleted"]:
+            self.cache.clear()
+        stats["seconds"] = time.perf_counter() - start
+        return stats
+
+    def _sync_records(self, source, kind, records, stats):
+        # Сравнение записей файла с состоянием прошлой синхронизации и применение разницы
+        previous = {key: (content_hash, row_id) for key, content_hash, row_id in self.conn.execute(
+            "SELECT natural_key, content_hash, row_id FROM SyncRecords WHERE source = ? AND kind = ?", (source, kind))}
+        seen = set()
+        for record in records:
+            key, content_hash = sync_key(kind, record)
+            if key in seen:
+                continue  # Дубликаты по естественному ключу пропускаются, как и при обычной загрузке
+            seen.add(key)
+            if key in previous:
+                old_hash, row_id = previous[key]
+                if old_hash == content_hash:
+                    continue
+                if not self._sync_update(kind, row_id, record):
+                    row_id = self._sync_insert(kind, record)
+                stats["updated"] += 1
+            else:
+                row_id = self._sync_find(kind, record)  # Запись уже есть в базе (например, после load_from_file)
+                if row_id is None:
+                    row_id = self._sync_insert(kind, record)
+                    stats["inserted"] += 1
+            self.conn.execute('''INSERT OR REPLACE INTO SyncRecords (source, kind, natural_key, content_hash, row_id)
+                                 VALUES (?, ?, ?, ?, ?)''', (source, kind, key, content_hash, row_id))
+
+        # Записи, исчезнувшие из файла с прошлой синхронизации, удаляются из базы
+        for key in previous.keys() - seen:
+            self._sync_delete(kind, previous[key][1])
+            self.conn.execute("DELETE FROM SyncRecords WHERE source = ? AND kind = ? AND natural_key = ?",
+                              (source, kind, key))
+            stats["deleted"] += 1
+
+    def _sync_find(self, kind, record):
+        if kind == "candidate":
+            row = self.conn.execute("SELECT id FROM Candidates WHERE name = ?", (record['name'],)).fetchone()
+        else:
+            row = self.conn.execute("SELECT id FROM Vacancies WHERE title = ? AND employer_id = ?",
+                                    (record['title'], record['employer_id'])).fetchone()
+        return row[0] if row else None
 
-        # Загрузка данных в базу
-        candidates = data.get('candidates', [])
-        vacancies = data.get('vacancies', [])
+    def _sync_insert(self, kind, record):
+        if kind == "candidate":
+            cursor = self.conn.execute("INSERT INTO Candidates (name, skills, experience) VALUES (?, ?, ?)",
+                                       (record['name'], record['skills'], record['experience']))
+            self._index_candidate_skills(cursor.lastrowid, record['skills'])
+            self._update_candidate_matches(cursor.lastrowid)
+        else:
+            cursor = self.conn.execute("INSERT INTO Vacancies (title, employer_id, requirements) VALUES (?, ?, ?)",
+                                       (record['title'], record['employer_id'], record['requirements']))
+            self._index_vacancy_skills(cursor.lastrowid, record['requirements'])
+            self._update_vacancy_matches(cursor.lastrowid)
+            self._update_employer_vacancies(None, self._vacancy_state(cursor.lastrowid))
+        return cursor.lastrowid
 
-        for candidate in candidates:
-            self.add_candidate(Candidate(candidate['name'], candidate['skills'], candidate['experience']))
+    def _sync_update(self, kind, row_id, record):
+        if kind == "candidate":
+            cursor = self.conn.execute("UPDATE Candidates SET name = ?, skills = ?, experience = ? WHERE id = ?",
+                                       (record['name'], record['skills'], record['experience'], row_id))
+            if cursor.rowcount:
+                self._index_candidate_skills(row_id, record['skills'])
+                self._update_candidate_matches(row_id)
+        else:
+            old = self._vacancy_state(row_id)
+            cursor = self.conn.execute("UPDATE Vacancies SET title = ?, employer_id = ?, requirements = ? WHERE id = ?",
+                                       (record['title'], record['employer_id'], record['requirements'], row_id))
+            if cursor.rowcount:
+                self._index_vacancy_skills(row_id, record['requirements'])
+                self._update_vacancy_matches(row_id)
+                self._update_employer_vacancies(old, self._vacancy_state(row_id))
+        return cursor.rowcount > 0
 
-        for vacancy in vacancies:
-            self.add_vacancy(Vacancy(vacancy['title'], vacancy['employer_id'], vacancy['requirements']))
+    def _sync_delete(self, kind, row_id):
+        if kind == "candidate":
+            old_skill_ids = self._candidate_skill_ids(row_id)
+            self.conn.execute("DELETE FROM Candidates WHERE id = ?", (row_id,))
+            self.conn.execute("DELETE FROM CandidateSkills WHERE candidate_id = ?", (row_id,))
+            self._update_candidate_matches(row_id)
+            self._update_employer_candidates(old_skill_ids, ())
+        else:
+            old = self._vacancy_state(row_id)
+            self.conn.execute("DELETE FROM Vacancies WHERE id = ?", (row_id,))
+            self.conn.execute("DELETE FROM VacancySkills WHERE vacancy_id = ?", (row_id,))
+            self._update_vacancy_matches(row_id)
+            self._update_employer_vacancies(old, None)
+
+    def bulk_add(self, candidates=(), vacancies=(), batch_size=BULK_BATCH_SIZE, rebuild_indexes=False, clear=False):
+        # Массовая загрузка кандидатов и вакансий одной транзакцией.
+        # rebuild_indexes=True удаляет вторичные индексы и триггеры FTS на время загрузки и строит их заново,
+        # clear=True предварительно очищает таблицы. Возвращает статистику загрузки
+        start = time.perf_counter()
+        with self.manager.write():
+            if rebuild_indexes:
+                self._drop_secondary_indexes()
+            if clear:
+                self.conn.execute("DELETE FROM Candidates")
+                self.conn.execute("DELETE FROM Vacancies")
+                self.conn.execute("DELETE FROM CandidateSkills")
+                self.conn.execute("DELETE FROM VacancySkills")
+                # После полной перезагрузки id меняются, поэтому состояние синхронизации сбрасывается
+                self.conn.execute("DELETE FROM SyncRecords")
+                self.conn.execute("DELETE FROM SyncFiles")
+                # Результаты и незавершенные задания пакетного подбора ссылаются на удаленные id
+                for table in ("MatchResults", "MatchShardResults", "MatchJobShards", "MatchJobs"):
+                    self.conn.execute(f"DELETE FROM {table}")
+            candidates_added = self._bulk_insert_candidates(candidates, batch_size)
+            vacancies_added = self._bulk_insert_vacancies(vacancies, batch_size)
+            # Построчно обновлять списки подбора и сводку по работодателям при массовой загрузке дороже,
+            # чем заполнить их заново
+            self._clear_matches()
+            self._rebuild_employer_stats()
+            if rebuild_indexes:
+                self._rebuild_secondary_indexes()
+        self.cache.clear()
+        elapsed = time.perf_counter() - start
+        rows = candidates_added + vacancies_added
+        return {"candidates": candidates_added, "vacancies": vacancies_added, "seconds": elapsed,
+                "rows_per_second": rows / elapsed if elapsed > 0 else float(rows)}
+
+    def _bulk_insert_candidates(self, candidates, batch_size):
+        # Пакетная запись во временную таблицу и перенос новых кандидатов одним запросом:
+        # из дубликатов по имени остается первый, уже существующие в базе имена пропускаются
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS CandidatesStaging (name TEXT, skills TEXT, experience INTEGER)")
+        self.conn.execute("DELETE FROM CandidatesStaging")
+        rows = ((c.name, c.skills, c.experience) for c in candidates)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            self.conn.executemany("INSERT INTO CandidatesStaging (name, skills, experience) VALUES (?, ?, ?)", batch)
+
+        last_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM Candidates").fetchone()[0]
+        cursor = self.conn.execute('''INSERT INTO Candidates (name, skills, experience)
+                                       SELECT s.name, s.skills, s.experience FROM CandidatesStaging s
+                                       WHERE s.rowid IN (SELECT MIN(rowid) FROM CandidatesStaging GROUP BY name)
+                                         AND NOT EXISTS (SELECT 1 FROM Candidates c WHERE c.name = s.name)
+                                       ORDER BY s.rowid''')
+        self.conn.execute("DELETE FROM CandidatesStaging")
+        self._bulk_index_skills("SELECT id, skills, experience FROM Candidates WHERE id > ?", last_id,
+                                "INSERT OR IGNORE INTO CandidateSkills (skill_id, candidate_id, experience) "
+                                "VALUES (?, ?, ?)", batch_size)
+        return cursor.rowcount
+
+    def _bulk_insert_vacancies(self, vacancies, batch_size):
+        # Пакетная вставка вакансий
+        last_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM Vacancies").fetchone()[0]
+        rows = ((v.title, v.employer_id, v.requirements) for v in vacancies)
+        added = 0
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            self.conn.executemany("INSERT INTO Vacancies (title, employer_id, requirements) VALUES (?, ?, ?)", batch)
+            added += len(batch)
+        self._bulk_index_skills("SELECT id, requirements FROM Vacancies WHERE id > ?", last_id,
+                                "INSERT OR IGNORE INTO VacancySkills (skill_id, vacancy_id) VALUES (?, ?)",
+                                batch_size)
+        return added
+
+    def _bulk_index_skills(self, select_query, last_id, insert_query, batch_size):
+        # Заполнение связующей таблицы навыков для строк, добавленных после last_id
+        # (столбцы после текста навыков переносятся в связующую таблицу как есть)
+        skill_ids = {}
+        pairs = []
+        for row_id, skills, *extra in self._iterate(select_query, (last_id,)):
+            for skill in split_skills(skills or ""):
+                if skill not in skill_ids:
+                    self.conn.execute("INSERT OR IGNORE INTO Skills (name) VALUES (?)", (skill,))
+                    skill_ids[skill] = self.conn.execute("SELECT id FROM Skills WHERE name = ?", (skill,)).fetchone()[0]
+                pairs.append((skill_ids[skill], row_id, *extra))
+            if len(pairs) >= batch_size:
+                self.conn.executemany(insert_query, pairs)
+                pairs = []
+        if pairs:
+            self.conn.executemany(insert_query, pairs)
+
+    def _iterate(self, query, params=(), batch_size=None):
+        # Построчная выдача результата запроса: строки читаются из курсора порциями, память не зависит от объема
+        cursor = self.conn.execute(query, params)
+        batch_size = batch_size or self.fetch_batch_size
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+
+    def _keyset_page(self, table, where, params, after_id, limit, order_by, descending, after_value):
+        # Страница по ключу (keyset): продолжение после последней строки предыдущей страницы
+        # по индексу, без OFFSET, поэтому дальние страницы читаются так же быстро, как первая
+        if order_by not in self.table_columns(table):
+            raise ValueError(f"Неизвестный столбец: {order_by}")
+        conditions = [where] if where else []
+        params = list(params)
+        op, direction = ("<", "DESC") if descending else (">", "ASC")
+        if order_by == "id":
+            if after_id is not None:
+                conditions.append(f"id {op} ?")
+                params.append(after_id)
+            order = f"id {direction}"
+        else:
+            if after_id is not None:
+                conditions.append(f"({order_by}, id) {op} (?, ?)")
+                params += [after_value, after_id]
+            order = f"{order_by} {direction}, id {direction}"
+        query = f"SELECT * FROM {table}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY {order} LIMIT ?"
+        params.append(limit)
+        with self.conn:
+            return self.conn.execute(query, params).fetchall()
+
+    def iter_candidates(self, skill_filter=None, batch_size=None):
+        # Потоковое чтение всех кандидатов (или кандидатов, в навыках которых есть skill_filter)
+        if skill_filter:
+            return self._iterate("SELECT * FROM Candidates WHERE skills LIKE ? ORDER BY id",
+                                 (f"%{skill_filter}%",), batch_size)
+        return self._iterate("SELECT * FROM Candidates ORDER BY id", (), batch_size)
+
+    def get_candidates_page(self, after_id=None, limit=PAGE_LIMIT, order_by="id", descending=False,
+                            after_value=None, skill_filter=None):
+        # Страница кандидатов после after_id (при сортировке не по id - после пары (after_value, after_id))
+        where, params = ("skills LIKE ?", (f"%{skill_filter}%",)) if skill_filter else ("", ())
+        return self._keyset_page("Candidates", where, params, after_id, limit, order_by, descending, after_value)
 
     def get_candidates(self, skill_filter=None):
         # Получение всех кандидатов (или кандидатов с определенными навыками)
+        if skill_filter:
+            return self._cached(("candidate_filter", skill_filter), lambda: self.iter_candidates(skill_filter))
+        return list(self.iter_candidates())
+
+    def get_candidate(self, candidate_id):
+        # Получение одного кандидата по id (или None)
         with self.conn:
-            if skill_filter:
-                return self.conn.execute("SELECT * FROM Candidates WHERE skills LIKE ?", (f"%{skill_filter}%",)).fetchall()
-            return self.conn.execute("SELECT * FROM Candidates").fetchall()
+            return self.conn.execute("SELECT * FROM Candidates WHERE id = ?", (candidate_id,)).fetchone()
+
+    def get_ids(self, table):
+        # Список id кандидатов или вакансий (без чтения остальных столбцов)
+        self.table_columns(table)
+        return [row[0] for row in self._iterate(f"SELECT id FROM {table} ORDER BY id")]
 
     def edit_candidate(self, candidate_id, name, skills, experience):
-        # Редактирование данных кандидата
-        with self.conn:
-            self.conn.execute('''UPDATE Candidates 
-                                 SET name = ?, skills = ?, experience = ? 
+        # Редактирование данных кандидата; возвращает False, если кандидата нет
+        with self.manager.write():
+            old = self.conn.execute("SELECT skills FROM Candidates WHERE id = ?", (candidate_id,)).fetchone()
+            if old is None:
+                return False  # Навыки и сводка по работодателям не должны меняться для несуществующей записи
+            self.conn.execute('''UPDATE Candidates
+                                 SET name = ?, skills = ?, experience = ?
                                  WHERE id = ?''', (name, skills, experience, candidate_id))
+            self._index_candidate_skills(candidate_id, skills)
+            self._update_candidate_matches(candidate_id)
+        self._invalidate_candidates(skills, old[0])
+        return True
+
+    def edit_vacancy(self, vacancy_id, title, employer_id, requirements):
+        # Редактирование данных вакансии; возвращает False, если вакансии нет
+        with self.manager.write():
+            old = self.conn.execute("SELECT requirements FROM Vacancies WHERE id = ?", (vacancy_id,)).fetchone()
+            if old is None:
+                return False  # Иначе в VacancySkills появились бы строки без вакансии
+            old_state = self._vacancy_state(vacancy_id)
+            self.conn.execute('''UPDATE Vacancies
+                                 SET title = ?, employer_id = ?, requirements = ?
+                                 WHERE id = ?''', (title, employer_id, requirements, vacancy_id))
+            self._index_vacancy_skills(vacancy_id, requirements)
+            self._update_vacancy_matches(vacancy_id)
+            self._update_employer_vacancies(old_state, self._vacancy_state(vacancy_id))
+        self._invalidate_vacancies(requirements, old[0])
+        return True
+
+    def delete_candidate(self, candidate_id):
+        # Удаление кандидата; возвращает False, если кандидата нет
+        with self.manager.write():
+            old = self.conn.execute("SELECT skills FROM Candidates WHERE id = ?", (candidate_id,)).fetchone()
+            if old is None:
+                return False
+            self._sync_delete("candidate", candidate_id)
+        self._invalidate_candidates(old[0])
+        return True
+
+    def delete_vacancy(self, vacancy_id):
+        # Удаление вакансии; возвращает False, если вакансии нет
+        with self.manager.write():
+            old = self.conn.execute("SELECT requirements FROM Vacancies WHERE id = ?", (vacancy_id,)).fetchone()
+            if old is None:
+                return False
+            self._sync_delete("vacancy", vacancy_id)
+        self._invalidate_vacancies(old[0])
+        return True
+
+    def table_columns(self, table):
+        # Список столбцов таблицы кандидатов, вакансий или работодателей
+        if table not in ("Candidates", "Vacancies", "Employers"):
+            raise ValueError(f"Неизвестная таблица: {table}")
+        return [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")]
+
+    def open_table_cursor(self, table, order_column=None, descending=False):
+        # Курсор по всей таблице с сортировкой на стороне базы; строки читаются порциями через fetchmany
+        columns = self.table_columns(table)
+        query = f"SELECT * FROM {table}"
+        if order_column is not None:
+            if order_column not in columns:
+                raise ValueError(f"Неизвестный столбец: {order_column}")
+            query += f" ORDER BY {order_column} {'DESC' if descending else 'ASC'}, id"
+        return self.conn.execute(query)
+
+    def iter_vacancies(self, batch_size=None):
+        # Потоковое чтение всех вакансий
+        return self._iterate("SELECT * FROM Vacancies ORDER BY id", (), batch_size)
+
+    def get_vacancies_page(self, after_id=None, limit=PAGE_LIMIT, order_by="id", descending=False, after_value=None):
+        # Страница вакансий после after_id (при сортировке не по id - после пары (after_value, after_id))
+        return self._keyset_page("Vacancies", "", (), after_id, limit, order_by, descending, after_value)
 
     def get_vacancies(self):
         # Получение всех вакансий
+        return list(self.iter_vacancies())
+
+    def get_vacancy(self, vacancy_id):
+        # Получение одной вакансии по id (или None)
         with self.conn:
-            return self.conn.execute("SELECT * FROM Vacancies").fetchall()
+            return self.conn.execute("SELECT * FROM Vacancies WHERE id = ?", (vacancy_id,)).fetchone()
+
+    def _skill_intersection_query(self, table, junction, key, skill_ids, after_id=None, limit=None, descending=False):
+        # Построение запроса-пересечения по связующей таблице: первый навык задает диапазон
+        # в покрывающем индексе, остальные проверяются точечным поиском по первичному ключу.
+        # Строки идут в порядке id прямо из индекса, поэтому страницы по after_id не требуют сортировки
+        joins = "".join(f" JOIN {junction} s{i} ON s{i}.skill_id = ? AND s{i}.{key} = s0.{key}"
+                        for i in range(1, len(skill_ids)))
+        query = f"SELECT t.* FROM {junction} s0{joins} JOIN {table} t ON t.id = s0.{key} WHERE s0.skill_id = ?"
+        params = list(skill_ids[1:]) + [skill_ids[0]]
+        if after_id is not None:
+            query += f" AND s0.{key} {'<' if descending else '>'} ?"
+            params.append(after_id)
+        query += f" ORDER BY s0.{key} {'DESC' if descending else 'ASC'}"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return query, tuple(params)
+
+    def find_vacancies_by_skill(self, skills, fuzzy=False):
+        # Поиск вакансий по навыкам (все перечисленные через запятую навыки должны присутствовать);
+        # fuzzy=True исправляет опечатки в навыках (см. correct_skills)
+        if fuzzy:
+            skills = self.correct_skills(skills)[0]
+        key = ("vacancies", frozenset(split_skills(skills)))
+        return self._cached(key, lambda: self._find_by_skills("Vacancies", "VacancySkills", "vacancy_id", skills))
+
+    def find_matching_candidates(self, skills, min_experience=None, max_experience=None, fuzzy=False):
+        # Поиск кандидатов по навыкам (все перечисленные через запятую навыки должны присутствовать)
+        # и опыту в годах (границы включительно). Результаты с диапазоном опыта не кэшируются.
+        # fuzzy=True исправляет опечатки в навыках (см. correct_skills)
+        if fuzzy:
+            skills = self.correct_skills(skills)[0]
+        if min_experience is not None or max_experience is not None:
+            return list(self._iter_candidate_search(skills, min_experience, max_experience))
+        key = ("candidates", frozenset(split_skills(skills)))
+        return self._cached(key, lambda: self._find_by_skills("Candidates", "CandidateSkills", "candidate_id", skills))
+
+    def _find_by_skills(self, table, junction, key, skills):
+        return list(self._iter_by_skills(table, junction, key, skills))
+
+    def _iter_by_skills(self, table, junction, key, skills, after_id=None, limit=None, descending=False,
+                        batch_size=None):
+        skill_ids = self._skill_ids(skills, create=False)
+        if not skill_ids:
+            return
+        query, params = self._skill_intersection_query(table, junction, key, skill_ids, after_id, limit, descending)
+        yield from self._iterate(query, params, batch_size)
+
+    def iter_matching_candidates(self, skills, batch_size=None, min_experience=None, max_experience=None):
+        # Потоковый поиск кандидатов по навыкам (и опыту)
+        if min_experience is not None or max_experience is not None:
+            return self._iter_candidate_search(skills, min_experience, max_experience, batch_size=batch_size)
+        return self._iter_by_skills("Candidates", "CandidateSkills", "candidate_id", skills, batch_size=batch_size)
+
+    def iter_vacancies_by_skill(self, skills, batch_size=None):
+        # Потоковый поиск вакансий по навыкам
+        return self._iter_by_skills("Vacancies", "VacancySkills", "vacancy_id", skills, batch_size=batch_size)
+
+    def find_matching_candidates_page(self, skills, after_id=None, limit=PAGE_LIMIT, descending=False,
+                                      min_experience=None, max_experience=None):
+        # Страница результатов поиска кандидатов (по навыкам и опыту) после кандидата after_id
+        if min_experience is not None or max_experience is not None:
+            return list(self._iter_candidate_search(skills, min_experience, max_experience, after_id, limit,
+                                                    descending))
+        return list(self._iter_by_skills("Candidates", "CandidateSkills", "candidate_id", skills,
+                                         after_id, limit, descending))
+
+    def _probe_count(self, query, params):
+        # Число строк запроса, но не больше PLANNER_PROBE_LIMIT (оценка для планировщика)
+        return self.conn.execute(f"SELECT COUNT(*) FROM ({query} LIMIT {PLANNER_PROBE_LIMIT})", params).fetchone()[0]
+
+    def _plan_candidate_search(self, skill_ids, min_experience, max_experience, limit=None):
+        # Выбор ведущего индекса для поиска кандидатов по навыкам и опыту по оценке числа читаемых строк.
+        # Строки считаются по индексам не дальше PLANNER_PROBE_LIMIT, доля опыта из диапазона для навыка
+        # оценивается по этой же выборке:
+        #   skill - первичный ключ самого редкого навыка в порядке id, опыт проверяется в той же строке;
+        #           выгоден для страниц при широком диапазоне опыта, так как чтение останавливается на limit
+        #   skill_range - составной индекс (навык, опыт): только строки навыка из диапазона и сортировка по id
+        #   experience - индекс Candidates (experience): только кандидаты из диапазона, навыки проверяются по ключу
+        #   id - таблица кандидатов в порядке id (без навыков, для первых страниц при широком диапазоне)
+        # Возвращает {"driver": план, "skill_id": ведущий навык, "estimates": {план: оценка}}
+        conditions, params = experience_condition("experience", min_experience, max_experience)
+        where = " AND ".join(conditions)
+        in_range = self._probe_count(f"SELECT 1 FROM Candidates WHERE {where}", params)
+        # Оценка плана - число прочитанных строк индексов с учетом проверок навыков и сортировки
+        estimates = {"experience": in_range * (1 + len(skill_ids) + PLANNER_SORT_COST)}
+        plan = {"skill_id": None}
+        if skill_ids:
+            lookups = len(skill_ids) - 1  # Проверки остальных навыков по первичному ключу
+            totals, ranged = {}, {}
+            for s in skill_ids:
+                totals[s], ranged[s] = self.conn.execute(
+                    f"""SELECT COUNT(*), COALESCE(SUM({where}), 0) FROM (
+                            SELECT experience FROM CandidateSkills WHERE skill_id = ?
+                            ORDER BY candidate_id LIMIT {PLANNER_PROBE_LIMIT})""",
+                    params + [s]).fetchone()
+            skill_id = min(skill_ids, key=lambda s: totals[s])
+            rows, hits = totals[skill_id], ranged[skill_id]
+            if limit is not None:
+                rows = min(rows, -(-limit * rows // max(hits, 1)))
+            estimates["skill"] = rows + rows * hits // max(totals[skill_id], 1) * lookups
+            range_skill_id = min(skill_ids, key=lambda s: ranged[s])
+            estimates["skill_range"] = ranged[range_skill_id] * (1 + lookups + PLANNER_SORT_COST)
+            plan["skill_id"] = range_skill_id
+        elif limit is not None:
+            total = self._probe_count("SELECT 1 FROM Candidates", ())
+            estimates["id"] = min(total, -(-limit * total // max(in_range, 1)))
+        plan["driver"] = min(estimates, key=estimates.get)
+        if plan["driver"] == "skill":
+            plan["skill_id"] = skill_id
+        plan["estimates"] = estimates
+        return plan
+
+    def _candidate_search_query(self, skill_ids, min_experience, max_experience, after_id=None, limit=None,
+                                descending=False):
+        # Запрос поиска кандидатов по навыкам и опыту по плану _plan_candidate_search. Порядок таблиц
+        # закреплен CROSS JOIN, а унарный плюс перед столбцом запрещает SQLite использовать по нему индекс
+        plan = self._plan_candidate_search(skill_ids, min_experience, max_experience, limit)
+        driver = plan["driver"]
+        if driver in ("skill", "skill_range"):
+            index = " INDEXED BY idx_candidate_skills_experience" if driver == "skill_range" else ""
+            query = f"SELECT t.* FROM CandidateSkills s{index}"
+            key, column = "s.candidate_id", "s.experience" if driver == "skill_range" else "+s.experience"
+            others = [s for s in skill_ids if s != plan["skill_id"]]
+        else:
+            index = " INDEXED BY idx_candidates_experience" if driver == "experience" else ""
+            query = f"SELECT t.* FROM Candidates t{index}"
+            key, column = "t.id", "t.experience" if driver == "experience" else "+t.experience"
+            others = skill_ids
+        params = []
+        for i, skill_id in enumerate(others):
+            query += f" CROSS JOIN CandidateSkills s{i} ON s{i}.skill_id = ? AND s{i}.candidate_id = {key}"
+            params.append(skill_id)
+        conditions, range_params = experience_condition(column, min_experience, max_experience)
+        if driver in ("skill", "skill_range"):
+            query += f" CROSS JOIN Candidates t ON t.id = {key}"
+            conditions.insert(0, "s.skill_id = ?")
+            params.append(plan["skill_id"])
+        params += range_params
+        if after_id is not None:
+            conditions.append(f"{key} {'<' if descending else '>'} ?")
+            params.append(after_id)
+        query += f" WHERE {' AND '.join(conditions)} ORDER BY {key} {'DESC' if descending else 'ASC'}"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return query, tuple(params)
+
+    def _iter_candidate_search(self, skills, min_experience, max_experience, after_id=None, limit=None,
+                               descending=False, batch_size=None):
+        # Кандидаты со всеми навыками skills (можно не указывать) и опытом из диапазона
+        skill_ids = self._skill_ids(skills or "", create=False)
+        if skill_ids is None:
+            return
+        query, params = self._candidate_search_query(skill_ids, min_experience, max_experience, after_id, limit,
+                                                     descending)
+        yield from self._iterate(query, params, batch_size)
+
+    def find_vacancies_by_skill_page(self, skills, after_id=None, limit=PAGE_LIMIT, descending=False):
+        # Страница результатов поиска вакансий после вакансии after_id
+        return list(self._iter_by_skills("Vacancies", "VacancySkills", "vacancy_id", skills,
+                                         after_id, limit, descending))
 
-    def find_matching_candidates(self, requirements):
-        # Поиск кандидатов, соответствующих требованиям вакансии
+    def _fulltext_search(self, table, fts_table, text, limit):
+        # Поиск по полнотекстовому индексу с ранжированием BM25 (лучшие совпадения первыми);
+        # навык в запросе находит записи и с каноническим названием, и с любым его синонимом
+        match = build_fts_query(map_fts_terms(text, fts_skill_variants))
+        if not match:
+            return []
+        query = (f"SELECT t.* FROM {fts_table} f JOIN {table} t ON t.id = f.rowid "
+                 f"WHERE {fts_table} MATCH ? ORDER BY f.rank LIMIT ?")
         with self.conn:
-            return self.conn.execute('''SELECT * FROM Candidates WHERE skills LIKE ?''', (f"%{requirements}%",)).fetchall()
+            try:
+                return self.conn.execute(query, (match, limit)).fetchall()
+            except sqlite3.OperationalError as e:
+                raise ValueError(f"Некорректный поисковый запрос: {text}") from e
 
-    def add_vacancy(self, vacancy: Vacancy):
+    def search_candidates(self, text, limit=50):
+        # Полнотекстовый поиск кандидатов по навыкам, например "python django", "java OR kotlin", "pyth*"
+        return self._fulltext_search("Candidates", "CandidatesFTS", text, limit)
+
+    def search_vacancies(self, text, limit=50):
+        # Полнотекстовый поиск вакансий по требованиям
+        return self._fulltext_search("Vacancies", "VacanciesFTS", text, limit)
+
+    def skill_dictionary(self):
+        # Словарь навыков базы для автодополнения и проверки запросов
         with self.conn:
-            self.conn.execute("INSERT INTO Vacancies (title, employer_id, requirements) VALUES (?, ?, ?)",
-                              (vacancy.title, vacancy.employer_id, vacancy.requirements))
-
-    def find_vacancies_by_skill(self, skills):
-        # Поиск вакансий по навыкам
-        skill_list = [skill.strip() for skill in skills.split(',')]  # Разделение навыков по запятой
-        query = "SELECT * FROM Vacancies WHERE " + " AND ".join(
-            ["requirements LIKE ?" for _ in skill_list])
-        params = [f"%{skill}%" for skill in skill_list]
+            return SkillDictionary.from_connection(self.conn)
+
+    def correct_skills(self, skills, max_distance=None, fulltext=False):
+        # Исправление опечаток в навыках запроса по словарю навыков базы ("Pyhton, Djnago" -> "Python, Django"):
+        # (строка навыков, {навык запроса: исправление}). Близкие навыки ищутся по индексу (см. FuzzySkillIndex).
+        # fulltext=True - запрос полнотекстового поиска (операторы, скобки и префиксы не меняются)
+        with self.conn, self.manager.vocabulary_lock:
+            if fulltext:
+                return correct_fts_query(skills, self._skill_vocabulary(), max_distance)
+            return self._skill_vocabulary().correct(skills, max_distance)
+
+    def _skill_vocabulary(self):
+        # Словарь навыков для исправления опечаток, общий для подключений к базе: строится один раз
+        # и дополняется навыками, добавленными в таблицу Skills после этого (id навыков только растут)
+        last_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM Skills").fetchone()[0]
+        if self.manager.vocabulary is None or last_id < self.manager.vocabulary[0]:
+            self.manager.vocabulary = (last_id, SkillDictionary.from_connection(self.conn))
+        elif last_id > self.manager.vocabulary[0]:
+            known_id, dictionary = self.manager.vocabulary
+            for (name,) in self.conn.execute("SELECT name FROM Skills WHERE id > ?", (known_id,)):
+                dictionary.add(name)
+            self.manager.vocabulary = (last_id, dictionary)
+        return self.manager.vocabulary[1]
+
+    def load_columns(self, table="Candidates"):
+        # Колоночное представление всех кандидатов или вакансий с id навыков из таблицы Skills
+        if table not in ("Candidates", "Vacancies"):
+            raise ValueError(f"Неизвестная таблица: {table}")
         with self.conn:
-            return self.conn.execute(query, tuple(params)).fetchall()
-
-    def find_matching_candidates(self, skills):
-        # Поиск кандидатов по навыкам
-        skill_list = [skill.strip() for skill in skills.split(',')]  # Разделение навыков по запятой
-        query = "SELECT * FROM Candidates WHERE " + " AND ".join(
-            ["skills LIKE ?" for _ in skill_list])
-        params = [f"%{skill}%" for skill in skill_list]
+            return SkillColumns.from_connection(self.conn, table)
+
+    def columns_from_file(self, filename, table="Candidates"):
+        # Колоночное представление записей исходного файла без загрузки в базу
+        data = self.read_data_file(filename)
+        records = data.get(table.lower())
+        if isinstance(records, SnapshotRecords):
+            # Записи из снимка: колонки - представления его массивов, без построения
+            return records.skill_columns()
+        if table == "Candidates":
+            return SkillColumns.from_records(data.get('candidates', []), "experience", "skills", split_skills)
+        if table == "Vacancies":
+            return SkillColumns.from_records(data.get('vacancies', []), "employer_id", "requirements", split_skills)
+        raise ValueError(f"Неизвестная таблица: {table}")
+
+    def export(self, filename, source="candidates", fmt=None, max_rows=None, skills=None, min_experience=None,
+               max_experience=None, k=MATCH_TOP_K):
+        # Потоковый экспорт в CSV, JSON Lines или колоночный формат (см. export) прямо из курсора.
+        # source: candidates или vacancies (при skills и опыте - результаты поиска), employers,
+        # matches (подбор k лучших кандидатов) или batch-matches (результаты пакетного подбора)
+        match_columns = ["vacancy_id", "title", "candidate_id", "name", "score"]
+        by_search = skills or min_experience is not None or max_experience is not None
+        if source == "candidates":
+            rows = self.iter_matching_candidates(skills or "", None, min_experience, max_experience) if by_search \
+                else self.iter_candidates()
+            columns = self.table_columns("Candidates")
+        elif source == "vacancies":
+            rows = self.iter_vacancies_by_skill(skills) if skills else self.iter_vacancies()
+            columns = self.table_columns("Vacancies")
+        elif source == "employers":
+            rows, columns = self._iterate("SELECT * FROM Employers ORDER BY id"), self.table_columns("Employers")
+        elif source == "matches":
+            rows, columns = self.match_vacancies(k), match_columns
+        elif source == "batch-matches":
+            rows, columns = self.iter_match_results(), match_columns
+        else:
+            raise ValueError(f"Неизвестный источник экспорта: {source}")
+        return export_rows(rows, columns, filename, fmt, max_rows)
+
+    def export_rows(self, rows, columns, filename, fmt=None, max_rows=None):
+        # Экспорт готовых строк (например, результатов поиска, уже показанных в таблице)
+        return export_rows(rows, columns, filename, fmt, max_rows)
+
+    def _column_by_id(self, table, column, ids):
+        # {id: значение столбца} для списка id (запросами по 500 id)
+        values = {}
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            values.update(self.conn.execute(
+                f"SELECT id, {column} FROM {table} WHERE id IN ({', '.join('?' * len(chunk))})", chunk))
+        return values
+
+    def iter_match_results(self, vacancy_ids=None):
+        # Результаты последнего пакетного подбора (batch_matching) в формате match_vacancies
+        query = '''SELECT r.vacancy_id, v.title, r.candidate_id, c.name, r.score FROM MatchResults r
+                   LEFT JOIN Vacancies v ON v.id = r.vacancy_id
+                   LEFT JOIN Candidates c ON c.id = r.candidate_id'''
+        params = ()
+        if vacancy_ids:
+            params = tuple(vacancy_ids)
+            query += f" WHERE r.vacancy_id IN ({', '.join('?' * len(params))})"
+        return self._iterate(query + " ORDER BY r.vacancy_id, r.rank", params)
+
+    def _clear_matches(self):
+        # Сброс всех списков подбора (заполнятся заново при обращении к вакансиям; внутри транзакции)
+        self.conn.execute("DELETE FROM Matches")
+        self.conn.execute("DELETE FROM MatchesComputed")
+
+    def _update_vacancy_matches(self, vacancy_id):
+        # Пересчет списка подбора вакансии после ее добавления или изменения (внутри транзакции);
+        # читаются только кандидаты с навыками вакансии. Удаленная вакансия убирается из таблицы
+        self.conn.execute("DELETE FROM Matches WHERE vacancy_id = ?", (vacancy_id,))
+        if self.conn.execute("SELECT 1 FROM Vacancies WHERE id = ?", (vacancy_id,)).fetchone() is None:
+            self.conn.execute("DELETE FROM MatchesComputed WHERE vacancy_id = ?", (vacancy_id,))
+            return
+        # На одного кандидата больше, чтобы узнать, все ли кандидаты поместились в список
+        top = top_candidates_sql(self.conn, vacancy_id, MATCHES_PER_VACANCY + 1)
+        self.conn.executemany("INSERT INTO Matches (vacancy_id, candidate_id, score) VALUES (?, ?, ?)",
+                              [(vacancy_id, candidate_id, score) for candidate_id, score in top[:MATCHES_PER_VACANCY]])
+        self.conn.execute("INSERT OR REPLACE INTO MatchesComputed (vacancy_id, complete) VALUES (?, ?)",
+                          (vacancy_id, int(len(top) <= MATCHES_PER_VACANCY)))
+
+    def _update_candidate_matches(self, candidate_id):
+        # Обновление списков подбора после добавления, изменения или удаления кандидата (внутри транзакции).
+        # Затрагиваются только заполненные списки вакансий с общими с кандидатом навыками, а в каждом из них -
+        # одна строка: кандидаты не из неполного списка не лучше его последнего места, поэтому новая оценка
+        # сравнивается только с ним. Кандидат хуже последнего места неполного списка выбывает из него, и список
+        # становится короче; список короче запрошенного пересчитывается при чтении (_vacancy_top)
+        self.conn.execute("DELETE FROM Matches WHERE candidate_id = ?", (candidate_id,))
+        scores = self.conn.execute(f'''SELECT vs.vacancy_id, m.complete, {score_sql(
+                                           "COUNT(*)",
+                                           "(SELECT COUNT(*) FROM VacancySkills r WHERE r.vacancy_id = vs.vacancy_id)",
+                                           "MAX(cs.experience)")}
+                                       FROM CandidateSkills cs
+                                       JOIN VacancySkills vs ON vs.skill_id = cs.skill_id
+                                       JOIN MatchesComputed m ON m.vacancy_id = vs.vacancy_id
+                                       WHERE cs.candidate_id = ?
+                                       GROUP BY vs.vacancy_id''', (candidate_id,)).fetchall()
+        for vacancy_id, complete, score in scores:
+            count = self.conn.execute("SELECT COUNT(*) FROM Matches WHERE vacancy_id = ?", (vacancy_id,)).fetchone()[0]
+            last = self.conn.execute('''SELECT candidate_id, score FROM Matches WHERE vacancy_id = ?
+                                         ORDER BY score, candidate_id DESC LIMIT 1''', (vacancy_id,)).fetchone()
+            fits = last is not None and (-score, candidate_id) < (-last[1], last[0])  # Лучше последнего места
+            if not complete and not fits:
+                continue
+            if count >= MATCHES_PER_VACANCY:
+                # Список заполнен: кандидат занимает место последнего либо сам остается за списком
+                self.conn.execute("UPDATE MatchesComputed SET complete = 0 WHERE vacancy_id = ?", (vacancy_id,))
+                if not fits:
+                    continue
+                self.conn.execute("DELETE FROM Matches WHERE vacancy_id = ? AND candidate_id = ?", (vacancy_id, last[0]))
+            self.conn.execute("INSERT INTO Matches (vacancy_id, candidate_id, score) VALUES (?, ?, ?)",
+                              (vacancy_id, candidate_id, score))
+
+    def _vacancy_top(self, vacancy_id, k=MATCH_TOP_K):
+        # k лучших кандидатов вакансии [(id кандидата, оценка)] из таблицы Matches; список вакансии,
+        # к которой еще не обращались (или ставший короче k после изменений кандидатов), рассчитывается заново
+        if k > MATCHES_PER_VACANCY:
+            return top_candidates_sql(self.conn, vacancy_id, k)
+        query = "SELECT candidate_id, score FROM Matches WHERE vacancy_id = ? ORDER BY score DESC, candidate_id LIMIT ?"
+        state = self.conn.execute("SELECT complete FROM MatchesComputed WHERE vacancy_id = ?", (vacancy_id,)).fetchone()
+        if state is not None:
+            top = self.conn.execute(query, (vacancy_id, k)).fetchall()
+            if state[0] or len(top) >= k:
+                return top
+        with self.manager.write():
+            self._update_vacancy_matches(vacancy_id)
+            return self.conn.execute(query, (vacancy_id, k)).fetchall()
+
+    def vacancy_matches(self, vacancy_id, k=MATCH_TOP_K):
+        # Лучшие кандидаты для вакансии из таблицы Matches: строки (id кандидата, имя, навыки, опыт, оценка)
+        top = self._vacancy_top(vacancy_id, k)
+        rows = {row[0]: row for row in self.conn.execute(
+            f"SELECT * FROM Candidates WHERE id IN ({', '.join('?' * len(top))})", [c for c, _ in top])}
+        return [rows[candidate_id] + (score,) for candidate_id, score in top if candidate_id in rows]
+
+    def match_vacancies(self, k=MATCH_TOP_K, vacancy_ids=None):
+        # Подбор k лучших кандидатов для каждой вакансии (или только для vacancy_ids).
+        # Возвращает строки (id вакансии, название, id кандидата, имя, оценка)
+        if vacancy_ids is not None and len(vacancy_ids) <= SQL_MATCH_MAX_VACANCIES:
+            top = {vacancy_id: self._vacancy_top(vacancy_id, k) for vacancy_id in vacancy_ids}
         with self.conn:
-            return self.conn.execute(query, tuple(params)).fetchall()
+            if vacancy_ids is None or len(vacancy_ids) > SQL_MATCH_MAX_VACANCIES:
+                top = MatchEngine.from_connection(self.conn).top_candidates(k, vacancy_ids)
+            titles = self._column_by_id("Vacancies", "title", sorted(top))
+            names = self._column_by_id("Candidates", "name",
+                                       sorted({candidate_id for matches in top.values() for candidate_id, _ in matches}))
+        return [(vacancy_id, titles.get(vacancy_id), candidate_id, names.get(candidate_id), score)
+                for vacancy_id in sorted(top) for candidate_id, score in top[vacancy_id]]
+
+    def add_employer(self, employer: Employer):
+        # Добавление работодателя; возвращает id работодателя
+        with self.manager.write():
+            cursor = self.conn.execute("INSERT INTO Employers (name, industry, description) VALUES (?, ?, ?)",
+                                       (employer.name, employer.industry, employer.description))
+        return cursor.lastrowid
+
+    def edit_employer(self, employer_id, name, industry, description):
+        # Редактирование данных работодателя; возвращает False, если работодателя нет
+        with self.manager.write():
+            cursor = self.conn.execute("UPDATE Employers SET name = ?, industry = ?, description = ? WHERE id = ?",
+                                       (name, industry, description, employer_id))
+        return cursor.rowcount > 0
+
+    def delete_employer(self, employer_id):
+        # Удаление работодателя без вакансий; возвращает False, если работодателя нет
+        with self.manager.write():
+            if self.conn.execute("SELECT 1 FROM Vacancies WHERE employer_id = ? LIMIT 1", (employer_id,)).fetchone():
+                raise ValueError("Нельзя удалить работодателя, у которого есть вакансии")
+            cursor = self.conn.execute("DELETE FROM Employers WHERE id = ?", (employer_id,))
+        return cursor.rowcount > 0
+
+    def get_employer(self, employer_id):
+        # Получение одного работодателя по id (или None)
+        with self.conn:
+            return self.conn.execute("SELECT * FROM Employers WHERE id = ?", (employer_id,)).fetchone()
+
+    def get_employers(self):
+        # Получение всех работодателей
+        return list(self._iterate("SELECT * FROM Employers ORDER BY id"))
+
+    def get_employer_vacancies(self, employer_id):
+        # Вакансии работодателя (по индексу idx_vacancies_employer, без чтения всей таблицы)
+        return list(self._iterate("SELECT * FROM Vacancies WHERE employer_id = ? ORDER BY id", (employer_id,)))
+
+    def employer_matches(self, employer_id, k=MATCH_TOP_K):
+        # Вакансии работодателя с лучшими кандидатами: строки (id вакансии, название, id кандидата, имя, оценка)
+        vacancy_ids = [row[0] for row in self.conn.execute(
+            "SELECT id FROM Vacancies WHERE employer_id = ? ORDER BY id", (employer_id,))]
+        return self.match_vacancies(k, vacancy_ids)
+
+    def employer_stats(self, employer_ids=None):
+        # Сводка по работодателям из EmployerStats (без подсчета по всем вакансиям): строки (id работодателя,
+        # название, число вакансий, число кандидатов хотя бы с одним навыком его вакансий). Без employer_ids -
+        # все работодатели из Employers и все, на кого ссылаются вакансии
+        self._fill_employer_candidates(employer_ids)
+        query = '''SELECT ids.id, e.name, COALESCE(s.vacancies, 0), COALESCE(s.candidates, 0)
+                   FROM (SELECT id FROM Employers UNION SELECT employer_id FROM EmployerStats) ids
+                   LEFT JOIN Employers e ON e.id = ids.id
+                   LEFT JOIN EmployerStats s ON s.employer_id = ids.id'''
+        params = ()
+        if employer_ids is not None:
+            params = tuple(employer_ids)
+            query += f" WHERE ids.id IN ({', '.join('?' * len(params))})"
+        with self.conn:
+            return self.conn.execute(query + " ORDER BY ids.id", params).fetchall()
+
+    def _vacancy_state(self, vacancy_id):
+        # Работодатель и id навыков вакансии (или None, если вакансии нет) для обновления сводки по работодателям
+        row = self.conn.execute("SELECT employer_id FROM Vacancies WHERE id = ?", (vacancy_id,)).fetchone()
+        if row is None:
+            return None
+        return row[0], [skill_id for (skill_id,) in self.conn.execute(
+            "SELECT skill_id FROM VacancySkills WHERE vacancy_id = ?", (vacancy_id,))]
+
+    def _rebuild_employer_stats(self):
+        # Полный пересчет сводки по работодателям (внутри транзакции); кандидаты подсчитываются при обращении
+        self.conn.execute("DELETE FROM EmployerStats")
+        self.conn.execute("DELETE FROM EmployerSkills")
+        self.conn.execute('''INSERT INTO EmployerStats (employer_id, vacancies)
+                             SELECT employer_id, COUNT(*) FROM Vacancies GROUP BY employer_id''')
+        self.conn.execute('''INSERT INTO EmployerSkills (skill_id, employer_id, vacancies)
+                             SELECT vs.skill_id, v.employer_id, COUNT(*) FROM VacancySkills vs
+                             JOIN Vacancies v ON v.id = vs.vacancy_id
+                             GROUP BY vs.skill_id, v.employer_id''')
+
+    def _uncovered_candidates(self, employer_id, skill_ids):
+        # Число кандидатов с одним из навыков skill_ids, у которых нет ни одного навыка из EmployerSkills работодателя
+        return self.conn.execute(f'''SELECT COUNT(DISTINCT cs.candidate_id) FROM CandidateSkills cs
+                                     WHERE cs.skill_id IN ({', '.join('?' * len(skill_ids))})
+                                       AND NOT EXISTS (
+                                           SELECT 1 FROM CandidateSkills other
+                                           JOIN EmployerSkills e ON e.skill_id = other.skill_id AND e.employer_id = ?
+                                           WHERE other.candidate_id = cs.candidate_id)''',
+                                 (*skill_ids, employer_id)).fetchone()[0]
+
+    def _update_employer_vacancies(self, old, new):
+        # Обновление сводки после добавления, изменения или удаления вакансии (внутри транзакции); old и new -
+        # состояния вакансии до и после (_vacancy_state). Число кандидатов меняется только из-за навыков, которые
+        # появились у работодателя или пропали: новые кандидаты считаются до записи навыков, выбывшие - после
+        deltas = {}  # id работодателя -> [изменение числа вакансий, {id навыка: изменение числа вакансий}]
+        for state, sign in ((old, -1), (new, 1)):
+            if state is None:
+                continue
+            employer_id, skill_ids = state
+            delta = deltas.setdefault(employer_id, [0, {}])
+            delta[0] += sign
+            for skill_id in skill_ids:
+                delta[1][skill_id] = delta[1].get(skill_id, 0) + sign
+        for employer_id, (vacancies, skills) in deltas.items():
+            skills = {skill_id: change for skill_id, change in skills.items() if change}
+            if not vacancies and not skills:
+                continue
+            self.conn.execute("INSERT OR IGNORE INTO EmployerStats (employer_id, vacancies, candidates) "
+                              "VALUES (?, 0, 0)", (employer_id,))
+            counted = self.conn.execute("SELECT candidates IS NOT NULL FROM EmployerStats WHERE employer_id = ?",
+                                        (employer_id,)).fetchone()[0]
+            current = dict(self.conn.execute(
+                f'''SELECT skill_id, vacancies FROM EmployerSkills
+                    WHERE skill_id IN ({', '.join('?' * len(skills))}) AND employer_id = ?''', (*skills, employer_id)))
+            added = [skill_id for skill_id, change in skills.items() if change > 0 and skill_id not in current]
+            removed = [skill_id for skill_id, change in skills.items() if current.get(skill_id, 0) + change <= 0]
+            candidates = self._uncovered_candidates(employer_id, added) if counted and added else 0
+            for skill_id, change in skills.items():
+                if skill_id in removed:
+                    self.conn.execute("DELETE FROM EmployerSkills WHERE skill_id = ? AND employer_id = ?",
+                                      (skill_id, employer_id))
+                else:
+                    self.conn.execute("INSERT OR REPLACE INTO EmployerSkills (skill_id, employer_id, vacancies) "
+                                      "VALUES (?, ?, ?)", (skill_id, employer_id, current.get(skill_id, 0) + change))
+            if counted and removed:
+                candidates -= self._uncovered_candidates(employer_id, removed)
+            self.conn.execute('''UPDATE EmployerStats SET vacancies = vacancies + ?, candidates = candidates + ?
+                                 WHERE employer_id = ?''', (vacancies, candidates, employer_id))
+            self.conn.execute("DELETE FROM EmployerStats WHERE employer_id = ? AND vacancies <= 0", (employer_id,))
+
+    def _update_employer_candidates(self, old_skill_ids, new_skill_ids):
+        # Обновление числа подходящих кандидатов работодателей после изменения навыков кандидата
+        # (внутри транзакции): затрагиваются только работодатели, у вакансий которых есть старые или новые навыки
+        old, new = sorted(set(old_skill_ids)), sorted(set(new_skill_ids))
+        if old == new:
+            return
+        skill_ids = sorted(set(old) | set(new))
+        # +1 работодателям, которым кандидат подходит только с новыми навыками, -1 - только со старыми
+        changes = self.conn.execute(f'''SELECT change, employer_id FROM (
+                                             SELECT employer_id, MAX(skill_id IN ({', '.join('?' * len(new))}))
+                                                 - MAX(skill_id IN ({', '.join('?' * len(old))})) AS change
+                                             FROM EmployerSkills WHERE skill_id IN ({', '.join('?' * len(skill_ids))})
+                                             GROUP BY employer_id)
+                                         WHERE change != 0''', (*new, *old, *skill_ids)).fetchall()
+        self.conn.executemany("UPDATE EmployerStats SET candidates = candidates + ? WHERE employer_id = ?", changes)
+
+    def _fill_employer_candidates(self, employer_ids=None):
+        # Подсчет кандидатов для работодателей, у которых он еще не выполнялся (candidates IS NULL).
+        # Для каждого навыка строится битовая маска кандидатов, кандидаты работодателя - объединение масок его
+        # навыков; кандидаты обрабатываются диапазонами по EMPLOYER_COUNT_WINDOW id, чтобы ограничить память
+        pending_query = "SELECT employer_id FROM EmployerStats WHERE candidates IS NULL"
+        wanted = None if employer_ids is None else set(employer_ids)
+        if not any(wanted is None or employer_id in wanted for (employer_id,) in self.conn.execute(pending_query)):
+            return
+        with self.manager.write():
+            employer_skills = {employer_id: [] for (employer_id,) in self.conn.execute(pending_query).fetchall()
+                               if wanted is None or employer_id in wanted}
+            for skill_id, employer_id in self.conn.execute("SELECT skill_id, employer_id FROM EmployerSkills"):
+                if employer_id in employer_skills:
+                    employer_skills[employer_id].append(skill_id)
+            skill_ids = sorted({skill_id for skills in employer_skills.values() for skill_id in skills})
+            counts = dict.fromkeys(employer_skills, 0)
+            last_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM Candidates").fetchone()[0]
+            for low in range(0, last_id + 1, EMPLOYER_COUNT_WINDOW):
+                masks = {}
+                for skill_id in skill_ids:
+                    bits = bytearray(EMPLOYER_COUNT_WINDOW // 8)
+                    for (candidate_id,) in self.conn.execute(
+                            '''SELECT candidate_id FROM CandidateSkills
+                               WHERE skill_id = ? AND candidate_id >= ? AND candidate_id < ?''',
+                            (skill_id, low, low + EMPLOYER_COUNT_WINDOW)):
+                        bits[(candidate_id - low) >> 3] |= 1 << ((candidate_id - low) & 7)
+                    masks[skill_id] = int.from_bytes(bits, "little")
+                for employer_id, skills in employer_skills.items():
+                    covered = 0
+                    for skill_id in skills:
+                        covered |= masks[skill_id]
+                    counts[employer_id] += covered.bit_count()
+            self.conn.executemany("UPDATE EmployerStats SET candidates = ? WHERE employer_id = ?",
+                                  [(count, employer_id) for employer_id, count in counts.items()])
@@ -0,0 +1,362 @@
+"""Модуль потокового импорта кандидатов и вакансий из JSON Lines, CSV и файлов формата input_data.json
+
+Файл читается блоками по IMPORT_CHUNK_BYTES и делится на части по границам записей, не разбирая их:
+JSON Lines - по строкам, CSV - по строкам вне значений в кавычках, JSON - по запятым между элементами массивов
+"candidates" и "vacancies" (скобки и запятые учитываются вне строк и с вложенностью, как в самом JSON).
+Части разбираются и проверяются в процессах-обработчиках, на процесс в обработке не больше двух частей,
+поэтому память не зависит от размера файла. Результаты отдаются в порядке файла.
+
+Тип записи JSON Lines и CSV задается полем kind (candidate или vacancy), иначе определяется по полям:
+title - вакансия, name - кандидат. Некорректная запись не прерывает загрузку, а попадает в ошибки
+с местом в файле ("строка 15" или "candidates, запись 15") и текстом ошибки.
+
+Пример: python cli.py import partners.jsonl --workers 8 --errors errors.jsonl
+"""
+
+import csv
+import io
+import json
+import multiprocessing
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+IMPORT_FORMATS = {".jsonl": "jsonl", ".csv": "csv", ".json": "json"}  # Расширение файла -> формат
+IMPORT_CHUNK_BYTES = 4 << 20  # Размер блока чтения и части файла для процесса-обработчика
+IMPORT_CHUNKS_PER_WORKER = 2  # Частей в обработке на процесс: пока одна разбирается, следующая уже передана
+SECTIONS = {"candidates": "candidate", "vacancies": "vacancy"}  # Раздел файла JSON -> тип записей
+
+JSON_STRING_RE = re.compile(rb'"(?:[^"\\]|\\.)*"', re.S)
+# Лексемы JSON для поиска границ записей: объект или массив без вложенных объектов и массивов (целиком, поэтому
+# обычная запись - одна лексема), строка, скобка или запятая; отдельная кавычка - начало строки,
+# которая не закончилась в буфере
+JSON_TOKEN_RE = re.compile(rb'\{[^{}\[\]"]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^{}\[\]"]*)*\}'
+                           rb'|\[[^{}\[\]"]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^{}\[\]"]*)*\]'
+                           rb'|"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\],"]', re.S)
+WHITESPACE = b" \t\r\n"
+
+
+def import_format(filename, fmt=None):
+    # Формат по явному указанию или расширению файла
+    if fmt is None:
+        fmt = IMPORT_FORMATS.get(os.path.splitext(filename)[1].lower())
+    if fmt not in IMPORT_FORMATS.values():
+        raise ValueError(f"Неизвестный формат импорта: {fmt or filename} "
+                         f"(поддерживаются {', '.join(IMPORT_FORMATS)})")
+    return fmt
+
+
+def _text(record, field, required=True):
+    value = record.get(field)
+    if not isinstance(value, str) or (required and not value.strip()):
+        raise ValueError(f"Поле {field} должно быть {'непустой ' if required else ''}строкой")
+    return value
+
+
+def _integer(record, field):
+    # Целое число (в CSV - строка из цифр)
+    value = record.get(field)
+    if isinstance(value, str):
+        try:
+            value = int(value)
+        except ValueError:
+            pass
+    if type(value) is not int or not -2 ** 63 <= value < 2 ** 63:
+        raise ValueError(f"Поле {field} должно быть целым числом")
+    return value
+
+
+def validate_record(record, kind=None):
+    # Проверка записи файла: (тип, кортеж полей таблицы); при ошибке - ValueError с описанием
+    if not isinstance(record, dict):
+        raise ValueError("Запись должна быть объектом")
+    kind = record.get("kind") or kind or ("vacancy" if "title" in record else "candidate" if "name" in record
+                                          else None)
+    if kind == "candidate":
+        experience = _integer(record, "experience")
+        if experience < 0:
+            raise ValueError("Поле experience не может быть отрицательным")
+        return kind, (_text(record, "name"), _text(record, "skills", False), experience)
+    if kind == "vacancy":
+        requirements = record.get("requirements")
+        return kind, (_text(record, "title"), _integer(record, "employer_id"),
+                      None if requirements is None else _text(record, "requirements", False))
+    if kind is None:
+        raise ValueError("Не удалось определить тип записи: нужно поле kind, name или title")
+    raise ValueError(f"Неизвестный тип записи: {kind}")
+
+
+def parse_chunk(fmt, data, first, kind=None, columns=None):
+    # Разбор и проверка части файла (выполняется в процессе-обработчике). first - номер первой строки части
+    # (для JSON - первой записи части в разделе kind), columns - заголовок CSV.
+    # Возвращает (кандидаты, вакансии, ошибки, число записей): записи - кортежи полей, ошибки - (номер, текст)
+    candidates, vacancies, errors = [], [], []
+    count = 0
+
+    def add(number, record, default_kind):
+        try:
+            record_kind, row = validate_record(record, default_kind)
+        except ValueError as e:
+            errors.append((number, str(e)))
+            return
+        (candidates if record_kind == "candidate" else vacancies).append(row)
+
+    if fmt == "jsonl":
+        for number, line in enumerate(data.split(b"\n"), first):
+            if line.strip():
+                count += 1
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    errors.append((number, f"Некорректный JSON: {e}"))
+                    continue
+                add(number, record, None)
+    elif fmt == "csv":
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError as e:
+            return [], [], [(first, f"Некорректная кодировка (нужна UTF-8): {e}")], 0
+        reader = csv.reader(io.StringIO(text, newline=""))
+        line = first
+        for values in reader:
+            number, line = line, first + reader.line_num  # Запись может занимать несколько строк
+            if not values:
+                continue
+            count += 1
+            if len(values) != len(columns):
+                errors.append((number, f"Ожидалось значений: {len(columns)}, получено: {len(values)}"))
+                continue
+            add(number, dict(zip(columns, values)), None)
+    else:
+        try:
+            records = json.loads(b"[" + data + b"]")
+        except ValueError:
+            # Часть не разбирается целиком: записи разбираются по одной, чтобы ошибка в одной записи
+            # не отбросила остальные и не сбила нумерацию следующих
+            records = None
+        if records is not None:
+            count = len(records)
+            for number, record in enumerate(records, first):
+                add(number, record, kind)
+        else:
+            for number, element in enumerate(_json_elements(data), first):
+                count += 1
+                try:
+                    record = json.loads(element.strip())
+                except ValueError as e:
+                    errors.append((number, f"Некорректный JSON: {e}"))
+                    continue
+                add(number, record, kind)
+    return candidates, vacancies, errors, count
+
+
+def _json_elements(data):
+    # Элементы массива JSON без скобок: байты между запятыми вне вложенных объектов, массивов и строк
+    depth, start = 0, 0
+    for match in JSON_TOKEN_RE.finditer(data):
+        token = match.group()
+        if token in (b"{", b"["):
+            depth += 1
+        elif token in (b"}", b"]"):
+            depth = max(depth - 1, 0)
+        elif token == b"," and not depth:
+            yield data[start:match.start()]
+            start = match.end()
+    yield data[start:]
+
+
+def _line_chunks(file, chunk_bytes, first_line=1, quoted=False):
+    # Части файла из целых строк: (номер первой строки, байты). quoted=True (CSV) не разрывает значения
+    # в кавычках с переводами строк: граница ставится только при четном числе кавычек с начала части
+    pending = b""
+    while True:
+        block = file.read(chunk_bytes)
+        if not block:
+            break
+        data = pending + block
+        end = data.rfind(b"\n") + 1
+        while quoted and end and data.count(b'"', 0, end) % 2:
+            end = data.rfind(b"\n", 0, end - 1) + 1
+        if not end:
+            pending = data
+            continue
+        chunk, pending = data[:end], data[end:]
+        yield first_line, chunk
+        first_line += chunk.count(b"\n")
+    if pending.strip():
+        yield first_line, pending
+
+
+# Разбиение файла вида {"candidates": [...], "vacancies": [...]} на части из целых объектов массивов
+class JsonSectionReader:
+    def __init__(self, file, chunk_bytes):
+        self.file = file
+        self.chunk_bytes = chunk_bytes
+        self.buffer = b""
+        self.pos = 0
+        self.offset = 0  # Позиция начала буфера в файле
+        self.scan = 0  # Докуда буфер просмотрен при поиске границы части
+        self.stack = []  # Незакрытые скобки текущего элемента массива
+        self.split = None  # Последняя запятая между элементами массива в просмотренной части буфера
+
+    def _read_more(self):
+        # Дочитывание блока в буфер (прочитанное до pos отбрасывается); False - конец файла
+        block = self.file.read(self.chunk_bytes)
+        if not block:
+            return False
+        self.buffer = self.buffer[self.pos:] + block
+        self.offset += self.pos
+        self.scan = max(self.scan - self.pos, 0)
+        if self.split is not None:
+            self.split -= self.pos
+        self.pos = 0
+        return True
+
+    def _error(self, message):
+        return ValueError(f"Некорректный JSON: {message}")
+
+    def _next(self, expected=None):
+        # Следующий значимый символ после пробелов; если задан expected, символ проверяется и пропускается
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._read_more():
+                break
+        char = self.buffer[self.pos:self.pos + 1]
+        if expected is not None:
+            if not char or char not in expected:
+                found = char.decode(errors="replace") or "конец файла"
+                raise self._error(f"ожидалось {expected.decode()}, получено {found}")
+            self.pos += 1
+        return char
+
+    def _key(self):
+        # Имя раздела (строка JSON до двоеточия)
+        self._next()
+        while True:
+            match = JSON_STRING_RE.match(self.buffer, self.pos)
+            if match or not self._read_more():
+                break
+        if match is None:
+            raise self._error("ожидалось имя раздела")
+        self.pos = match.end()
+        return json.loads(match.group())
+
+    def _boundary(self):
+        # Граница части в буфере: (конец последнего целого элемента массива, начало следующего, конец массива)
+        # или None, если целых элементов в буфере нет. Скобки и запятые учитываются вне строк и с вложенностью
+        # (как в _json_elements); просмотренная часть буфера повторно не разбирается
+        for match in JSON_TOKEN_RE.finditer(self.buffer, self.scan):
+            token = match.group()
+            if token == b'"':
+                self.scan = match.start()  # Строка продолжается в следующем блоке
+                break
+            self.scan = match.end()
+            if len(token) > 1:
+                continue  # Строка или объект без вложенных скобок: границ внутри нет
+            if token in (b"{", b"["):
+                self.stack.append(token)
+            elif token == b"," and not self.stack:
+                self.split = match.start()
+            elif token == b"]" and not self.stack:
+                return match.start(), match.end(), True
+            elif token in (b"}", b"]"):
+                if not self.stack or self.stack.pop() != (b"{" if token == b"}" else b"["):
+                    raise self._error(f"непарная скобка {token.decode()} на позиции {self.offset + match.start()}")
+        else:
+            self.scan = len(self.buffer)
+        if self.split is None:
+            return None
+        end, self.split = self.split, None
+        return end, end + 1, False
+
+    def chunks(self):
+        # Части файла: (тип записей, байты объектов через запятую без скобок массива)
+        self._next(b"{")
+        if self._next() == b"}":
+            return
+        while True:
+            key = self._key()
+            if key not in SECTIONS:
+                raise self._error(f"неизвестный раздел {key} (поддерживаются {', '.join(SECTIONS)})")
+            self._next(b":")
+            self._next(b"[")
+            if self._next() == b"]":
+                self.pos += 1
+            else:
+                yield from self._section_chunks(SECTIONS[key])
+            if self._next(b",}") == b"}":
+                break
+
+    def _section_chunks(self, kind):
+        self.scan, self.stack, self.split = self.pos, [], None
+        while True:
+            boundary = self._boundary()
+            if boundary is None:
+                if not self._read_more():
+                    raise self._error("файл оборван внутри массива")
+                continue
+            end, next_pos, last = boundary
+            yield kind, self.buffer[self.pos:end]
+            self.pos = next_pos
+            if last:
+                return
+            self._next()  # Пробелы после запятой; чтение следующего блока, если буфер закончился
+
+
+def _tasks(file, fmt, chunk_bytes):
+    # Аргументы parse_chunk для частей файла (номер первой записи части JSON подставляется при выдаче результата)
+    if fmt == "jsonl":
+        for first_line, data in _line_chunks(file, chunk_bytes):
+            yield fmt, data, first_line, None, None
+    elif fmt == "csv":
+        header = file.readline()
+        if header.startswith(b"\xef\xbb\xbf"):
+            header = header[3:]
+        columns = next(csv.reader([header.decode("utf-8")]), None)
+        if not columns:
+            raise ValueError("В файле CSV нет строки заголовка")
+        for first_line, data in _line_chunks(file, chunk_bytes, 2, quoted=True):
+            yield fmt, data, first_line, None, columns
+    else:
+        for kind, data in JsonSectionReader(file, chunk_bytes).chunks():
+            yield fmt, data, 1, kind, None
+
+
+def parse_file(filename, fmt=None, workers=None, chunk_bytes=IMPORT_CHUNK_BYTES):
+    # Разобранные и проверенные записи файла по частям в порядке файла: (кандидаты, вакансии, ошибки),
+    # ошибки - (место в файле, текст). Небольшие файлы и workers=1 разбираются в текущем процессе
+    fmt = import_format(filename, fmt)
+    workers = workers or os.cpu_count() or 1
+    numbers = {kind: 0 for kind in SECTIONS.values()}  # Записей JSON в разделах до текущей части
+
+    def result(task, parsed):
+        candidates, vacancies, errors, count = parsed
+        _, _, _, kind, _ = task
+        if kind is None:
+            errors = [(f"строка {number}", message) for number, message in errors]
+        else:
+            section = next(name for name, section_kind in SECTIONS.items() if section_kind == kind)
+            errors = [(f"{section}, запись {numbers[kind] + number}", message) for number, message in errors]
+            numbers[kind] += count
+        return candidates, vacancies, errors
+
+    with open(filename, "rb") as file:
+        tasks = _tasks(file, fmt, chunk_bytes)
+        if workers == 1 or os.path.getsize(filename) <= chunk_bytes:
+            for task in tasks:
+                yield result(task, parse_chunk(*task))
+            return
+        # Процессы запускаются через spawn, как и при пакетном подборе: без наследования подключений SQLite
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            pending = deque()
+            for task in tasks:
+                pending.append((task, pool.submit(parse_chunk, *task)))
+                if len(pending) >= workers * IMPORT_CHUNKS_PER_WORKER:
+                    task, future = pending.popleft()
+                    yield result(task, future.result())
+            while pending:
+                task, future = pending.popleft()
+                yield result(task, future.result())
@@ -0,0 +1,346 @@
+"""Модуль со сбором статистики запросов: время методов HRDatabase и SQL-запросов, журнал медленных запросов"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from functools import wraps
+from types import GeneratorType
+
+SLOW_QUERY_THRESHOLD = 0.1  # Запросы дольше стольких секунд попадают в журнал медленных запросов
+SLOW_LOG_SIZE = 200  # Количество последних медленных запросов в журнале
+MAX_STATEMENTS = 500  # Количество различных запросов, для которых ведется отдельная статистика
+STATS_PROGRESS_STEPS = 1000  # Через сколько инструкций SQLite вызывается обработчик прогресса для подсчета шагов
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # Секунды
+EXPLAIN_STATEMENTS = ("select", "with", "insert", "update", "delete", "replace")
+
+# Литералы SQL: строки в кавычках и числа (но не цифры внутри имен вроде s1)
+STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+PARAMETER_LIST_RE = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+def normalize_sql(sql):
+    # Вид запроса без значений параметров, чтобы одинаковые запросы с разными значениями считались вместе
+    sql = STRING_LITERAL_RE.sub("?", sql)
+    sql = NUMBER_LITERAL_RE.sub("?", sql)
+    sql = PARAMETER_LIST_RE.sub("?, ...", sql)
+    return " ".join(sql.split())
+
+
+# Гистограмма длительностей с накопительными границами корзин, как в Prometheus
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        i = bisect_left(LATENCY_BUCKETS, seconds)
+        if i < len(self.buckets):
+            self.buckets[i] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def cumulative(self):
+        # Количество наблюдений не дольше каждой границы
+        total, result = 0, []
+        for count in self.buckets:
+            total += count
+            result.append(total)
+        return result
+
+    def to_dict(self):
+        return {"count": self.count, "sum_seconds": round(self.sum, 6), "max_seconds": round(self.max, 6),
+                "buckets": dict(zip((str(b) for b in LATENCY_BUCKETS), self.cumulative()))}
+
+
+# Статистика запросов к одной базе. Методы HRDatabase оборачиваются декоратором instrumented, SQL-запросы
+# отслеживаются через trace callback подключений (начало запроса) и обработчик прогресса (шаги виртуальной машины
+# SQLite). Длительность запроса - время от его начала до начала следующего запроса в том же потоке или до конца
+# метода, то есть вместе с чтением строк. При выключенной статистике проверяется только флаг enabled
+class QueryStats:
+    def __init__(self, explain=None, threshold=SLOW_QUERY_THRESHOLD):
+        self.explain = explain  # explain(sql) -> строки EXPLAIN QUERY PLAN
+        self.threshold = threshold
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.connections = []  # Подключения, на которых установлен trace callback
+        self.progress = {}  # Подключение -> (обработчик, шаги), установленные через set_progress
+        self.methods = {}  # метод -> {"latency": Histogram, "rows": int, "errors": int}
+        self.statements = {}  # вид запроса -> {"latency": Histogram, "vm_steps": int, "plan": list}
+        self.slow = deque(maxlen=SLOW_LOG_SIZE)
+        self.started_at = time.time()
+
+    def set_enabled(self, enabled, connections=()):
+        # Включение или выключение сбора статистики на лету для уже открытых подключений
+        with self.lock:
+            self.enabled = enabled
+        for conn in connections:
+            if enabled:
+                self.attach(conn)
+            else:
+                conn.set_trace_callback(None)
+                conn.set_progress_handler(None, 0)
+        if not enabled:
+            with self.lock:
+                self.connections = []
+        # Обработчики, установленные через set_progress (например, отмена фонового запроса), ставятся заново:
+        # переключение статистики не должно их снимать
+        with self.lock:
+            handlers = list(self.progress.items())
+        for conn, (callback, steps) in handlers:
+            try:
+                self._install_progress(conn, callback, steps)
+            except sqlite3.ProgrammingError:
+                with self.lock:
+                    self.progress.pop(conn, None)  # Подключение уже закрыто
+
+    def attach(self, conn):
+        # Установка trace callback и обработчика прогресса на подключение
+        with self.lock:
+            if any(c is conn for c in self.connections):
+                return
+            self.connections.append(conn)
+            progress = self.progress.get(conn, (None, STATS_PROGRESS_STEPS))
+        conn.set_trace_callback(lambda sql: self._on_statement(conn, sql))
+        self._install_progress(conn, *progress)
+
+    def set_progress(self, conn, callback=None, steps=STATS_PROGRESS_STEPS):
+        # Обработчик прогресса подключения (например, для отмены фонового запроса); None - снять.
+        # Запоминается, чтобы включение и выключение статистики его не заменяло
+        with self.lock:
+            if callback is None:
+                self.progress.pop(conn, None)
+            else:
+                self.progress[conn] = (callback, steps)
+        self._install_progress(conn, callback, steps)
+
+    def _install_progress(self, conn, callback, steps):
+        # Один обработчик на подключение: при включенной статистике он считает шаги виртуальной машины SQLite
+        # и вызывает callback
+        def handler():
+            if self.enabled:
+                current = getattr(self.local, "current", None)
+                if current is not None:
+                    current[3] += steps
+            return callback() if callback is not None else 0
+
+        if callback is None and not self.enabled:
+            conn.set_progress_handler(None, 0)
+        else:
+            conn.set_progress_handler(handler, steps)
+
+    def _on_statement(self, conn, sql):
+        # trace callback: начался новый запрос, значит предыдущий запрос этого потока закончился
+        if getattr(self.local, "explaining", False) or not self.enabled:
+            return
+        now = time.perf_counter()
+        self._finish(now)
+        stack = getattr(self.local, "stack", None)
+        self.local.current = [conn, sql, now, 0, stack[-1] if stack else None]
+
+    def _finish(self, now):
+        current = getattr(self.local, "current", None)
+        if current is None:
+            return
+        self.local.current = None
+        conn, sql, start, steps, method = current
+        seconds = now - start
+        key = normalize_sql(sql)
+        with self.lock:
+            entry = self.statements.get(key)
+            if entry is None:
+                if len(self.statements) >= MAX_STATEMENTS:
+                    key = "(прочие запросы)"
+                entry = self.statements.setdefault(key, {"latency": Histogram(), "vm_steps": 0, "plan": None,
+                                                         "methods": set()})
+            entry["latency"].observe(seconds)
+            entry["vm_steps"] += steps
+            if method:
+                entry["methods"].add(method)
+            need_plan = entry["plan"] is None
+        slow = seconds >= self.threshold
+        if slow or need_plan:
+            # План запроса нельзя получить внутри trace callback, он запрашивается по окончании метода
+            self.local.pending = getattr(self.local, "pending", [])
+            self.local.pending.append((key, sql, seconds, steps, method, slow))
+
+    def _flush(self):
+        # Получение планов запросов и запись медленных запросов в журнал
+        pending, self.local.pending = getattr(self.local, "pending", []), []
+        for key, sql, seconds, steps, method, slow in pending:
+            plan = self._explain(sql)
+            with self.lock:
+                entry = self.statements.get(key)
+                if entry is not None and entry["plan"] is None:
+                    entry["plan"] = plan or []  # Пустой план - запрос без плана (PRAGMA, BEGIN) или не удалось получить
+                if slow:
+                    self.slow.append({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "method": method,
+                                      "seconds": round(seconds, 6), "vm_steps": steps, "sql": sql, "plan": plan})
+
+    def _explain(self, sql):
+        if self.explain is None or sql.lstrip().split(None, 1)[0].lower() not in EXPLAIN_STATEMENTS:
+            return None
+        self.local.explaining = True
+        try:
+            return [row[-1] for row in self.explain(sql)]
+        except Exception:
+            return None  # Например, запрос к временной таблице другого подключения
+        finally:
+            self.local.explaining = False
+
+    def call(self, name, method, args, kwargs):
+        # Вызов метода HRDatabase с замером времени; генератор замеряется до окончания чтения
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            result = method(*args, **kwargs)
+        except BaseException:
+            self._end(name, start, None, error=True)
+            raise
+        if isinstance(result, GeneratorType):
+            stack.pop()
+            return self._timed_iter(name, result)
+        self._end(name, start, result)
+        return result
+
+    def _timed_iter(self, name, iterator):
+        rows = 0
+        start = time.perf_counter()
+        stack = self.local.stack
+        try:
+            while True:
+                stack.append(name)
+                try:
+                    row = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    stack.pop()
+                rows += 1
+                yield row
+        except GeneratorExit:
+            # Чтение прекращено до конца (генератор закрыт), это не ошибка
+            stack.append(name)
+            self._end(name, start, None, rows=rows)
+            raise
+        except BaseException:
+            stack.append(name)
+            self._end(name, start, None, error=True, rows=rows)
+            raise
+        stack.append(name)
+        self._end(name, start, None, rows=rows)
+
+    def _end(self, name, start, result, error=False, rows=None):
+        stack = self.local.stack
+        now = time.perf_counter()
+        stack.pop()
+        if not stack:
+            self._finish(now)  # Последний запрос внешнего метода
+        if rows is None:
+            rows = len(result) if isinstance(result, (list, tuple)) else 0
+        with self.lock:
+            entry = self.methods.setdefault(name, {"latency": Histogram(), "rows": 0, "errors": 0})
+            entry["latency"].observe(now - start)
+            entry["rows"] += rows
+            entry["errors"] += error
+        if not stack:
+            self._flush()
+
+    def reset(self):
+        with self.lock:
+            self.methods.clear()
+            self.statements.clear()
+            self.slow.clear()
+            self.started_at = time.time()
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "enabled": self.enabled, "threshold_seconds": self.threshold, "since": self.started_at,
+                "methods": {name: dict(entry["latency"].to_dict(), rows=entry["rows"], errors=entry["errors"])
+                            for name, entry in sorted(self.methods.items())},
+                "statements": {sql: dict(entry["latency"].to_dict(), vm_steps=entry["vm_steps"], plan=entry["plan"],
+                                         methods=sorted(entry["methods"]))
+                               for sql, entry in sorted(self.statements.items(), key=lambda e: -e[1]["latency"].sum)},
+                "slow_queries": list(self.slow),
+            }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self):
+        # Текстовый формат Prometheus
+        lines = []
+        with self.lock:
+            methods = [({"method": name}, entry) for name, entry in sorted(self.methods.items())]
+            statements = [({"statement": sql}, entry) for sql, entry in sorted(self.statements.items())]
+            slow = len(self.slow)
+        self._prometheus_histogram(lines, "hr_method_duration_seconds", "Время выполнения методов HRDatabase",
+                                   methods)
+        lines += ["# HELP hr_method_rows_total Количество строк, возвращенных методами",
+                  "# TYPE hr_method_rows_total counter"]
+        lines += [f"hr_method_rows_total{format_labels(labels)} {entry['rows']}" for labels, entry in methods]
+        lines += ["# HELP hr_method_errors_total Количество ошибок в методах", "# TYPE hr_method_errors_total counter"]
+        lines += [f"hr_method_errors_total{format_labels(labels)} {entry['errors']}" for labels, entry in methods]
+        self._prometheus_histogram(lines, "hr_statement_duration_seconds", "Время выполнения SQL-запросов",
+                                   statements)
+        lines += ["# HELP hr_statement_vm_steps_total Шаги виртуальной машины SQLite (приблизительно)",
+                  "# TYPE hr_statement_vm_steps_total counter"]
+        lines += [f"hr_statement_vm_steps_total{format_labels(labels)} {entry['vm_steps']}"
+                  for labels, entry in statements]
+        lines += ["# HELP hr_slow_queries Количество запросов в журнале медленных запросов",
+                  "# TYPE hr_slow_queries gauge", f"hr_slow_queries {slow}"]
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _prometheus_histogram(lines, metric, help_text, series):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+        for labels, entry in series:
+            histogram = entry["latency"]
+            for bound, count in zip(LATENCY_BUCKETS, histogram.cumulative()):
+                lines.append(f"{metric}_bucket{format_labels(dict(labels, le=str(bound)))} {count}")
+            lines.append(f"{metric}_bucket{format_labels(dict(labels, le='+Inf'))} {histogram.count}")
+            lines.append(f"{metric}_sum{format_labels(labels)} {histogram.sum:.6f}")
+            lines.append(f"{metric}_count{format_labels(labels)} {histogram.count}")
+
+
+def format_labels(labels):
+    # Метки Prometheus с экранированием обратной косой черты, кавычек и переводов строк
+    escaped = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def instrumented(method):
+    # Декоратор публичного метода HRDatabase: при включенной статистике вызов замеряется
+    name = method.__name__
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        stats = self.stats
+        if not stats.enabled:
+            return method(self, *args, **kwargs)
+        return stats.call(name, method, (self,) + args, kwargs)
+
+    return wrapper
+
+
+def instrument_public_methods(cls):
+    # Декоратор класса: все публичные методы (кроме свойств и статических методов) оборачиваются instrumented
+    for name, value in list(vars(cls).items()):
+        if not name.startswith("_") and callable(value) and not isinstance(value, (staticmethod, classmethod)):
+            setattr(cls, name, instrumented(value))
+    return cls
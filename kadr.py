@@ -401,6 +401,9 @@ class HRApp(QMainWindow):
         dialog.setLayout(layout)
         dialog.exec_()
 
+
+# Начальное заполнение базы (вызывается явно при запуске приложения, а не при импорте модуля)
+def seed_database(db):
     #данные для заполнения базы
     candidates = [
         Candidate("Сельгира Сангаджи-Горяева", "Python, Django, SQL", 5),
@@ -439,8 +442,6 @@ class HRApp(QMainWindow):
     ]
 
     # заливаем данные в базу только если таблицы пусты
-    db = HRDatabase()  # создаём объект для работы с базой данных
-
     # проверяем, есть ли кандидаты в базе
     existing_candidates = db.get_candidates()
     if not existing_candidates:
@@ -456,8 +457,10 @@ class HRApp(QMainWindow):
             vacancy.employer_id = idx  # связываем вакансии с работодателями (например, уникальные ID)
             db.add_vacancy(vacancy)  # добавляем вакансию в базу
 
+
 # основной блок для запуска приложения
 if __name__ == "__main__":
+    seed_database(HRDatabase())
     app = QApplication([])
     window = HRApp()
     window.show()
@@ -2,27 +2,43 @@
 import json
 import sys
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QLineEdit,
-                             QPushButton, QTableWidget, QTableWidgetItem, QMessageBox, QDialog, QInputDialog)
+                             QPushButton, QTableView, QMessageBox, QDialog, QInputDialog, QProgressBar, QAction,
+                             QFileDialog)
 from PyQt5.QtCore import Qt
 from classes import Candidate, Vacancy
-from hr_database import HRDatabase
+from hr_database import HRDatabase, correct_fts_query
+from query_workers import QueryRunner
+from skill_completer import SkillCompleter
+from skill_dictionary import SkillDictionary
+from table_model import LazyTableModel
 
 
 
 # Главный класс приложения
 class HRApp(QMainWindow):
-    def __init__(self):
+    def __init__(self, db=None, data_file="input_data.json"):
         super().__init__()
         self.setWindowTitle("Кадровое агентство")
-        self.db = HRDatabase()
-
-        # Загрузка начальных данных из файла
-        try:
-            self.db.load_from_file("input_data.json")  # Укажите путь к вашему файлу
-        except Exception as e:
-            print(f"Ошибка загрузки данных: {e}")
+        self.db = db if db is not None else HRDatabase()
+        # Поиск через полнотекстовый индекс с ранжированием (если SQLite поддерживает FTS5)
+        self.use_fulltext_search = self.db.fts_enabled
+        # Запросы из интерфейса выполняются в фоновых потоках со своими подключениями к базе
+        self.queries = QueryRunner(self.db.db_name, self)
+        self.skills = SkillDictionary()  # Словарь навыков для автодополнения (загружается в фоне)
+
+        # Синхронизация с файлом начальных данных (применяются только изменения файла с прошлого запуска)
+        if data_file:
+            try:
+                self.db.sync_from_file(data_file)  # Укажите путь к вашему файлу
+            except Exception as e:
+                print(f"Ошибка загрузки данных: {e}")
 
         self.init_ui()
+        self.run_query("skills", "skill_dictionary", on_result=self.set_skill_dictionary)
+
+    def set_skill_dictionary(self, dictionary):
+        self.skills = dictionary
+
     def init_ui(self):
         main_widget = QWidget()
         self.setCentralWidget(main_widget)
@@ -63,41 +79,131 @@ class HRApp(QMainWindow):
         edit_vacancy_btn.clicked.connect(self.show_edit_vacancy_dialog)
         view_vacancies_btn = QPushButton("Список вакансий")
         view_vacancies_btn.clicked.connect(self.show_vacancies)
+        vacancy_matches_btn = QPushButton("Кандидаты для вакансии")
+        vacancy_matches_btn.clicked.connect(self.show_vacancy_candidates)
 
         vacancies_layout.addWidget(vacancies_label)
         vacancies_layout.addWidget(add_vacancy_btn)
         vacancies_layout.addWidget(edit_vacancy_btn)
         vacancies_layout.addWidget(view_vacancies_btn)
+        vacancies_layout.addWidget(vacancy_matches_btn)
 
         # Кнопка для поиска вакансий и кандидатов
         match_vacancies_btn = QPushButton("Поиск вакансий и кандидатов")
         match_vacancies_btn.clicked.connect(self.show_match_candidates)
 
+        # Кнопка для подбора лучших кандидатов на каждую вакансию
+        match_all_btn = QPushButton("Подбор кандидатов для всех вакансий")
+        match_all_btn.clicked.connect(self.show_vacancy_matches)
+
         # Добавление столбцов и кнопок в основной макет
         main_horizontal_layout.addLayout(candidates_layout)
         main_horizontal_layout.addLayout(vacancies_layout)
 
         main_layout.addLayout(main_horizontal_layout)
         main_layout.addWidget(match_vacancies_btn)
+        main_layout.addWidget(match_all_btn)
 
         main_widget.setLayout(main_layout)
 
+        # Индикатор выполнения фоновых запросов и кнопка их отмены в строке состояния
+        self.query_progress = QProgressBar()
+        self.query_progress.setRange(0, 0)  # Неопределенный прогресс
+        self.query_progress.setMaximumWidth(150)
+        self.cancel_query_btn = QPushButton("Отменить")
+        self.cancel_query_btn.clicked.connect(self.queries.cancel_all)
+        self.statusBar().addPermanentWidget(self.query_progress)
+        self.statusBar().addPermanentWidget(self.cancel_query_btn)
+        self.queries.busy_changed.connect(self.on_queries_busy)
+        self.on_queries_busy(False)
+
+        # Меню статистики запросов: включение на лету и выгрузка в JSON или формат Prometheus
+        stats_menu = self.menuBar().addMenu("Сервис")
+        self.stats_action = QAction("Статистика запросов", self, checkable=True)
+        self.stats_action.setChecked(self.db.stats.enabled)
+        self.stats_action.toggled.connect(self.db.set_stats_enabled)
+        export_stats_action = QAction("Сохранить статистику запросов...", self)
+        export_stats_action.triggered.connect(self.export_query_stats)
+        stats_menu.addAction(self.stats_action)
+        stats_menu.addAction(export_stats_action)
+
+    def export_query_stats(self):
+        # Сохранение статистики запросов: .prom - текстовый формат Prometheus, иначе JSON
+        filename, _ = QFileDialog.getSaveFileName(self, "Сохранить статистику запросов", "query_stats.json",
+                                                  "JSON (*.json);;Prometheus (*.prom)")
+        if not filename:
+            return
+        stats = self.db.stats
+        with open(filename, "w", encoding="utf-8") as file:
+            file.write(stats.to_prometheus() if filename.endswith(".prom") else stats.to_json())
+        QMessageBox.information(self, "Статистика запросов", f"Статистика сохранена: {filename}")
+
+    def closeEvent(self, event):
+        # При закрытии окна отменяем фоновые запросы и закрываем подключения к базе
+        self.queries.cancel_all()
+        self.queries.pool.waitForDone()
+        self.db.close()
+        super().closeEvent(event)
+
+    def on_queries_busy(self, busy):
+        # Показываем индикатор, пока есть выполняющиеся запросы
+        self.query_progress.setVisible(busy)
+        self.cancel_query_btn.setVisible(busy)
+        if not busy:
+            self.statusBar().clearMessage()
+
+    def on_query_progress(self, ticks):
+        self.statusBar().showMessage(f"Выполняется запрос... (шаг {ticks})")
+
+    def on_query_error(self, message):
+        QMessageBox.warning(self, "Ошибка", message)
+
+    def run_query(self, key, method, *args, on_result=None, on_done=None, **kwargs):
+        # Запуск метода HRDatabase в фоне; новый запрос с тем же ключом отменяет предыдущий.
+        # on_done() вызывается после ошибки или отмены (например, чтобы снова включить кнопку диалога)
+        worker = self.queries.run(key, method, *args, on_result=on_result, on_error=self.on_query_error,
+                                  on_progress=self.on_query_progress, **kwargs)
+        if on_done is not None:
+            worker.signals.failed.connect(lambda _: on_done())
+            worker.signals.cancelled.connect(on_done)
+        return worker
+
+    def save_in_background(self, dialog, button, method, *args, message, on_saved=None):
+        # Запись в базу в фоне (как и чтение, ее можно отменить): кнопка диалога выключена до завершения,
+        # после успешной записи показывается message и диалог закрывается
+        def on_result(result):
+            if on_saved is not None and on_saved(result) is False:
+                button.setEnabled(True)
+                return
+            QMessageBox.information(dialog, "Успех", message)
+            dialog.accept()
+
+        button.setEnabled(False)
+        self.run_query(None, method, *args, on_result=on_result, on_done=lambda: button.setEnabled(True))
+
     def show_edit_vacancy_dialog(self):
+        # Список ID вакансий загружается в фоне, диалог открывается по готовности
+        self.run_query("vacancies", "get_ids", "Vacancies", on_result=self.edit_vacancy_dialog)
+
+    def edit_vacancy_dialog(self, ids):
         # Диалоговое окно для редактирования вакансий
-        vacancies = self.db.get_vacancies()
-        vacancy_ids = [str(v[0]) for v in vacancies]
+        vacancy_ids = [str(i) for i in ids]
         selected_id, ok = QInputDialog.getItem(self, "Редактировать вакансию", "Выберите ID вакансии:", vacancy_ids, 0,
                                                False)
 
         if ok:
+            vacancy = self.db.get_vacancy(int(selected_id))  # Читается только выбранная вакансия
+            if vacancy is None:
+                QMessageBox.warning(self, "Ошибка", "Вакансия не найдена!")
+                return
             dialog = QDialog(self)
             dialog.setWindowTitle("Редактировать вакансию")
             layout = QVBoxLayout()
-            vacancy = next(v for v in vacancies if v[0] == int(selected_id))
 
             title_input = QLineEdit(vacancy[1])  # Название вакансии
             employer_input = QLineEdit(str(vacancy[2]))  # ID работодателя
             requirements_input = QLineEdit(vacancy[3])  # Требования к вакансии
+            SkillCompleter(self.skills, requirements_input)
 
             def update_vacancy():
                 # Обновление данных вакансии
@@ -107,12 +213,9 @@ class HRApp(QMainWindow):
                 if not title or not employer_id.isdigit() or not requirements:
                     QMessageBox.warning(dialog, "Ошибка", "Введите корректные данные!")
                     return
-                self.db.conn.execute('''UPDATE Vacancies 
-                                                SET title = ?, employer_id = ?, requirements = ? 
-                                                WHERE id = ?''',
-                                     (title, int(employer_id), requirements, int(selected_id)))
-                QMessageBox.information(dialog, "Успех", "Вакансия обновлена!")
-                dialog.accept()
+                self.save_in_background(dialog, submit_btn, "edit_vacancy", int(selected_id), title,
+                                        int(employer_id), requirements, message="Вакансия обновлена!",
+                                        on_saved=lambda _: self.skills.add_text(requirements))
 
             submit_btn = QPushButton("Сохранить изменения")
             submit_btn.clicked.connect(update_vacancy)
@@ -137,6 +240,7 @@ class HRApp(QMainWindow):
         employer_input.setPlaceholderText("ID работодателя")
         requirements_input = QLineEdit()
         requirements_input.setPlaceholderText("Требования")
+        SkillCompleter(self.skills, requirements_input)
 
         # Функция для добавления вакансии в базу данных
         def add_vacancy():
@@ -149,13 +253,10 @@ class HRApp(QMainWindow):
                 QMessageBox.warning(dialog, "Ошибка", "Введите корректные данные!")
                 return
 
-            # Создаем объект вакансии и добавляем его в базу данных
+            # Создаем объект вакансии и добавляем его в базу данных в фоне
             vacancy = Vacancy(title, int(employer_id), requirements)
-            self.db.add_vacancy(vacancy)
-
-            # Показываем сообщение об успешном добавлении вакансии
-            QMessageBox.information(dialog, "Успех", "Вакансия добавлена!")
-            dialog.accept()
+            self.save_in_background(dialog, submit_btn, "add_vacancy", vacancy, message="Вакансия добавлена!",
+                                    on_saved=lambda _: self.skills.add_text(requirements))
 
         # Создаем кнопку для добавления вакансии
         submit_btn = QPushButton("Добавить")
@@ -178,6 +279,7 @@ class HRApp(QMainWindow):
         name_input.setPlaceholderText("Имя (Имя и Фамилия)")
         skills_input = QLineEdit()
         skills_input.setPlaceholderText("Навыки")
+        SkillCompleter(self.skills, skills_input)
         experience_input = QLineEdit()
         experience_input.setPlaceholderText("Опыт (в годах)")
 
@@ -190,12 +292,17 @@ class HRApp(QMainWindow):
             if not name or not skills or not experience.isdigit():
                 QMessageBox.warning(dialog, "Ошибка", "Введите корректные данные!")
                 return
-            # Создаем объект кандидата и добавляем его в базу данных
+            # Создаем объект кандидата и добавляем его в базу данных в фоне
             candidate = Candidate(name, skills, int(experience))
-            self.db.add_candidate(candidate)
-            # Показываем сообщение об успешном добавлении кандидата
-            QMessageBox.information(dialog, "Успех", "Кандидат добавлен!")
-            dialog.accept()  # Закрываем диалог
+
+            def on_saved(candidate_id):
+                if candidate_id is None:
+                    QMessageBox.warning(dialog, "Ошибка", "Кандидат с таким именем уже есть!")
+                    return False
+                self.skills.add_text(skills)
+
+            self.save_in_background(dialog, submit_btn, "add_candidate", candidate, message="Кандидат добавлен!",
+                                    on_saved=on_saved)
 
         # Создаем кнопку для добавления кандидата
         submit_btn = QPushButton("Добавить")
@@ -209,23 +316,31 @@ class HRApp(QMainWindow):
         dialog.exec_()
 
     def show_edit_candidate_dialog(self):
-        # Получаем список всех кандидатов из базы данных
-        candidates = self.db.get_candidates()
-        candidate_ids = [str(c[0]) for c in candidates]  # Извлекаем ID кандидатов для выбора
+        # Получаем список ID кандидатов из базы данных в фоне, диалог открывается по готовности
+        self.run_query("candidates", "get_ids", "Candidates", on_result=self.edit_candidate_dialog)
+
+    def edit_candidate_dialog(self, ids):
+        candidate_ids = [str(i) for i in ids]  # ID кандидатов для выбора
 
         selected_id, ok = QInputDialog.getItem(self, "Редактировать кандидата", "Выберите ID кандидата:", candidate_ids,
                                                0, False)
 
         if ok:
+            # Из базы читается только выбранный кандидат
+            candidate = self.db.get_candidate(int(selected_id))
+            if candidate is None:
+                QMessageBox.warning(self, "Ошибка", "Кандидат не найден!")
+                return
             # диалоговое окно для редактирования данных выбранного кандидата
             dialog = QDialog(self)
             dialog.setWindowTitle("Редактировать кандидата")
             layout = QVBoxLayout()
 
             # Заполняем поля ввода текущими данными кандидата
-            name_input = QLineEdit(candidates[int(selected_id) - 1][1])
-            skills_input = QLineEdit(candidates[int(selected_id) - 1][2])
-            experience_input = QLineEdit(str(candidates[int(selected_id) - 1][3]))
+            name_input = QLineEdit(candidate[1])
+            skills_input = QLineEdit(candidate[2])
+            SkillCompleter(self.skills, skills_input)
+            experience_input = QLineEdit(str(candidate[3]))
 
             # Функция для обновления данных кандидата в базе данных
             def update_candidate():
@@ -236,11 +351,10 @@ class HRApp(QMainWindow):
                 if not name or not skills or not experience.isdigit():
                     QMessageBox.warning(dialog, "Ошибка", "Введите корректные данные!")
                     return
-                # Обновляем данные кандидата в базе данных
-                self.db.edit_candidate(int(selected_id), name, skills, int(experience))
-                # Показываем сообщение об успешном обновлении данных
-                QMessageBox.information(dialog, "Успех", "Данные кандидата обновлены!")
-                dialog.accept()
+                # Обновляем данные кандидата в базе данных в фоне
+                self.save_in_background(dialog, submit_btn, "edit_candidate", int(selected_id), name, skills,
+                                        int(experience), message="Данные кандидата обновлены!",
+                                        on_saved=lambda _: self.skills.add_text(skills))
 
             # Создаем кнопку для сохранения изменений
             submit_btn = QPushButton("Сохранить")
@@ -255,11 +369,11 @@ class HRApp(QMainWindow):
 
     def show_candidates(self):
         # Отображаем таблицу с кандидатами, получая данные из базы
-        self.show_table("Кандидаты", self.db.get_candidates())
+        self.show_table("Кандидаты", table="Candidates")
 
     def show_vacancies(self):
         # Отображаем таблицу с вакансиями, получая данные из базы
-        self.show_table("Вакансии", self.db.get_vacancies())
+        self.show_table("Вакансии", table="Vacancies")
 
     def show_match_candidates(self):
         # Диалог для выбора категории поиска (вакансии или кандидаты)
@@ -272,59 +386,155 @@ class HRApp(QMainWindow):
             False
         )
         if ok and category:
-            # Диалог для ввода навыка, по которому будет производиться поиск
-            skill, ok = QInputDialog.getText(self, f"Поиск для {category}", "Введите навык (например, Python):")
-            if ok and skill.strip():
-                skill = skill.strip()  # лишние пробелы
-                # В зависимости от выбранной категории поиска, выполняем поиск по навыку
-                if category == "Поиск вакансий":
-                    results = self.db.find_vacancies_by_skill(skill)  # Ищем вакансии по навыку
-                    self.show_table(f"Вакансии для навыка: {skill}", results)
-                elif category == "Поиск кандидатов":
-                    results = self.db.find_matching_candidates(skill)  # Ищем кандидатов по навыку
-                    self.show_table(f"Кандидаты для навыка: {skill}", results)
-
-    def show_table(self, title, data):
-        # Отображаем таблицу с данными (например, кандидаты или вакансии)
+            # Диалог для ввода навыка, по которому будет производиться поиск (с подсказками из словаря навыков);
+            # кандидатов можно дополнительно отобрать по опыту
+            candidates = category == "Поиск кандидатов"
+            skill, experience, ok = self.skill_input_dialog(
+                f"Поиск для {category}", "Введите навык (например, Python, pyth* или Java OR Kotlin):", candidates)
+            if not ok:
+                return
+            if any(not value.isdigit() for value in experience if value):
+                QMessageBox.warning(self, "Поиск", "Опыт указывается целым числом лет")
+                return
+            experience = tuple(int(value) if value else None for value in experience)
+            by_experience = experience != (None, None)
+            skill = skill.strip()  # лишние пробелы
+            if skill or by_experience:
+                # Полнотекстовый поиск не поддерживает диапазон опыта, поэтому с опытом навыки ищутся по словарю
+                fulltext = self.use_fulltext_search and not by_experience
+                corrections = {}
+                if fulltext:
+                    # Опечатки и синонимы исправляются и в полнотекстовом запросе (операторы и префиксы не меняются)
+                    skill, corrections = correct_fts_query(skill, self.skills)
+                else:
+                    # Навыки приводятся к каноническим названиям, опечатки исправляются по словарю навыков
+                    # ("Pyhton" -> "Python"); поиск по навыку, которого нет в словаре и для которого нет близких,
+                    # ничего не найдет, поэтому запрос не выполняется
+                    if len(self.skills):
+                        skill, corrections = self.skills.correct(skill)
+                    unknown = self.skills.unknown(skill) if len(self.skills) else []
+                    if unknown:
+                        hints = self.skills.complete(unknown[0][:2])
+                        QMessageBox.warning(self, "Поиск", f"Навык не найден: {', '.join(unknown)}" +
+                                            (f"\nВозможно, вы имели в виду: {', '.join(hints)}" if hints else ""))
+                        return
+                    skill = self.skills.canonicalize(skill)
+                # В зависимости от выбранной категории поиска, выполняем поиск по навыку в фоне;
+                # новый поиск отменяет еще не завершившийся предыдущий
+                args = (skill,)
+                if not candidates:
+                    # Полнотекстовый поиск выдает лучшие совпадения первыми
+                    method = "search_vacancies" if fulltext else "find_vacancies_by_skill"
+                    title, table = f"Вакансии для навыка: {skill}", "Vacancies"
+                else:
+                    method = "search_candidates" if fulltext else "find_matching_candidates"
+                    title, table = f"Кандидаты для навыка: {skill}", "Candidates"
+                    if by_experience:
+                        args += experience
+                        low, high = experience
+                        title = (f"Кандидаты для навыка: {skill}, " if skill else "Кандидаты, ") + \
+                            "опыт " + (f"от {low} " if low is not None else "") + \
+                            (f"до {high} " if high is not None else "") + "лет"
+                if corrections:
+                    title += " (исправлено: " + ", ".join(f"{typo} → {name}" for typo, name in corrections.items()) + ")"
+                self.run_query("search", method, *args, on_result=lambda results: self.show_table(
+                    title, results, columns=self.db.table_columns(table)))
+
+    def skill_input_dialog(self, title, label, with_experience=False):
+        # Диалог ввода навыков с автодополнением (и диапазона опыта при with_experience);
+        # возвращает (текст, (опыт от, опыт до), ok), поля опыта - строки, пустая строка - без ограничения
+        dialog = QDialog(self)
+        dialog.setWindowTitle(title)
+        layout = QVBoxLayout()
+        skill_input = QLineEdit()
+        SkillCompleter(self.skills, skill_input)
+        ok_btn = QPushButton("Найти")
+        ok_btn.clicked.connect(dialog.accept)
+        skill_input.returnPressed.connect(dialog.accept)
+
+        layout.addWidget(QLabel(label))
+        layout.addWidget(skill_input)
+        min_input, max_input = QLineEdit(), QLineEdit()
+        if with_experience:
+            experience_layout = QHBoxLayout()
+            experience_layout.addWidget(QLabel("Опыт (лет) от:"))
+            experience_layout.addWidget(min_input)
+            experience_layout.addWidget(QLabel("до:"))
+            experience_layout.addWidget(max_input)
+            layout.addLayout(experience_layout)
+        layout.addWidget(ok_btn)
+        dialog.setLayout(layout)
+        ok = dialog.exec_() == QDialog.Accepted
+        return skill_input.text(), (min_input.text().strip(), max_input.text().strip()), ok
+
+    def show_vacancy_matches(self):
+        # Подбор лучших кандидатов для каждой вакансии (по навыкам и опыту) в фоне
+        columns = ["ID вакансии", "Вакансия", "ID кандидата", "Кандидат", "Оценка"]
+        self.run_query("match", "match_vacancies", on_result=lambda results: self.show_table(
+            "Подбор кандидатов для вакансий", results, columns=columns))
+
+    def show_vacancy_candidates(self):
+        # Лучшие кандидаты для выбранной вакансии (из таблицы подбора, без пересчета)
+        self.run_query("vacancies", "get_ids", "Vacancies", on_result=self.vacancy_candidates_dialog)
+
+    def vacancy_candidates_dialog(self, ids):
+        selected_id, ok = QInputDialog.getItem(self, "Кандидаты для вакансии", "Выберите ID вакансии:",
+                                               [str(i) for i in ids], 0, False)
+        if ok:
+            columns = ["ID", "Имя", "Навыки", "Опыт", "Оценка"]
+            self.run_query("match", "vacancy_matches", int(selected_id), on_result=lambda results: self.show_table(
+                f"Кандидаты для вакансии {selected_id}", results, columns=columns))
+
+    def show_table(self, title, data=None, table=None, columns=None):
+        # Отображаем таблицу с данными (например, кандидаты или вакансии).
+        # Таблица базы (table) читается курсором порциями по мере прокрутки и сортируется запросом ORDER BY
         dialog = QDialog(self)
         dialog.setWindowTitle(title)
         layout = QVBoxLayout()
 
-        # Создаем таблицу для отображения данных
-        table = QTableWidget()
-        if data:
-            # Если данные есть, устанавливаем количество строк и столбцов
-            table.setRowCount(len(data))
-            table.setColumnCount(len(data[0]))
-            for row, record in enumerate(data):
-                for col, item in enumerate(record):
-                    table.setItem(row, col, QTableWidgetItem(str(item)))
-
-        layout.addWidget(table)
+        if table:
+            model = LazyTableModel.for_table(self.db, table, parent=dialog)
+        else:
+            model = LazyTableModel.for_rows(data or [], columns, parent=dialog)
+
+        view = QTableView()
+        view.setModel(model)
+        # Таблицы базы сортируются по id, результаты поиска сохраняют исходный порядок (по релевантности)
+        view.horizontalHeader().setSortIndicator(0 if table else -1, Qt.AscendingOrder)
+        view.setSortingEnabled(True)
+
+        layout.addWidget(view)
+        export_btn = QPushButton("Экспорт")
+        export_btn.clicked.connect(lambda: self.export_table(dialog, data, table, model.columns))
+        layout.addWidget(export_btn)
         dialog.setLayout(layout)
         dialog.exec_()
 
-    # заливаем данные в базу только если таблицы пусты
-    db = HRDatabase()  # создаём объект для работы с базой данных
+    def export_table(self, parent, data=None, table=None, columns=None):
+        # Экспорт таблицы в CSV, JSON Lines или колоночный формат в фоне: таблица базы читается курсором
+        # порциями, поэтому память не зависит от ее размера, а окно не блокируется
+        filters = {"CSV (*.csv)": ".csv", "JSON Lines (*.jsonl)": ".jsonl", "Колоночный формат (*.hrcol)": ".hrcol"}
+        filename, selected = QFileDialog.getSaveFileName(parent, "Экспорт", (table or "results").lower() + ".csv",
+                                                         ";;".join(filters))
+        if not filename:
+            return
+        if not filename.lower().endswith(tuple(filters.values())):
+            filename += filters.get(selected, ".csv")
+
+        def on_exported(stats):
+            QMessageBox.information(self, "Экспорт",
+                                    f"Экспортировано строк: {stats['rows']}\n" + "\n".join(stats['files']))
 
-    # проверяем, есть ли кандидаты в базе
-    existing_candidates = db.get_candidates()
-    if not existing_candidates:
-        # если кандидаты не найдены, добавляем их
-        for candidate in db.get_candidates():
-            db.add_candidate(candidate)  # добавляем кандидата в базу
+        if table:
+            self.run_query(None, "export", filename, table.lower(), on_result=on_exported)
+        else:
+            self.run_query(None, "export_rows", list(data or []), columns, filename, on_result=on_exported)
 
-    # проверяем, есть ли вакансии в базе
-    existing_vacancies = db.get_vacancies()
-    if not existing_vacancies:
-        # если вакансии не найдены, добавляем их
-        for idx, vacancy in enumerate(db.get_vacancies(), start=1):
-            vacancy.employer_id = idx  # связываем вакансии с работодателями (например, уникальные ID)
-            db.add_vacancy(vacancy)  # добавляем вакансию в базу
 
 # основной блок для запуска приложения
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    window = HRApp()
+    # --replica: поиск из копии базы в памяти (для базы на медленном сетевом диске)
+    window = HRApp(HRDatabase(replica="--replica" in sys.argv[1:]))
     window.show()
     sys.exit(app.exec_())
@@ -0,0 +1,111 @@
+"""Модуль для подбора кандидатов на вакансии по навыкам и опыту"""
+
+import heapq
+from collections import Counter
+
+from columnar import SkillColumns
+
+MATCH_TOP_K = 10  # Количество лучших кандидатов на вакансию
+COVERAGE_WEIGHT = 0.8  # Вес доли закрытых требований вакансии
+EXPERIENCE_WEIGHT = 0.2  # Вес опыта кандидата
+EXPERIENCE_CAP = 10  # Опыт (в годах), начиная с которого вклад опыта максимален
+SCORE_DIGITS = 4  # Знаков оценки после запятой; кандидаты с равной округленной оценкой упорядочиваются по id
+SQL_MATCH_MAX_VACANCIES = 20  # До скольких вакансий подбор выполняется запросом к базе без построения движка
+
+
+def load_numpy():
+    # NumPy импортируется при первом подборе, а не при импорте модуля, чтобы не замедлять запуск;
+    # без NumPy используется реализация на чистом Python
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+# Движок подбора: навыки кандидатов хранятся как разреженные векторы (инвертированный индекс skill_id -> кандидаты),
+# поэтому оценка вакансии затрагивает только кандидатов, у которых есть хотя бы один из требуемых навыков
+class MatchEngine:
+    def __init__(self, candidate_ids, experience, postings, vacancy_skills):
+        self.candidate_ids = candidate_ids  # Индекс кандидата -> id в базе
+        self.experience_score = [min(max(e, 0), EXPERIENCE_CAP) / EXPERIENCE_CAP * EXPERIENCE_WEIGHT
+                                 for e in experience]
+        self.postings = postings  # skill_id -> массив индексов кандидатов
+        self.vacancy_skills = vacancy_skills  # vacancy_id -> список skill_id
+        self.np = np = load_numpy()
+        if np is not None:
+            self.experience_score = np.array(self.experience_score, dtype=np.float64)
+            self.candidate_ids = np.array(candidate_ids, dtype=np.int64)
+            self.postings = {skill_id: np.frombuffer(p, dtype=np.int32) for skill_id, p in postings.items()}
+
+    @classmethod
+    def from_connection(cls, conn):
+        # Загрузка разреженного представления навыков из связующих таблиц базы
+        return cls.from_columns(SkillColumns.from_connection(conn, "Candidates"),
+                                SkillColumns.from_connection(conn, "Vacancies"))
+
+    @classmethod
+    def from_columns(cls, candidates, vacancies):
+        # Движок по колоночным представлениям кандидатов и вакансий (SkillColumns)
+        return cls(candidates.ids, candidates.values, candidates.postings(), vacancies.skill_lists())
+
+    def top_candidates(self, k=MATCH_TOP_K, vacancy_ids=None):
+        # Лучшие k кандидатов для каждой вакансии: {vacancy_id: [(candidate_id, score), ...]}
+        if vacancy_ids is None:
+            vacancy_ids = self.vacancy_skills.keys()
+        result = {}
+        for vacancy_id in vacancy_ids:
+            skills = self.vacancy_skills.get(vacancy_id)
+            if skills:
+                result[vacancy_id] = self.score_vacancy(skills, k)
+        return result
+
+    def score_vacancy(self, skills, k=MATCH_TOP_K):
+        # Оценка = доля закрытых требований * COVERAGE_WEIGHT + нормированный опыт * EXPERIENCE_WEIGHT
+        lists = [self.postings[s] for s in skills if s in self.postings]
+        if not lists:
+            return []
+        if self.np is not None:
+            return self._score_numpy(lists, len(skills), k)
+        counts = Counter()
+        for posting in lists:
+            counts.update(posting)
+        scored = ((round(count / len(skills) * COVERAGE_WEIGHT + self.experience_score[i], SCORE_DIGITS), -i)
+                  for i, count in counts.items())
+        return [(self.candidate_ids[-i], score) for score, i in heapq.nlargest(k, scored)]
+
+    def _score_numpy(self, lists, required, k):
+        # Векторизованная оценка: совпадения считаются через np.unique по объединенным спискам кандидатов
+        np = self.np
+        hits, counts = np.unique(np.concatenate(lists), return_counts=True)
+        scores = np.round(counts / required * COVERAGE_WEIGHT + self.experience_score[hits], SCORE_DIGITS)
+        if len(scores) > k:
+            # Все кандидаты с оценкой не ниже k-й, чтобы при равенстве на границе выбирались меньшие id
+            top = np.nonzero(scores >= -np.partition(-scores, k - 1)[k - 1])[0]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.lexsort((hits[top], -scores[top]))][:k]  # По убыванию оценки, при равенстве - по id
+        return [(int(self.candidate_ids[hits[i]]), float(scores[i])) for i in top]
+
+
+def score_sql(matched, required, experience):
+    # Выражение SQL для оценки кандидата по числу совпавших навыков, числу требований вакансии и опыту
+    # (как в MatchEngine, с округлением до SCORE_DIGITS знаков)
+    return (f"ROUND({matched} * 1.0 / {required} * {COVERAGE_WEIGHT} + MIN(MAX(COALESCE({experience}, 0), 0), "
+            f"{EXPERIENCE_CAP}) * 1.0 / {EXPERIENCE_CAP} * {EXPERIENCE_WEIGHT}, {SCORE_DIGITS})")
+
+
+def top_candidates_sql(conn, vacancy_id, k=MATCH_TOP_K):
+    # Подбор для одной вакансии запросом по связующим таблицам: читаются только кандидаты с нужными навыками,
+    # поэтому для нескольких вакансий это быстрее построения MatchEngine. Оценка и порядок - как в MatchEngine.
+    # Опыт берется из связующей таблицы, поэтому запрос читает только индекс (навык, опыт)
+    rows = conn.execute(f'''WITH required AS (SELECT skill_id FROM VacancySkills WHERE vacancy_id = ?),
+                                  total AS (SELECT COUNT(*) AS n FROM required)
+                             SELECT cs.candidate_id,
+                                    {score_sql("COUNT(*)", "(SELECT n FROM total)", "MAX(cs.experience)")} AS score
+                             FROM required r
+                             JOIN CandidateSkills cs ON cs.skill_id = r.skill_id
+                             GROUP BY cs.candidate_id
+                             ORDER BY score DESC, cs.candidate_id
+                             LIMIT ?''', (vacancy_id, k))
+    return rows.fetchall()
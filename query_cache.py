@@ -0,0 +1,116 @@
+"""Модуль с кэшем результатов поиска"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_MAX_SIZE = 1024  # Максимальное количество запомненных результатов
+CACHE_TTL = 300  # Время жизни результата в секундах
+
+
+# Ограниченный LRU-кэш со сроком жизни записей. Ключ записи - (вид запроса, значение), для поиска по навыкам
+# значение - множество нормализованных навыков, что позволяет сбрасывать только записи с затронутыми навыками
+class QueryCache:
+    def __init__(self, maxsize=CACHE_MAX_SIZE, ttl=CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()  # ключ -> (время истечения, результат)
+        self.by_skill = {}  # (вид, навык) -> ключи записей с этим навыком
+        self.by_kind = {}  # вид -> ключи записей
+        self.lock = threading.Lock()
+        self.generation = 0  # Увеличивается при каждом сбросе записей
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        # Результат из кэша или None, если записи нет или она устарела
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def put(self, key, value, generation):
+        # Запись результата; если после начала запроса (generation) был сброс, результат мог устареть и не сохраняется
+        with self.lock:
+            if generation != self.generation:
+                return
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            kind, ident = key
+            self.by_kind.setdefault(kind, set()).add(key)
+            if isinstance(ident, frozenset):
+                for skill in ident:
+                    self.by_skill.setdefault((kind, skill), set()).add(key)
+            while len(self.entries) > self.maxsize:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def invalidate_skills(self, kind, skills):
+        # Сброс записей вида kind, в ключе которых есть хотя бы один из навыков
+        with self.lock:
+            self.generation += 1
+            keys = set()
+            for skill in skills:
+                keys |= self.by_skill.get((kind, skill), set())
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+
+    def invalidate_where(self, kind, predicate):
+        # Сброс записей вида kind, для значения которых predicate(значение) истинно
+        with self.lock:
+            self.generation += 1
+            keys = [key for key in self.by_kind.get(kind, ()) if predicate(key[1])]
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+            self.by_skill.clear()
+            self.by_kind.clear()
+
+    def stats(self):
+        # Статистика попаданий и промахов
+        with self.lock:
+            total = self.hits + self.misses
+            return {"size": len(self.entries), "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / total if total else 0.0,
+                    "evictions": self.evictions, "invalidations": self.invalidations}
+
+    def _remove(self, key):
+        self.entries.pop(key, None)
+        kind, ident = key
+        self.by_kind.get(kind, set()).discard(key)
+        if isinstance(ident, frozenset):
+            for skill in ident:
+                self.by_skill.get((kind, skill), set()).discard(key)
+
+
+_shared_caches = {}
+_shared_lock = threading.Lock()
+
+
+def shared_cache(db_name):
+    # Общий кэш для всех подключений к одному файлу базы (например, из фоновых потоков);
+    # у базы в памяти свой кэш на каждое подключение
+    if db_name == ":memory:":
+        return QueryCache()
+    path = os.path.abspath(db_name)
+    with _shared_lock:
+        if path not in _shared_caches:
+            _shared_caches[path] = QueryCache()
+        return _shared_caches[path]
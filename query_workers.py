@@ -0,0 +1,120 @@
+"""Модуль для выполнения запросов к базе данных в фоновых потоках"""
+
+import sqlite3
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from hr_database import HRDatabase
+
+PROGRESS_STEPS = 10000  # Через сколько инструкций SQLite вызывается обработчик прогресса
+
+
+# Сигналы фонового запроса (QRunnable не является QObject, поэтому сигналы вынесены в отдельный класс)
+class WorkerSignals(QObject):
+    finished = pyqtSignal(object)  # Результат запроса
+    failed = pyqtSignal(str)  # Текст ошибки
+    cancelled = pyqtSignal()
+    progress = pyqtSignal(int)  # Количество вызовов обработчика прогресса с начала запроса
+
+
+# Фоновый запрос: вызывает метод HRDatabase через подключение к базе своего потока
+class QueryWorker(QRunnable):
+    def __init__(self, db_name, method, *args, **kwargs):
+        super().__init__()
+        self.db_name = db_name
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self.is_cancelled = False
+        self.conn = None
+        self.ticks = 0
+
+    def cancel(self):
+        # Отмена запроса: флаг проверяется обработчиком прогресса, interrupt прерывает текущий запрос сразу
+        self.is_cancelled = True
+        if self.conn is not None:
+            self.conn.interrupt()
+
+    def _on_progress(self):
+        # Обработчик прогресса SQLite: ненулевой результат прерывает выполнение запроса
+        self.ticks += 1
+        self.signals.progress.emit(self.ticks)
+        return 1 if self.is_cancelled else 0
+
+    def run(self):
+        if self.is_cancelled:
+            self.signals.cancelled.emit()
+            return
+        try:
+            db = HRDatabase(self.db_name)
+            self.conn = db.conn
+            # Обработчик прогресса действует и на транзакции записи потока, поэтому отменить можно и запись
+            db.manager.set_progress(self._on_progress, PROGRESS_STEPS)
+            result = getattr(db, self.method)(*self.args, **self.kwargs)
+        except sqlite3.OperationalError as e:
+            if self.is_cancelled:
+                self.signals.cancelled.emit()
+            else:
+                self.signals.failed.emit(str(e))
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            if self.is_cancelled:
+                self.signals.cancelled.emit()
+            else:
+                self.signals.finished.emit(result)
+        finally:
+            # Подключение потока остается открытым для следующих запросов, снимается только обработчик прогресса
+            if self.conn is not None:
+                db.manager.set_progress()
+            self.conn = None
+
+
+# Запуск фоновых запросов: новый запрос с тем же ключом отменяет предыдущий (например, повторный поиск)
+class QueryRunner(QObject):
+    busy_changed = pyqtSignal(bool)  # Есть ли выполняющиеся запросы
+
+    def __init__(self, db_name, parent=None):
+        super().__init__(parent)
+        self.db_name = db_name
+        self.pool = QThreadPool.globalInstance()
+        self.active = {}  # ключ -> выполняющийся запрос
+        self.workers = set()  # Ссылки на все запущенные запросы (включая отмененные), пока они не завершились
+
+    def run(self, key, method, *args, on_result=None, on_error=None, on_progress=None, **kwargs):
+        # key=None - запрос не заменяется последующими (например, запись в базу)
+        if key is None:
+            key = object()
+        self.cancel(key)
+        worker = QueryWorker(self.db_name, method, *args, **kwargs)
+        self.active[key] = worker
+        self.workers.add(worker)
+        if on_result is not None:
+            # Результат отмененного запроса, успевшего завершиться, не доставляется
+            worker.signals.finished.connect(
+                lambda result, worker=worker: None if worker.is_cancelled else on_result(result))
+        if on_error is not None:
+            worker.signals.failed.connect(on_error)
+        if on_progress is not None:
+            worker.signals.progress.connect(on_progress)
+        for signal in (worker.signals.finished, worker.signals.failed, worker.signals.cancelled):
+            signal.connect(lambda *_, key=key, worker=worker: self._done(key, worker))
+        self.pool.start(worker)
+        self.busy_changed.emit(True)
+        return worker
+
+    def cancel(self, key):
+        worker = self.active.pop(key, None)
+        if worker is not None:
+            worker.cancel()
+            self.busy_changed.emit(bool(self.active))
+
+    def cancel_all(self):
+        for key in list(self.active):
+            self.cancel(key)
+
+    def _done(self, key, worker):
+        # Запрос завершился; отмененный и уже замененный запрос в списке активных не числится
+        if self.active.get(key) is worker:
+            del self.active[key]
+        self.workers.discard(worker)
+        self.busy_changed.emit(bool(self.active))
@@ -0,0 +1,35 @@
+"""Модуль с автодополнением навыков в полях ввода"""
+
+from PyQt5.QtCore import QStringListModel
+from PyQt5.QtWidgets import QCompleter
+
+
+# Автодополнение последнего навыка в строке "Python, SQL, ..." по префиксному дереву словаря навыков;
+# подсказки вычисляются словарем, QCompleter только показывает их (без собственной фильтрации)
+class SkillCompleter(QCompleter):
+    def __init__(self, dictionary, line_edit):
+        super().__init__(line_edit)
+        self.dictionary = dictionary
+        self.line_edit = line_edit
+        self.suggestions = QStringListModel(self)
+        self.setModel(self.suggestions)
+        self.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.setWidget(line_edit)
+        line_edit.textEdited.connect(self.update_suggestions)
+        self.activated[str].connect(self.insert_skill)
+
+    def update_suggestions(self, text):
+        # Подсказки для навыка после последней запятой
+        prefix = text.rsplit(',', 1)[-1].strip()
+        suggestions = self.dictionary.complete(prefix) if prefix else []
+        self.suggestions.setStringList(suggestions)
+        if suggestions:
+            self.complete()
+        else:
+            self.popup().hide()
+
+    def insert_skill(self, skill):
+        # Замена начатого навыка выбранной подсказкой
+        head = self.line_edit.text().rsplit(',', 1)
+        text = f"{head[0].strip()}, {skill}" if len(head) > 1 else skill
+        self.line_edit.setText(text)
@@ -0,0 +1,289 @@
+"""Модуль со словарем навыков: канонические названия, синонимы, автодополнение по префиксу и исправление опечаток"""
+
+from array import array
+from bisect import bisect_left
+
+SUGGESTION_LIMIT = 10  # Количество подсказок автодополнения
+FUZZY_MAX_DISTANCE = 2  # Наибольшее расстояние правки при исправлении опечаток
+FUZZY_PREFIX_LENGTH = 7  # По скольким первым символам навыка строятся варианты с удалениями
+FUZZY_UNINDEXED_LIMIT = 256  # Сколько навыков, добавленных после построения индекса, проверяется перебором
+
+# Канонические названия навыков и их синонимы (другие написания, сокращения, русские названия)
+SKILL_ALIASES = {
+    "Python": ["python3", "python 3", "py", "питон", "пайтон"],
+    "JavaScript": ["js", "java script", "джаваскрипт"],
+    "TypeScript": ["ts"],
+    "Java": ["джава"],
+    "C++": ["cpp", "c plus plus", "плюсы"],
+    "C#": ["csharp", "c sharp", "си шарп"],
+    ".NET": ["dotnet", "дотнет"],
+    "Go": ["golang"],
+    "PostgreSQL": ["postgres", "pgsql", "постгрес"],
+    "MySQL": ["my sql"],
+    "Node.js": ["nodejs", "node"],
+    "React": ["reactjs", "react.js"],
+    "Kubernetes": ["k8s", "кубернетес"],
+    "Docker": ["докер"],
+    "Git": ["гит"],
+    "Linux": ["линукс"],
+    "Kotlin": ["котлин"],
+    "AWS": ["amazon web services"],
+    "Machine Learning": ["ml", "машинное обучение"],
+    "Data Analysis": ["анализ данных"],
+    "Project Management": ["управление проектами"],
+    "UI/UX Design": ["ui/ux", "ux/ui", "ui/ux дизайн"],
+    "Android Development": ["android", "андроид"],
+    "iOS Development": ["ios"],
+    "Excel": ["ms excel", "эксель"],
+    "1C": ["1с", "1с:предприятие"],
+    "Agile": ["аджайл"],
+    "Scrum": ["скрам"],
+    "Marketing": ["маркетинг"],
+}
+
+
+def normalize_skill(skill):
+    # Приведение навыка к каноническому виду: без лишних пробелов и без учета регистра
+    return " ".join(skill.split()).casefold()
+
+
+# Нормализованный синоним -> нормализованное каноническое название; отображаемые названия канонических навыков
+ALIAS_INDEX = {normalize_skill(alias): normalize_skill(name)
+               for name, aliases in SKILL_ALIASES.items() for alias in aliases}
+DISPLAY_NAMES = {normalize_skill(name): name for name in SKILL_ALIASES}
+ALIASES_BY_SKILL = {normalize_skill(name): [normalize_skill(alias) for alias in aliases]
+                    for name, aliases in SKILL_ALIASES.items()}
+
+
+def canonical_skill(skill):
+    # Нормализованный навык с заменой синонима на каноническое название ("Python3", "Питон" -> "python")
+    skill = normalize_skill(skill)
+    return ALIAS_INDEX.get(skill, skill)
+
+
+# Префиксное дерево: в каждом узле заранее хранятся лучшие подсказки для этого префикса,
+# поэтому подсказки по нажатию клавиши - это проход по символам префикса без обхода поддерева
+class PrefixTrie:
+    def __init__(self, limit=SUGGESTION_LIMIT):
+        self.limit = limit
+        self.root = ({}, [])  # (дочерние узлы по символу, [(-вес, значение), ...])
+
+    def insert(self, key, value, weight=0):
+        # Добавление ключа: значение попадает в подсказки каждого узла на пути (с обновлением веса)
+        node = self.root
+        self._offer(node[1], value, weight)
+        for char in key:
+            node = node[0].setdefault(char, ({}, []))
+            self._offer(node[1], value, weight)
+
+    def _offer(self, top, value, weight):
+        for i, (score, existing) in enumerate(top):
+            if existing == value:
+                if -score >= weight:
+                    return
+                del top[i]
+                break
+        top.append((-weight, value))
+        top.sort()
+        del top[self.limit:]
+
+    def complete(self, prefix):
+        # Подсказки для префикса в порядке убывания веса
+        node = self.root
+        for char in prefix:
+            node = node[0].get(char)
+            if node is None:
+                return []
+        return [value for _, value in node[1]]
+
+
+def fuzzy_distance(skill):
+    # Допустимое число опечаток в навыке по его длине: в коротких навыках (SQL, Go) опечатки не исправляются
+    if len(skill) <= 3:
+        return 0
+    return 1 if len(skill) <= 7 else FUZZY_MAX_DISTANCE
+
+
+def edit_distance(a, b, limit):
+    # Расстояние Дамерау-Левенштейна (вставка, удаление, замена, перестановка соседних символов), но не больше
+    # limit + 1. Общие начало и конец строк отбрасываются, считаются только клетки не дальше limit от диагонали,
+    # и вычисление прекращается, как только расстояние заведомо больше limit
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if a == b:
+        return 0
+    shorter = min(len(a), len(b))
+    start = 0
+    while start < shorter and a[start] == b[start]:
+        start += 1
+    suffix = 0
+    while suffix < shorter - start and a[-1 - suffix] == b[-1 - suffix]:
+        suffix += 1
+    a, b = a[start:len(a) - suffix], b[start:len(b) - suffix]
+    beyond = limit + 1
+    before, previous = None, [min(j, beyond) for j in range(len(b) + 1)]
+    for i, char in enumerate(a, 1):
+        current = [beyond] * (len(b) + 1)
+        current[0] = min(i, beyond)
+        low, high = max(1, i - limit), min(len(b), i + limit)
+        for j in range(low, high + 1):
+            other = b[j - 1]
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other))
+            if i > 1 and j > 1 and char == b[j - 2] and a[i - 2] == other:
+                value = min(value, before[j - 2] + 1)
+            current[j] = value
+        if min(current[low - 1:high + 1]) > limit:
+            return beyond
+        before, previous = previous, current
+    return min(previous[-1], beyond)
+
+
+def _deletions(skill, distance):
+    # Начало навыка (FUZZY_PREFIX_LENGTH символов) и его варианты с удалением до distance символов
+    variants = frontier = {skill[:FUZZY_PREFIX_LENGTH]}
+    for _ in range(distance):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        variants = variants | frontier
+    return variants
+
+
+# Индекс нечеткого поиска (симметричные удаления): у навыков на расстоянии правки не больше k есть общий
+# вариант начала с удалением не больше k символов у каждого. Ключи вариантов всех навыков лежат в одном
+# отсортированном массиве, поэтому поиск - несколько двоичных поисков по вариантам запроса и проверка
+# найденных навыков, без сравнения с каждым навыком словаря
+class FuzzySkillIndex:
+    ID_BITS = 24  # Ключ варианта - старшие биты хэша варианта и номер навыка в младших ID_BITS битах
+
+    def __init__(self):
+        self.skills = []  # Нормализованные навыки; номер в списке - id в индексе
+        self.keys = array('q')  # Ключи вариантов по возрастанию
+        self.indexed = 0  # Сколько первых навыков списка вошло в индекс
+
+    def __len__(self):
+        return len(self.skills)
+
+    def add(self, skill):
+        # Навык попадает в индекс при следующем построении, до этого проверяется перебором
+        self.skills.append(skill)
+
+    def _prefix(self, variant):
+        # Хэш варианта без младших ID_BITS битов (совпадения хэшей отсеиваются проверкой расстояния)
+        return hash(variant) >> self.ID_BITS << self.ID_BITS
+
+    def build(self):
+        # Построение индекса по всем добавленным навыкам
+        if len(self.skills) >= 1 << self.ID_BITS:
+            raise ValueError("Слишком много навыков для индекса нечеткого поиска")
+        self.keys = array('q', sorted(self._prefix(variant) | i for i, skill in enumerate(self.skills)
+                                      for variant in _deletions(skill, FUZZY_MAX_DISTANCE)))
+        self.indexed = len(self.skills)
+
+    def lookup(self, skill, max_distance=None):
+        # Навыки на расстоянии правки не больше max_distance (по умолчанию - по длине, см. fuzzy_distance):
+        # [(расстояние, навык)] по возрастанию расстояния
+        skill = normalize_skill(skill)
+        distance = min(fuzzy_distance(skill) if max_distance is None else max_distance, FUZZY_MAX_DISTANCE)
+        if len(self.skills) - self.indexed > FUZZY_UNINDEXED_LIMIT:
+            self.build()
+        keys, candidates = self.keys, set(range(self.indexed, len(self.skills)))
+        mask = (1 << self.ID_BITS) - 1
+        for variant in _deletions(skill, distance):
+            prefix = self._prefix(variant)
+            i = bisect_left(keys, prefix)
+            while i < len(keys) and keys[i] & ~mask == prefix:
+                candidates.add(keys[i] & mask)
+                i += 1
+        found = ((edit_distance(skill, self.skills[i], distance), self.skills[i]) for i in candidates)
+        return sorted(match for match in found if match[0] <= distance)
+
+
+# Словарь навыков базы: канонические навыки с частотой использования, поиск по префиксу названия или синонима
+class SkillDictionary:
+    def __init__(self, limit=SUGGESTION_LIMIT):
+        self.trie = PrefixTrie(limit)
+        self.names = {}  # Каноническое название -> отображаемое название
+        self.weights = {}  # Каноническое название -> число использований
+        self.fuzzy = FuzzySkillIndex()  # Названия и синонимы для исправления опечаток
+
+    @classmethod
+    def from_connection(cls, conn):
+        # Загрузка навыков, используемых кандидатами и вакансиями; вес подсказки - число использований
+        usage = {}
+        for junction in ("CandidateSkills", "VacancySkills"):
+            for skill_id, count in conn.execute(f"SELECT skill_id, COUNT(*) FROM {junction} GROUP BY skill_id"):
+                usage[skill_id] = usage.get(skill_id, 0) + count
+        dictionary = cls()
+        for skill_id, name in conn.execute("SELECT id, name FROM Skills"):
+            if skill_id in usage:
+                dictionary.add(name, usage[skill_id])
+        dictionary.fuzzy.build()
+        return dictionary
+
+    def add(self, skill, weight=0):
+        # Добавление навыка (синоним заменяется каноническим названием)
+        canonical = canonical_skill(skill)
+        if not canonical:
+            return
+        new = canonical not in self.names
+        display = self.names.setdefault(canonical, DISPLAY_NAMES.get(canonical, " ".join(skill.split())))
+        self.weights[canonical] = max(self.weights.get(canonical, 0), weight)
+        for key in [canonical] + ALIASES_BY_SKILL.get(canonical, []):
+            self.trie.insert(key, display, weight)
+            if new:
+                self.fuzzy.add(key)
+
+    def add_text(self, skills):
+        # Добавление навыков из строки через запятую
+        for skill in skills.split(','):
+            self.add(skill)
+
+    def __contains__(self, skill):
+        return canonical_skill(skill) in self.names
+
+    def __len__(self):
+        return len(self.names)
+
+    def complete(self, prefix):
+        # Подсказки для начала названия навыка или его синонима
+        return self.trie.complete(normalize_skill(prefix))
+
+    def unknown(self, skills):
+        # Навыки из строки через запятую, которых нет в словаре
+        return [skill.strip() for skill in skills.split(',') if skill.strip() and skill not in self]
+
+    def canonicalize(self, skills):
+        # Строка навыков с каноническими отображаемыми названиями ("питон, postgres" -> "Python, PostgreSQL")
+        result = []
+        for skill in skills.split(','):
+            canonical = canonical_skill(skill)
+            if canonical:
+                name = self.names.get(canonical) or DISPLAY_NAMES.get(canonical, " ".join(skill.split()))
+                if name not in result:
+                    result.append(name)
+        return ", ".join(result)
+
+    def suggest(self, skill, max_distance=None, limit=SUGGESTION_LIMIT):
+        # Навыки словаря, близкие к skill по расстоянию правки (по названию или синониму):
+        # сначала ближайшие, при равном расстоянии - самые используемые
+        ranked = {}
+        for distance, key in self.fuzzy.lookup(skill, max_distance):
+            canonical = canonical_skill(key)
+            rank = (distance, -self.weights.get(canonical, 0))
+            name = self.names[canonical]
+            ranked[name] = min(ranked.get(name, rank), rank)
+        return sorted(ranked, key=ranked.get)[:limit]
+
+    def correct(self, skills, max_distance=None):
+        # Исправление опечаток: навыки, которых нет в словаре, заменяются ближайшими (см. suggest).
+        # Возвращает (строка навыков с каноническими названиями, {навык запроса: исправление});
+        # навыки без близких совпадений остаются как есть
+        result, corrections = [], {}
+        for skill in skills.split(','):
+            skill = " ".join(skill.split())
+            if skill and skill not in self:
+                suggestions = self.suggest(skill, max_distance, 1)
+                if suggestions:
+                    corrections[skill] = suggestions[0]
+                    skill = suggestions[0]
+            result.append(skill)
+        return self.canonicalize(", ".join(result)), corrections
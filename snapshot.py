@@ -0,0 +1,273 @@
+"""Модуль с бинарным снимком исходного файла данных для быстрого повторного чтения
+
+Снимок хранит кандидатов, вакансии и колонки навыков (формат CSR, см. columnar.SkillColumns) в виде массивов
+фиксированной ширины и строк UTF-8 со смещениями. Файл отображается в память (mmap) и не разбирается:
+записи и колонки читаются прямо из отображения, поэтому открытие снимка не зависит от числа записей.
+
+Формат (little-endian): заголовок HEADER, таблица секций SECTION и секции, выровненные по 8 байт.
+Заголовок хранит размер и время изменения исходного файла, а также версию нормализации навыков:
+если что-то из этого не совпадает, снимок устарел. Контрольная сумма таблицы секций проверяется при открытии,
+CRC32 каждой секции - при первом обращении к ней.
+
+Снимки лежат в каталоге кэша пользователя (SNAPSHOT_DIR), а не рядом с исходным файлом, чтобы не засорять
+каталоги с данными.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import zlib
+from array import array
+
+from columnar import SkillColumns
+
+SNAPSHOT_MAGIC = b"HRSNAP\x00\x00"
+SNAPSHOT_VERSION = 1  # Версия формата; снимки другой версии считаются устаревшими
+SNAPSHOT_SUFFIX = ".snap"
+# Каталог снимков: input_data.json -> input_data.json.<хэш полного пути>.snap
+SNAPSHOT_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+                            "hr-agency", "snapshots")
+HEADER = struct.Struct("<8sIIIIqq")  # Сигнатура, версия, версия навыков, число секций, CRC32 таблицы, размер и mtime
+SECTION = struct.Struct("<32s1s3xIQQ")  # Имя, тип элементов (код array), CRC32, смещение, длина в байтах
+ALIGNMENT = 8
+
+# Таблицы снимка: ключ в исходном файле -> (поля записи с типами, поле навыков, числовое поле колонок)
+TABLES = {
+    "candidates": ((("name", str), ("skills", str), ("experience", int)), "skills", "experience"),
+    "vacancies": ((("title", str), ("employer_id", int), ("requirements", str)), "requirements", "employer_id"),
+}
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def snapshot_path(source):
+    # Путь к снимку в SNAPSHOT_DIR; хэш полного пути различает одноименные файлы из разных каталогов
+    source = os.path.abspath(source)
+    digest = hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(SNAPSHOT_DIR, f"{os.path.basename(source)}.{digest}{SNAPSHOT_SUFFIX}")
+
+
+# Строковый столбец снимка: строка i - байты data[offsets[i]:offsets[i + 1]], декодируются при обращении
+class StringColumn:
+    def __init__(self, offsets, data):
+        self.offsets = offsets  # Смещения строк (Q), длина - число строк + 1
+        self.data = data  # Байты всех строк подряд
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        # Последовательное чтение: смещения и байты копируются один раз, а не на каждую строку
+        offsets, data = self.offsets.tolist(), self.data.tobytes()
+        for start, end in zip(offsets, offsets[1:]):
+            yield data[start:end].decode("utf-8")
+
+
+# Записи таблицы снимка: последовательность словарей, как в исходном файле, которые собираются при обращении
+class SnapshotRecords:
+    def __init__(self, snapshot, table, columns):
+        self.snapshot = snapshot
+        self.table = table
+        self.columns = columns  # Поле -> столбец (StringColumn или memoryview чисел)
+
+    def __len__(self):
+        return len(self.snapshot.section(f"{self.table}.ids"))
+
+    def __getitem__(self, i):
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+        return {field: column[i] for field, column in self.columns.items()}
+
+    def __iter__(self):
+        fields = list(self.columns)
+        for values in zip(*self.columns.values()):
+            yield dict(zip(fields, values))
+
+    def skill_columns(self):
+        # Колонки навыков таблицы (SkillColumns) без копирования: массивы - представления отображенного файла.
+        # id записей - их номера начиная с 1, id навыков общие для кандидатов и вакансий
+        _, _, value_field = TABLES[self.table]
+        return SkillColumns(self.snapshot.section(f"{self.table}.ids"), self.columns[value_field],
+                            self.snapshot.section(f"{self.table}.skill_offsets"),
+                            self.snapshot.section(f"{self.table}.skill_ids"), self.snapshot.skill_names())
+
+
+# Открытый снимок: файл отображается в память, секции отдаются как memoryview нужного типа.
+# Закрывается через close() или with, после чего записи снимка читать нельзя
+class Snapshot:
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.buffer)
+        try:
+            self._read_header()
+        except BaseException:
+            self.close()
+            raise
+        self.verified = set()
+        self._skill_names = None
+
+    def _read_header(self):
+        if len(self.view) < HEADER.size:
+            raise SnapshotError("Снимок поврежден")
+        (magic, self.version, self.skill_version, count, table_crc,
+         self.source_size, self.source_mtime_ns) = HEADER.unpack_from(self.view)
+        if magic != SNAPSHOT_MAGIC or self.version != SNAPSHOT_VERSION:
+            raise SnapshotError("Неизвестный формат снимка")
+        table = self.view[HEADER.size:HEADER.size + count * SECTION.size]
+        if len(table) != count * SECTION.size or zlib.crc32(table) != table_crc:
+            raise SnapshotError("Снимок поврежден")
+        self.sections = {}
+        for name, typecode, crc, offset, length in SECTION.iter_unpack(table):
+            if offset + length > len(self.view):
+                raise SnapshotError("Снимок поврежден")
+            self.sections[name.rstrip(b"\0").decode("ascii")] = (typecode.decode("ascii"), crc, offset, length)
+
+    def close(self):
+        # Снятие отображения файла. Если полученные ранее колонки (memoryview) еще используются, отображение
+        # снимается, когда они будут освобождены
+        self.view.release()
+        try:
+            self.buffer.close()
+        except BufferError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def section(self, name):
+        # Секция как memoryview элементов своего типа; контрольная сумма проверяется при первом обращении
+        typecode, crc, offset, length = self.sections[name]
+        data = self.view[offset:offset + length]
+        if name not in self.verified:
+            if zlib.crc32(data) != crc:
+                raise SnapshotError(f"Снимок поврежден: {name}")
+            self.verified.add(name)
+        return data.cast(typecode)
+
+    def strings(self, name):
+        return StringColumn(self.section(f"{name}.offsets"), self.section(f"{name}.data"))
+
+    def records(self, table):
+        fields, _, _ = TABLES[table]
+        columns = {field: self.strings(f"{table}.{field}") if kind is str else self.section(f"{table}.{field}")
+                   for field, kind in fields}
+        return SnapshotRecords(self, table, columns)
+
+    def data(self):
+        # Содержимое в виде исходного файла: {"candidates": [...], "vacancies": [...]}
+        return {table: self.records(table) for table in TABLES}
+
+    def skill_names(self):
+        # id навыка -> название (для колонок навыков)
+        if self._skill_names is None:
+            names = self.strings("skills.name")
+            self._skill_names = {i + 1: names[i] for i in range(len(names))}
+        return self._skill_names
+
+
+def open_snapshot(source, skill_version):
+    # Снимок исходного файла, если он есть, не поврежден и построен по текущей версии файла, иначе None
+    path = snapshot_path(source)
+    try:
+        source_stat, snapshot_stat = os.stat(source), os.stat(path)
+        if snapshot_stat.st_mtime_ns < source_stat.st_mtime_ns:
+            return None
+        snapshot = Snapshot(path)
+    except (OSError, ValueError):
+        return None
+    if (snapshot.source_size, snapshot.source_mtime_ns, snapshot.skill_version) != \
+            (source_stat.st_size, source_stat.st_mtime_ns, skill_version):
+        snapshot.close()  # Устаревший снимок будет заменен новым
+        return None
+    return snapshot
+
+
+def _string_column(values):
+    offsets, data = array('Q', [0]), bytearray()
+    for value in values:
+        data += value.encode("utf-8")
+        offsets.append(len(data))
+    return offsets, data
+
+
+def _check_field(table, field, kind, value):
+    # В снимок попадают только значения ожидаемых типов, чтобы записи из снимка совпадали с исходными
+    if type(value) is not kind or (kind is int and not -2 ** 63 <= value < 2 ** 63):
+        raise SnapshotError(f"Значение {table}.{field} не поддерживается снимком: {value!r}")
+
+
+def build_sections(data, split):
+    # Секции снимка по разобранному исходному файлу: {имя: (код типа, байты)}
+    sections = {}
+    interned = {}
+    for table, (fields, skills_field, _) in TABLES.items():
+        records = data.get(table, [])
+        for field, kind in fields:
+            for record in records:
+                _check_field(table, field, kind, record.get(field))
+            values = [record[field] for record in records]
+            if kind is str:
+                offsets, blob = _string_column(values)
+                sections[f"{table}.{field}.offsets"] = ('Q', offsets.tobytes())
+                sections[f"{table}.{field}.data"] = ('B', bytes(blob))
+            else:
+                sections[f"{table}.{field}"] = ('q', array('q', values).tobytes())
+        offsets, skill_ids = array('I', [0]), array('i')
+        for record in records:
+            for skill in split(record[skills_field]):
+                skill_ids.append(interned.setdefault(skill, len(interned) + 1))
+            offsets.append(len(skill_ids))
+        sections[f"{table}.ids"] = ('q', array('q', range(1, len(records) + 1)).tobytes())
+        sections[f"{table}.skill_offsets"] = ('I', offsets.tobytes())
+        sections[f"{table}.skill_ids"] = ('i', skill_ids.tobytes())
+    offsets, blob = _string_column(interned)
+    sections["skills.name.offsets"] = ('Q', offsets.tobytes())
+    sections["skills.name.data"] = ('B', bytes(blob))
+    return sections
+
+
+def write_snapshot(source, data, split, skill_version):
+    # Запись снимка разобранного исходного файла (через временный файл, чтобы читатели не увидели его частично)
+    sections = build_sections(data, split)
+    source_stat = os.stat(source)
+    offset = HEADER.size + len(sections) * SECTION.size
+    table, layout = [], []
+    for name, (typecode, payload) in sections.items():
+        offset += -offset % ALIGNMENT
+        table.append(SECTION.pack(name.encode("ascii"), typecode.encode("ascii"), zlib.crc32(payload),
+                                  offset, len(payload)))
+        layout.append((offset, payload))
+        offset += len(payload)
+    table = b"".join(table)
+    path = snapshot_path(source)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as file:
+            file.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, skill_version, len(sections), zlib.crc32(table),
+                                   source_stat.st_size, source_stat.st_mtime_ns))
+            file.write(table)
+            for offset, payload in layout:
+                file.write(b"\0" * (offset - file.tell()))
+                file.write(payload)
+        os.replace(temp_path, path)
+    except BaseException:
+        # Недописанный снимок не должен оставаться в каталоге кэша
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return path
@@ -0,0 +1,86 @@
+"""Модуль с моделью таблицы, подгружающей данные из базы порциями"""
+
+from itertools import islice
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+PAGE_SIZE = 500  # Количество строк, подгружаемых за один вызов fetchMore
+
+
+# Модель таблицы, читающая строки из курсора по мере прокрутки
+class LazyTableModel(QAbstractTableModel):
+    def __init__(self, open_cursor, columns, page_size=PAGE_SIZE, parent=None):
+        # open_cursor(order_column, descending) возвращает итератор строк (курсор базы или список)
+        super().__init__(parent)
+        self.open_cursor = open_cursor
+        self.columns = columns
+        self.page_size = page_size
+        self.rows = []
+        self.cursor = iter(self.open_cursor(None, False))
+        self.exhausted = False
+
+    @classmethod
+    def for_table(cls, db, table, page_size=PAGE_SIZE, parent=None):
+        # Модель для таблицы базы: сортировка выполняется запросом ORDER BY
+        columns = db.table_columns(table)
+
+        def open_cursor(order_column, descending):
+            return db.open_table_cursor(table, order_column, descending)
+
+        return cls(open_cursor, columns, page_size, parent)
+
+    @classmethod
+    def for_rows(cls, rows, columns=None, page_size=PAGE_SIZE, parent=None):
+        # Модель для готового списка строк (например, результатов поиска)
+        rows = list(rows)
+        if columns is None:
+            columns = [str(i + 1) for i in range(len(rows[0]))] if rows else []
+
+        def open_cursor(order_column, descending):
+            if order_column is None:
+                return iter(rows)
+            col = columns.index(order_column)
+            return iter(sorted(rows, key=lambda row: (row[col] is None, row[col]), reverse=descending))
+
+        return cls(open_cursor, columns, page_size, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        return str(self.rows[index.row()][index.column()])
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.columns[section]
+        return str(section + 1)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        # Подгрузка очередной порции строк из курсора
+        if parent.isValid() or self.exhausted:
+            return
+        batch = list(islice(self.cursor, self.page_size))
+        if len(batch) < self.page_size:
+            self.exhausted = True
+        if batch:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(batch) - 1)
+            self.rows.extend(batch)
+            self.endInsertRows()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # Сортировка по столбцу: курсор открывается заново с нужным порядком, строки подгружаются с начала
+        self.beginResetModel()
+        order_column = self.columns[column] if 0 <= column < len(self.columns) else None
+        self.cursor = iter(self.open_cursor(order_column, order == Qt.DescendingOrder))
+        self.rows = []
+        self.exhausted = False
+        self.endResetModel()
@@ -0,0 +1,36 @@
+"""Общие настройки тестов: модули проекта импортируются из корня репозитория, снимки файлов пишутся
+во временный каталог теста, а не в кэш пользователя"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import snapshot  # noqa: E402
+from hr_database import HRDatabase  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(tmp_path, monkeypatch):
+    # Каталог снимков исходных файлов для теста
+    path = tmp_path / "snapshots"
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", str(path))
+    return path
+
+
+@pytest.fixture
+def db(tmp_path):
+    # Пустая база в файле во временном каталоге
+    database = HRDatabase(str(tmp_path / "test.db"))
+    yield database
+    database.close()
+
+
+def write_json(path, candidates=(), vacancies=()):
+    # Файл в формате input_data.json
+    path.write_text(json.dumps({"candidates": list(candidates), "vacancies": list(vacancies)}, ensure_ascii=False),
+                    encoding="utf-8")
+    return str(path)
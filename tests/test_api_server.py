@@ -0,0 +1,125 @@
+"""Тесты HTTP API (api_server.py): постраничный вывод, проверка запросов, потоковые ответы"""
+
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+import pytest
+
+import api_server
+from api_server import HRService, HTTPError, Request, StreamResponse, read_request, send_stream
+from classes import Candidate
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = HRService(str(tmp_path / "api.db"), workers=2)
+    service.db.bulk_add(Candidate(f"Кандидат {i}", "Python, Django" if i % 2 else "Go", i % 10)
+                        for i in range(1, 26))
+    yield service
+    service.close()
+
+
+def call(service, path, query=""):
+    # Ответ обработчика запроса GET: (статус, данные) или StreamResponse
+    request = Request("GET", path, parse_qs(query), {}, b"")
+    return asyncio.run(service.dispatch(request))
+
+
+def read_stream(response):
+    # Тело потокового ответа целиком
+    async def collect():
+        return b"".join([chunk async for chunk in response.chunks])
+    return json.loads(asyncio.run(collect()))
+
+
+def test_pages_cover_all_records(service):
+    ids, query = [], "limit=7"
+    while True:
+        status, page = call(service, "/candidates", query)
+        assert status == 200 and len(page["items"]) <= 7
+        ids += [item["id"] for item in page["items"]]
+        if page["next"] is None:
+            break
+        query = f"limit=7&after_id={page['next']['after_id']}"
+    assert ids == list(range(1, 26))
+
+
+@pytest.mark.parametrize("limit", ["0", "-1", "abc"])
+def test_invalid_limit(service, limit):
+    for path, query in (("/candidates", f"limit={limit}"), ("/search/candidates", f"skills=Python&limit={limit}")):
+        with pytest.raises(HTTPError) as error:
+            call(service, path, query)
+        assert error.value.status == 400
+
+
+def test_limit_capped(service, monkeypatch):
+    monkeypatch.setattr(api_server, "MAX_PAGE_LIMIT", 4)
+    status, page = call(service, "/candidates", "limit=100")
+    assert status == 200 and len(page["items"]) == 4 and page["next"] == {"after_id": 4}
+
+
+def test_fuzzy_search_reports_corrections(service):
+    status, page = call(service, "/search/candidates", "skills=Pyhton&limit=50&fuzzy=1")
+    assert status == 200 and page["corrections"] == {"Pyhton": "Python"}
+    assert len(page["items"]) == 13
+    response = call(service, "/search/candidates", "skills=Pyhton&fuzzy=1")
+    assert isinstance(response, StreamResponse)
+    assert json.loads(response.headers[0].partition(":")[2]) == {"Pyhton": "Python"}
+    assert len(read_stream(response)) == 13
+
+
+def test_fuzzy_fulltext_search(service):
+    if not service.db.fts_enabled:
+        pytest.skip("SQLite собран без FTS5")
+    status, page = call(service, "/search/candidates", "skills=Djnago&fulltext=1&fuzzy=1")
+    assert {skill: fixed.casefold() for skill, fixed in page["corrections"].items()} == {"Djnago": "django"}
+    assert len(page["items"]) == 13
+
+
+def parse_request(data):
+    # Разбор запроса из байтов, как из сокета
+    async def parse():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await read_request(reader)
+    return asyncio.run(parse())
+
+
+@pytest.mark.parametrize("length", ["abc", "-5"])
+def test_malformed_content_length(length):
+    with pytest.raises(HTTPError) as error:
+        parse_request(f"POST /candidates HTTP/1.1\r\nContent-Length: {length}\r\n\r\n{{}}".encode("latin-1"))
+    assert error.value.status == 400
+
+
+def test_request_body():
+    request = parse_request(b'POST /candidates/?x=1 HTTP/1.1\r\nContent-Length: 2\r\n\r\n{}')
+    assert (request.method, request.path, request.query, request.body) == ("POST", "/candidates", {"x": ["1"]}, b"{}")
+
+
+class Writer:
+    # Запись ответа в память вместо сокета
+    def __init__(self):
+        self.data = b""
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+
+def test_interrupted_stream_is_terminated():
+    async def chunks():
+        yield b"[1"
+        raise RuntimeError("ошибка базы")
+
+    writer = Writer()
+    completed = asyncio.run(send_stream(writer, chunks(), headers=["X-Test: 1"]))
+    assert completed is False
+    head, _, body = writer.data.partition(b"\r\n\r\n")
+    assert b"Transfer-Encoding: chunked" in head and b"X-Test: 1" in head
+    assert body == b"2\r\n[1\r\n0\r\n\r\n"
+    assert head.count(b"HTTP/1.1") == 1
@@ -0,0 +1,62 @@
+"""Тесты массовой загрузки (HRDatabase.bulk_add): откат при ошибке и восстановление индексов"""
+
+import pytest
+
+from classes import Candidate, Vacancy
+from hr_database import FTS_TRIGGERS, SECONDARY_INDEXES
+
+
+def schema_objects(db, kind):
+    return {name for (name,) in db.conn.execute("SELECT name FROM sqlite_master WHERE type = ?", (kind,))}
+
+
+def failing_candidates(count):
+    # Кандидаты, чтение которых прерывается ошибкой после count записей
+    for i in range(count):
+        yield Candidate(f"Кандидат {i}", "Python, SQL", i % 10)
+    raise RuntimeError("ошибка источника")
+
+
+def test_failed_load_rolls_back_and_keeps_indexes(db):
+    db.add_candidate(Candidate("Иванов", "Go", 2))
+    indexes, triggers = schema_objects(db, "index"), schema_objects(db, "trigger")
+    assert set(SECONDARY_INDEXES) <= indexes
+    with pytest.raises(RuntimeError):
+        db.bulk_add(failing_candidates(500), batch_size=100, rebuild_indexes=True, clear=True)
+    assert schema_objects(db, "index") == indexes
+    assert schema_objects(db, "trigger") == triggers
+    assert [row[1] for row in db.get_candidates()] == ["Иванов"]
+
+
+def test_fulltext_index_after_failed_load(db):
+    if not db.fts_enabled:
+        pytest.skip("SQLite собран без FTS5")
+    assert set(FTS_TRIGGERS) <= schema_objects(db, "trigger")
+    with pytest.raises(RuntimeError):
+        db.bulk_add(failing_candidates(10), rebuild_indexes=True)
+    db.add_candidate(Candidate("Петров", "Kotlin", 4))
+    assert [row[1] for row in db.search_candidates("kotlin")] == ["Петров"]
+
+
+def test_bulk_load_with_rebuilt_indexes(db):
+    stats = db.bulk_add((Candidate(f"Кандидат {i}", "Python, SQL", i) for i in range(50)),
+                        [Vacancy("Разработчик", 1, "Python")], rebuild_indexes=True, clear=True)
+    assert (stats["candidates"], stats["vacancies"]) == (50, 1)
+    assert set(SECONDARY_INDEXES) <= schema_objects(db, "index")
+    assert len(db.find_matching_candidates("Python", min_experience=45)) == 5
+
+
+def test_clear_drops_batch_match_results(db, tmp_path):
+    db.bulk_add([Candidate("Иванов", "Python", 3)], [Vacancy("Разработчик", 1, "Python")])
+    with db.manager.write():
+        db.conn.execute("INSERT INTO MatchJobs (id, k, started_at, finished_at) VALUES (1, 5, 0, 1), (2, 5, 2, NULL)")
+        db.conn.execute("INSERT INTO MatchJobShards (job_id, shard, low_id, high_id) VALUES (2, 0, NULL, NULL)")
+        db.conn.execute("INSERT INTO MatchShardResults VALUES (2, 0, 1, 1, 0.5)")
+        db.conn.execute("INSERT INTO MatchResults VALUES (1, 1, 1, 0.5, 1)")
+    assert len(list(db.iter_match_results())) == 1
+    db.bulk_add([Candidate("Петров", "Go", 1)], clear=True)
+    assert list(db.iter_match_results()) == []
+    for table in ("MatchJobs", "MatchJobShards", "MatchShardResults"):
+        assert db.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] == 0
+    stats = db.export(str(tmp_path / "batch.csv"), source="batch-matches")
+    assert stats["rows"] == 0
@@ -0,0 +1,89 @@
+"""Тесты поиска кандидатов по навыкам и опыту: все планы планировщика дают тот же результат, что и фильтр"""
+
+import random
+
+import pytest
+
+from classes import Candidate
+from hr_database import HRDatabase, split_skills
+
+SKILLS = ["Python", "SQL", "Go", "Java", "Docker", "Rust"]
+RANGES = [(None, 3), (2, None), (4, 8), (7, 7), (20, None)]
+DRIVERS = ["skill", "skill_range", "experience", "id"]
+
+
+@pytest.fixture
+def search_db(db):
+    generator = random.Random(7)
+    weights = [40, 30, 20, 10, 5, 1]  # Частые и редкие навыки
+    db.bulk_add(Candidate(f"Кандидат {i}", ", ".join(set(generator.choices(SKILLS, weights, k=3))),
+                          generator.randint(0, 15)) for i in range(400))
+    return db
+
+
+def expected(db, skills, min_experience, max_experience):
+    # id кандидатов простым фильтром всех строк
+    wanted = set(split_skills(skills))
+    return [row[0] for row in db.get_candidates()
+            if wanted <= set(split_skills(row[2]))
+            and (min_experience is None or row[3] >= min_experience)
+            and (max_experience is None or row[3] <= max_experience)]
+
+
+def force_plan(monkeypatch, driver):
+    # Планировщик выбирает заданный план (skill_id - ведущий навык, как выбрал бы сам планировщик)
+    plan = HRDatabase._plan_candidate_search
+
+    def forced(self, skill_ids, *args):
+        result = plan(self, skill_ids, *args)
+        result["driver"] = driver
+        result["skill_id"] = skill_ids[0] if skill_ids and result["skill_id"] is None else result["skill_id"]
+        return result
+    monkeypatch.setattr(HRDatabase, "_plan_candidate_search", forced)
+
+
+@pytest.mark.parametrize("driver", DRIVERS)
+@pytest.mark.parametrize("skills", ["Python", "SQL, Go", "Rust, Python", ""])
+def test_plans_return_same_rows(search_db, monkeypatch, driver, skills):
+    if not skills and driver.startswith("skill"):
+        pytest.skip("Без навыков планы по навыку не применяются")
+    force_plan(monkeypatch, driver)
+    for min_experience, max_experience in RANGES:
+        ids = expected(search_db, skills, min_experience, max_experience)
+        found = search_db.find_matching_candidates(skills, min_experience, max_experience)
+        assert [row[0] for row in found] == ids
+        pages, after_id = [], None
+        while True:
+            page = search_db.find_matching_candidates_page(skills, after_id, 7, False, min_experience, max_experience)
+            pages += [row[0] for row in page]
+            if len(page) < 7:
+                break
+            after_id = page[-1][0]
+        assert pages == ids
+        descending = search_db.find_matching_candidates_page(skills, None, 5, True, min_experience, max_experience)
+        assert [row[0] for row in descending] == ids[::-1][:5]
+
+
+def test_planner_choices(search_db):
+    def skill_ids(skills):
+        return search_db._skill_ids(skills, create=False)
+    chosen = {search_db._plan_candidate_search(skill_ids("Rust"), 0, 15)["driver"],
+              search_db._plan_candidate_search(skill_ids("Python"), 7, 7)["driver"],
+              search_db._plan_candidate_search([], 7, 7)["driver"],
+              search_db._plan_candidate_search([], 0, 15, 10)["driver"]}
+    assert chosen <= set(DRIVERS) and len(chosen) > 1
+
+
+def test_skill_filter_without_range(search_db):
+    for skills in ("Python", "SQL, Go", "Rust, Python"):
+        assert [row[0] for row in search_db.find_matching_candidates(skills)] == \
+            expected(search_db, skills, None, None)
+    assert search_db.find_matching_candidates("Haskell", 1, 5) == []
+
+
+def test_fulltext_matches_skill_filter(search_db):
+    if not search_db.fts_enabled:
+        pytest.skip("SQLite собран без FTS5")
+    for skills in ("Python", "SQL, Go", "Rust, Python"):
+        assert sorted(row[0] for row in search_db.search_candidates(skills, 1000)) == \
+            expected(search_db, skills, None, None)
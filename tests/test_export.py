@@ -0,0 +1,55 @@
+"""Тесты экспорта (export.py): форматы, деление на файлы и удаление файлов при ошибке"""
+
+import csv
+import json
+
+import pytest
+
+from classes import Candidate
+from export import export_rows, read_columnar
+
+COLUMNS = ["id", "name", "score", "note"]
+ROWS = [(i, f"Строка {i}", i / 4, None if i % 3 else f"заметка {i}") for i in range(1, 101)]
+
+
+def test_columnar_round_trip(tmp_path):
+    filename = str(tmp_path / "rows.hrcol")
+    stats = export_rows(iter(ROWS), COLUMNS, filename)
+    assert stats["rows"] == 100 and stats["files"] == [filename]
+    columns, rows = read_columnar(filename)
+    assert columns == COLUMNS and list(rows) == ROWS
+
+
+def test_jsonl_and_csv(tmp_path):
+    export_rows(ROWS, COLUMNS, str(tmp_path / "rows.jsonl"))
+    lines = (tmp_path / "rows.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == [dict(zip(COLUMNS, row)) for row in ROWS]
+    export_rows(ROWS, COLUMNS, str(tmp_path / "rows.csv"))
+    with open(tmp_path / "rows.csv", encoding="utf-8", newline="") as file:
+        records = list(csv.reader(file))
+    assert records[0] == COLUMNS and len(records) == 101 and records[1][1] == "Строка 1"
+
+
+def test_split_by_max_rows(tmp_path):
+    stats = export_rows(ROWS, COLUMNS, str(tmp_path / "rows.hrcol"), max_rows=30)
+    assert stats["rows"] == 100 and len(stats["files"]) == 4
+    assert sum(len(list(read_columnar(name)[1])) for name in stats["files"]) == 100
+
+
+def test_failed_export_removes_files(tmp_path):
+    def rows():
+        yield from ROWS[:50]
+        raise RuntimeError("запрос отменен")
+
+    with pytest.raises(RuntimeError):
+        export_rows(rows(), COLUMNS, str(tmp_path / "rows.csv"), max_rows=20, batch_size=10)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_database_export(db, tmp_path):
+    db.bulk_add(Candidate(f"Кандидат {i}", "Python" if i % 2 else "Go", i) for i in range(10))
+    filename = str(tmp_path / "python.jsonl")
+    stats = db.export(filename, skills="Python", min_experience=5)
+    assert stats["rows"] == 3
+    with open(filename, encoding="utf-8") as file:
+        assert [json.loads(line)["name"] for line in file] == ["Кандидат 5", "Кандидат 7", "Кандидат 9"]
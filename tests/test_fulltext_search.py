@@ -0,0 +1,47 @@
+"""Тесты полнотекстового поиска (HRDatabase.search_candidates и search_vacancies): синонимы и операторы"""
+
+import pytest
+
+from classes import Candidate, Vacancy
+
+
+@pytest.fixture
+def fts_db(db):
+    if not db.fts_enabled:
+        pytest.skip("SQLite собран без FTS5")
+    db.bulk_add([Candidate("Иванов", "JS, React", 3), Candidate("Петров", "Python3, Django", 5),
+                 Candidate("Сидоров", "JavaScript, Node.js", 2), Candidate("Смирнов", "Питон, Machine Learning", 1)],
+                [Vacancy("Фронтенд", 1, "java script, reactjs"), Vacancy("Бэкенд", 2, "Python, PostgreSQL")])
+    return db
+
+
+def names(rows):
+    return sorted(row[1] for row in rows)
+
+
+@pytest.mark.parametrize("query", ["JS", "javascript", "Java Script"])
+def test_alias_and_canonical_find_all_spellings(fts_db, query):
+    assert names(fts_db.search_candidates(query)) == ["Иванов", "Сидоров"]
+
+
+@pytest.mark.parametrize("query", ["python", "Python3", "питон"])
+def test_python_spellings(fts_db, query):
+    assert names(fts_db.search_candidates(query)) == ["Петров", "Смирнов"]
+
+
+def test_skills_with_operators(fts_db):
+    assert names(fts_db.search_candidates("js, react")) == ["Иванов"]
+    assert names(fts_db.search_candidates("react OR django")) == ["Иванов", "Петров"]
+    assert names(fts_db.search_candidates("(js OR python) NOT django")) == ["Иванов", "Сидоров", "Смирнов"]
+    assert names(fts_db.search_candidates("ml")) == ["Смирнов"]
+    assert names(fts_db.search_candidates("pyth*")) == ["Петров"]  # Префикс синонимы не раскрывает
+
+
+def test_vacancies_by_alias(fts_db):
+    assert names(fts_db.search_vacancies("JavaScript, React")) == ["Фронтенд"]
+    assert names(fts_db.search_vacancies("postgres")) == ["Бэкенд"]
+
+
+def test_invalid_query(fts_db):
+    with pytest.raises(ValueError):
+        fts_db.search_candidates("python OR")
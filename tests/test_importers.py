@@ -0,0 +1,105 @@
+"""Тесты потокового импорта (importers.py и HRDatabase.import_file): нумерация и учет ошибок"""
+
+import json
+
+import pytest
+
+from importers import parse_file
+
+
+def collect(filename, **options):
+    # Все записи и ошибки файла: (кандидаты, вакансии, ошибки)
+    candidates, vacancies, errors = [], [], []
+    for chunk_candidates, chunk_vacancies, chunk_errors in parse_file(filename, workers=1, **options):
+        candidates += chunk_candidates
+        vacancies += chunk_vacancies
+        errors += chunk_errors
+    return candidates, vacancies, errors
+
+
+def candidate(i):
+    return {"name": f"Кандидат {i}", "skills": "Python, SQL", "experience": i % 10}
+
+
+def test_jsonl_errors_have_line_numbers(tmp_path):
+    path = tmp_path / "data.jsonl"
+    lines = [json.dumps(candidate(1), ensure_ascii=False), "{broken", "",
+             json.dumps({"name": "Без опыта", "skills": "Go", "experience": "много"}, ensure_ascii=False),
+             json.dumps({"title": "Разработчик", "employer_id": 1, "requirements": "Go"}, ensure_ascii=False)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    candidates, vacancies, errors = collect(str(path))
+    assert candidates == [("Кандидат 1", "Python, SQL", 1)]
+    assert vacancies == [("Разработчик", 1, "Go")]
+    assert [location for location, _ in errors] == ["строка 2", "строка 4"]
+
+
+def test_csv_multiline_values_and_column_count(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text('name,skills,experience\n"Иванов","Python,\nSQL",3\nПетров,Go\nСидоров,Java,5\n',
+                    encoding="utf-8")
+    candidates, _, errors = collect(str(path))
+    assert [row[0] for row in candidates] == ["Иванов", "Сидоров"]
+    assert errors[0][0] == "строка 4" and "Ожидалось значений: 3" in errors[0][1]
+
+
+def test_json_bad_record_keeps_chunk_and_numbering(tmp_path):
+    # Некорректная запись в части файла не отбрасывает остальные записи части и не сбивает номера следующих
+    records = [json.dumps(candidate(i), ensure_ascii=False) for i in range(1, 2001)]
+    records[500] = '{"name": "Сломанный", "skills": }'
+    path = tmp_path / "data.json"
+    path.write_text('{"candidates": [' + ",\n".join(records) + '], "vacancies": []}', encoding="utf-8")
+    candidates, _, errors = collect(str(path), chunk_bytes=4096)
+    assert len(candidates) == 1999
+    assert [location for location, _ in errors] == ["candidates, запись 501"]
+    assert candidates[500][0] == "Кандидат 502"
+
+
+def test_json_invalid_field_location(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps({"candidates": [candidate(1), {"name": "", "skills": "Go", "experience": 1}],
+                                "vacancies": [{"title": "Аналитик", "employer_id": "x", "requirements": "SQL"}]},
+                               ensure_ascii=False), encoding="utf-8")
+    candidates, vacancies, errors = collect(str(path))
+    assert len(candidates) == 1 and not vacancies
+    assert [location for location, _ in errors] == ["candidates, запись 2", "vacancies, запись 1"]
+
+
+def test_import_file_counts_errors(db, tmp_path):
+    path = tmp_path / "data.jsonl"
+    lines = [json.dumps(candidate(i), ensure_ascii=False) for i in range(1, 6)] + ["not json"] * 3
+    path.write_text("\n".join(lines), encoding="utf-8")
+    errors_file = tmp_path / "errors.jsonl"
+    stats = db.import_file(str(path), errors_file=str(errors_file))
+    assert stats["candidates"] == 5
+    assert stats["errors"] == 3
+    assert stats["error_samples"][0].startswith("строка 6: ")
+    written = [json.loads(line) for line in errors_file.read_text(encoding="utf-8").splitlines()]
+    assert [error["location"] for error in written] == ["строка 6", "строка 7", "строка 8"]
+    assert len(db.get_candidates()) == 5
+
+
+@pytest.mark.parametrize("chunk_bytes", [64, 1000, 1 << 20])
+def test_json_nested_values_and_strings(tmp_path, chunk_bytes):
+    # Вложенные массивы объектов и скобки, запятые и кавычки в строках не считаются границами записей
+    candidates = [dict(candidate(i), tags=[{"a": i}, {"b": [1, {"c": "}],"}]}],
+                       note='текст с "кавычками", \\ и скобками ]}') for i in range(1, 51)]
+    vacancies = [{"title": f"Вакансия {i}", "employer_id": i, "requirements": "Go", "extra": [[{}], []]}
+                 for i in range(1, 21)]
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps({"candidates": candidates, "vacancies": vacancies}, ensure_ascii=False, indent=1),
+                    encoding="utf-8")
+    loaded_candidates, loaded_vacancies, errors = collect(str(path), chunk_bytes=chunk_bytes)
+    assert errors == []
+    assert [row[0] for row in loaded_candidates] == [f"Кандидат {i}" for i in range(1, 51)]
+    assert len(loaded_vacancies) == 20
+
+
+def test_json_unbalanced_section(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text('{"candidates": [{"name": "Иванов", "skills": "Go", "experience": 1, "tags": [}}], '
+                    '"vacancies": []}', encoding="utf-8")
+    with pytest.raises(ValueError, match="непарная скобка"):
+        collect(str(path))
+    path.write_text('{"candidates": [{"name": "Иванов", "skills": "Go", "experience": 1}', encoding="utf-8")
+    with pytest.raises(ValueError, match="оборван"):
+        collect(str(path))
@@ -0,0 +1,44 @@
+"""Тесты статистики запросов (instrumentation.py): обработчик отмены фонового запроса и переключение статистики"""
+
+import sqlite3
+
+import pytest
+
+from classes import Candidate
+
+SLOW_QUERY = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 3000000) SELECT SUM(i) FROM n"
+
+
+@pytest.mark.parametrize("toggles", [(True,), (True, False), (False, True, False)])
+def test_cancel_handler_survives_stats_toggle(db, toggles):
+    calls = []
+
+    def cancel():
+        calls.append(1)
+        return 1  # Прервать запрос
+
+    db.manager.set_progress(cancel, 100)
+    try:
+        for enabled in toggles:
+            db.set_stats_enabled(enabled)
+        with pytest.raises(sqlite3.OperationalError, match="interrupted"):
+            db.conn.execute(SLOW_QUERY).fetchone()
+        assert calls
+    finally:
+        db.manager.set_progress()
+        db.set_stats_enabled(False)
+    assert db.conn.execute("SELECT COUNT(*) FROM (SELECT 1 UNION ALL SELECT 2)").fetchone() == (2,)
+
+
+def test_stats_count_steps_with_cancel_handler(db):
+    db.add_candidate(Candidate("Иванов", "Python", 3))
+    db.manager.set_progress(lambda: 0, 100)
+    try:
+        db.set_stats_enabled(True)
+        db.find_matching_candidates("Python")
+        db.conn.execute("SELECT 1").fetchone()  # Завершает учет предыдущего запроса
+        assert db.stats.statements
+        assert any(entry["vm_steps"] for entry in db.stats.statements.values())
+    finally:
+        db.manager.set_progress()
+        db.set_stats_enabled(False)
@@ -0,0 +1,63 @@
+"""Тесты поддержки таблицы Matches (списки подбора вакансий) при добавлении, изменении и удалении записей"""
+
+import random
+
+import pytest
+
+import hr_database
+from classes import Candidate, Vacancy
+
+SKILLS = ["Python", "SQL", "Go", "Java", "Docker", "Git", "Linux", "React"]
+
+
+def random_skills(generator):
+    return ", ".join(generator.sample(SKILLS, generator.randint(1, 4)))
+
+
+def assert_matches_current(db, k):
+    # Списки подбора из таблицы Matches совпадают с полным пересчетом (MatchEngine по всем вакансиям)
+    vacancy_ids = db.get_ids("Vacancies")
+    incremental = db.match_vacancies(k, vacancy_ids)
+    full = db.match_vacancies(k)
+    assert [row[:4] for row in incremental] == [row[:4] for row in full]
+    assert [row[4] for row in incremental] == pytest.approx([row[4] for row in full])
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_incremental_matches_equal_full_recompute(db, monkeypatch, seed):
+    monkeypatch.setattr(hr_database, "MATCHES_PER_VACANCY", 6)  # Короткие списки: вытеснение и дозаполнение
+    generator = random.Random(seed)
+    for i in range(8):
+        db.add_vacancy(Vacancy(f"Вакансия {i}", i % 3, random_skills(generator)))
+    for i in range(30):
+        db.add_candidate(Candidate(f"Кандидат {i}", random_skills(generator), generator.randint(0, 12)))
+    assert_matches_current(db, 3)  # Заполнение списков, дальше они обновляются построчно
+    for step in range(120):
+        action = generator.random()
+        candidate_ids, vacancy_ids = db.get_ids("Candidates"), db.get_ids("Vacancies")
+        if action < 0.3:
+            db.add_candidate(Candidate(f"Новый {step}", random_skills(generator), generator.randint(0, 12)))
+        elif action < 0.6 and candidate_ids:
+            candidate_id = generator.choice(candidate_ids)
+            db.edit_candidate(candidate_id, f"Измененный {step}", random_skills(generator), generator.randint(0, 12))
+        elif action < 0.8 and candidate_ids:
+            db.delete_candidate(generator.choice(candidate_ids))
+        elif action < 0.9 and vacancy_ids:
+            db.edit_vacancy(generator.choice(vacancy_ids), f"Вакансия {step}", step % 3, random_skills(generator))
+        elif action < 0.95:
+            db.add_vacancy(Vacancy(f"Вакансия {step}", step % 3, random_skills(generator)))
+        elif vacancy_ids:
+            db.delete_vacancy(generator.choice(vacancy_ids))
+        if step % 10 == 0:
+            assert_matches_current(db, 3)
+    assert_matches_current(db, 3)
+    assert_matches_current(db, 6)
+
+
+def test_matches_after_bulk_load(db):
+    db.add_vacancy(Vacancy("Разработчик", 1, "Python, SQL"))
+    assert_matches_current(db, 5)
+    db.bulk_add(Candidate(f"Кандидат {i}", "Python" if i % 2 else "SQL, Python", i % 7) for i in range(20))
+    assert_matches_current(db, 5)
+    db.delete_candidate(1)
+    assert_matches_current(db, 5)
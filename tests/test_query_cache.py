@@ -0,0 +1,79 @@
+"""Тесты кэша результатов поиска (query_cache.py): сброс записей по затронутым навыкам"""
+
+from classes import Candidate, Vacancy
+from query_cache import QueryCache
+
+PYTHON_KEY = ("candidates", frozenset({"python"}))
+
+
+def cached(db, key):
+    return key in db.cache.entries
+
+
+def fill(db):
+    db.add_candidate(Candidate("Иванов", "Python, SQL", 3))
+    db.add_candidate(Candidate("Петров", "Go", 5))
+    assert [row[1] for row in db.find_matching_candidates("Python")] == ["Иванов"]
+    db.find_matching_candidates("Go")
+    assert cached(db, PYTHON_KEY)
+
+
+def test_cached_result_is_reused(db):
+    fill(db)
+    hits = db.cache.hits
+    assert [row[1] for row in db.find_matching_candidates("python")] == ["Иванов"]
+    assert db.cache.hits == hits + 1
+
+
+def test_unrelated_writes_keep_entry(db):
+    fill(db)
+    db.add_candidate(Candidate("Сидоров", "Go, Docker", 1))
+    db.edit_candidate(2, "Петров", "Go, Rust", 6)
+    db.delete_candidate(3)
+    db.add_vacancy(Vacancy("Разработчик", 1, "Python"))
+    assert cached(db, PYTHON_KEY)
+    assert not cached(db, ("candidates", frozenset({"go"})))
+
+
+def test_add_drops_entry(db):
+    fill(db)
+    db.add_candidate(Candidate("Сидоров", "Питон", 1))  # Синоним того же навыка
+    assert not cached(db, PYTHON_KEY)
+    assert [row[1] for row in db.find_matching_candidates("Python")] == ["Иванов", "Сидоров"]
+
+
+def test_edit_drops_entry_for_old_and_new_skills(db):
+    fill(db)
+    db.edit_candidate(2, "Петров", "Go, Python", 5)
+    assert not cached(db, PYTHON_KEY)
+    assert [row[1] for row in db.find_matching_candidates("Python")] == ["Иванов", "Петров"]
+    db.edit_candidate(1, "Иванов", "SQL", 3)  # Навык убран
+    assert not cached(db, PYTHON_KEY)
+    assert [row[1] for row in db.find_matching_candidates("Python")] == ["Петров"]
+
+
+def test_delete_drops_entry(db):
+    fill(db)
+    db.delete_candidate(1)
+    assert not cached(db, PYTHON_KEY)
+    assert db.find_matching_candidates("Python") == []
+
+
+def test_vacancy_entries(db):
+    db.add_vacancy(Vacancy("Разработчик", 1, "Python"))
+    db.add_vacancy(Vacancy("Админ", 1, "Linux"))
+    db.find_vacancies_by_skill("Python")
+    db.find_vacancies_by_skill("Linux")
+    db.edit_vacancy(2, "Админ", 1, "Linux, Docker")
+    assert cached(db, ("vacancies", frozenset({"python"})))
+    assert not cached(db, ("vacancies", frozenset({"linux"})))
+
+
+def test_result_computed_before_invalidation_is_not_stored():
+    cache = QueryCache(ttl=60)
+    generation = cache.generation
+    cache.invalidate_skills("candidates", {"python"})  # Запись во время вычисления результата
+    cache.put(PYTHON_KEY, ("старый результат",), generation)
+    assert cache.get(PYTHON_KEY) is None
+    cache.put(PYTHON_KEY, ("новый результат",), cache.generation)
+    assert cache.get(PYTHON_KEY) == ("новый результат",)
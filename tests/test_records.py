@@ -0,0 +1,41 @@
+"""Тесты изменения отдельных записей (add/edit/delete): связующие таблицы и сводка по работодателям"""
+
+import pytest
+
+from classes import Candidate, Vacancy
+
+
+@pytest.fixture
+def filled_db(db):
+    db.add_vacancy(Vacancy("Разработчик", 1, "Python, SQL"))
+    db.add_candidate(Candidate("Иванов", "Python", 3))
+    db.add_candidate(Candidate("Петров", "Go", 5))
+    return db
+
+
+def table(db, name):
+    return sorted(db.conn.execute(f"SELECT * FROM {name}").fetchall())
+
+
+def test_edit_missing_candidate(filled_db):
+    stats = filled_db.employer_stats()
+    tables = {name: table(filled_db, name) for name in ("Skills", "CandidateSkills", "Matches")}
+    assert stats[0][3] == 1
+    assert filled_db.edit_candidate(999, "Никто", "Python, SQL, Rust", 1) is False
+    assert filled_db.employer_stats() == stats
+    assert {name: table(filled_db, name) for name in tables} == tables
+
+
+def test_edit_candidate_updates_stats(filled_db):
+    assert filled_db.edit_candidate(2, "Петров", "SQL", 5) is True
+    assert filled_db.employer_stats()[0][3] == 2
+    assert filled_db.edit_candidate(1, "Иванов", "Rust", 3) is True
+    assert filled_db.employer_stats()[0][3] == 1
+
+
+def test_edit_missing_vacancy(filled_db):
+    stats = filled_db.employer_stats()
+    tables = {name: table(filled_db, name) for name in ("Skills", "VacancySkills", "Matches")}
+    assert filled_db.edit_vacancy(999, "Нет такой", 2, "Python, Rust") is False
+    assert filled_db.employer_stats() == stats
+    assert {name: table(filled_db, name) for name in tables} == tables
@@ -0,0 +1,78 @@
+"""Тесты реплики базы в памяти (connections.py): запись изменений в файл базы способами interval и commit"""
+
+import os
+import sqlite3
+import warnings
+
+import pytest
+
+from classes import Candidate
+from hr_database import HRDatabase
+
+
+def names_on_disk(db_name):
+    # Имена кандидатов в файле базы (отдельным подключением, минуя реплику)
+    conn = sqlite3.connect(db_name)
+    try:
+        return [name for (name,) in conn.execute("SELECT name FROM Candidates ORDER BY id")]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def open_replica(tmp_path):
+    databases = []
+
+    def open_database(write_back):
+        db_name = str(tmp_path / "replica.db")
+        HRDatabase(db_name).close()  # Файл базы со схемой
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # Нет /dev/shm: реплика на диске
+            db = HRDatabase(db_name, replica=True, write_back=write_back, write_back_interval=3600)
+        databases.append(db)
+        return db
+    yield open_database
+    for db in databases:
+        db.close()
+
+
+def test_interval_write_back(open_replica):
+    db = open_replica("interval")
+    replica = db.manager.replica
+    db.add_candidate(Candidate("Иванов", "Python", 3))
+    assert [row[1] for row in db.get_candidates()] == ["Иванов"]
+    assert names_on_disk(db.db_name) == []
+    assert db.flush() is True
+    assert names_on_disk(db.db_name) == ["Иванов"]
+    assert db.flush() is False  # Изменений после записи нет
+    db.add_candidate(Candidate("Петров", "Go", 1))
+    db.close()
+    assert names_on_disk(db.db_name) == ["Иванов", "Петров"]
+    assert not os.path.exists(os.path.dirname(replica))
+
+
+def test_write_back_inside_transaction(open_replica):
+    db = open_replica("interval")
+    with db.manager.write():
+        with pytest.raises(RuntimeError):
+            db.flush()
+
+
+def test_commit_write_back(open_replica):
+    db = open_replica("commit")
+    db.add_candidate(Candidate("Иванов", "Python", 3))
+    assert names_on_disk(db.db_name) == ["Иванов"]
+    db.bulk_add([Candidate("Петров", "Go", 1)], rebuild_indexes=True)
+    db.delete_candidate(1)
+    assert names_on_disk(db.db_name) == ["Петров"]
+    assert [row[1] for row in db.get_candidates()] == ["Петров"]
+
+
+def test_commit_rolls_back_both(open_replica):
+    db = open_replica("commit")
+    with pytest.raises(RuntimeError):
+        with db.manager.write():
+            db.conn.execute("INSERT INTO Candidates (name, skills, experience) VALUES ('Сидоров', 'Java', 2)")
+            raise RuntimeError("отмена")
+    assert names_on_disk(db.db_name) == []
+    assert db.get_candidates() == []
@@ -0,0 +1,58 @@
+"""Тесты исправления опечаток (skill_dictionary.py и correct_fts_query)"""
+
+import random
+
+import pytest
+
+from hr_database import correct_fts_query
+from skill_dictionary import FuzzySkillIndex, SkillDictionary, edit_distance
+
+
+def reference_distance(a, b):
+    # Расстояние Дамерау-Левенштейна (с перестановкой соседних символов) полным перебором таблицы
+    table = [[i + j if not i or not j else 0 for j in range(len(b) + 1)] for i in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            table[i][j] = min(table[i - 1][j] + 1, table[i][j - 1] + 1, table[i - 1][j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                table[i][j] = min(table[i][j], table[i - 2][j - 2] + 1)
+    return table[-1][-1]
+
+
+def test_edit_distance_matches_reference():
+    generator = random.Random(1)
+    for _ in range(2000):
+        a = "".join(generator.choice("abcd") for _ in range(generator.randint(0, 8)))
+        b = "".join(generator.choice("abcd") for _ in range(generator.randint(0, 8)))
+        limit = generator.randint(0, 3)
+        assert edit_distance(a, b, limit) == min(reference_distance(a, b), limit + 1), (a, b, limit)
+
+
+@pytest.mark.parametrize("build", [True, False])
+def test_fuzzy_index_lookup(build):
+    index = FuzzySkillIndex()
+    for skill in ("python", "django", "postgresql", "kotlin", "javascript"):
+        index.add(skill)
+    if build:
+        index.build()
+    assert index.lookup("pyhton") == [(1, "python")]
+    assert index.lookup("postgersql") == [(1, "postgresql")]
+    assert index.lookup("rust") == []
+
+
+def test_correct_keeps_known_and_unknown_skills():
+    dictionary = SkillDictionary()
+    for skill in ("Python", "Django", "SQL"):
+        dictionary.add(skill, 1)
+    text, corrections = dictionary.correct("Pyhton, SQL, Haskell")
+    assert corrections == {"Pyhton": "Python"}
+    assert text == "Python, SQL, Haskell"
+
+
+def test_fulltext_query_keeps_operators():
+    dictionary = SkillDictionary()
+    for skill in ("Python", "Kotlin"):
+        dictionary.add(skill, 1)
+    query, corrections = correct_fts_query("Pyhton OR (Kotiln AND pyth*)", dictionary)
+    assert set(corrections) == {"Pyhton", "Kotiln"}
+    assert "OR" in query and "AND" in query and "pyth*" in query and "(" in query
@@ -0,0 +1,96 @@
+"""Тесты бинарных снимков исходных файлов (snapshot.py): размещение, устаревание, повреждение и закрытие"""
+
+import os
+
+import pytest
+
+import snapshot
+from conftest import write_json
+from hr_database import HRDatabase, SKILL_INDEX_VERSION
+
+CANDIDATES = [{"name": "Иванов", "skills": "Python, SQL", "experience": 3},
+              {"name": "Петров", "skills": "Go", "experience": 5}]
+VACANCIES = [{"title": "Разработчик", "employer_id": 1, "requirements": "Python"}]
+
+
+def test_snapshot_in_cache_directory(tmp_path, snapshot_dir):
+    source = write_json(tmp_path / "data.json", CANDIDATES, VACANCIES)
+    HRDatabase.read_data_file(source)
+    path = snapshot.snapshot_path(source)
+    assert os.path.dirname(path) == str(snapshot_dir) and os.path.exists(path)
+    assert [name for name in os.listdir(tmp_path) if name.endswith(snapshot.SNAPSHOT_SUFFIX)] == []
+
+
+def test_same_names_in_different_directories(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    assert snapshot.snapshot_path(str(tmp_path / "a" / "data.json")) != \
+        snapshot.snapshot_path(str(tmp_path / "b" / "data.json"))
+
+
+def test_snapshot_records_match_source(tmp_path):
+    source = write_json(tmp_path / "data.json", CANDIDATES, VACANCIES)
+    HRDatabase.read_data_file(source)
+    with snapshot.open_snapshot(source, SKILL_INDEX_VERSION) as opened:
+        data = opened.data()
+        assert list(data["candidates"]) == CANDIDATES
+        assert list(data["vacancies"]) == VACANCIES
+        assert data["candidates"][-1] == CANDIDATES[-1]
+
+
+def test_changed_source_invalidates_snapshot(tmp_path):
+    source = write_json(tmp_path / "data.json", CANDIDATES, VACANCIES)
+    HRDatabase.read_data_file(source)
+    write_json(tmp_path / "data.json", CANDIDATES[:1], VACANCIES)
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10 ** 9))  # Снимок не старше файла
+    assert snapshot.open_snapshot(source, SKILL_INDEX_VERSION) is None
+    assert list(HRDatabase.read_data_file(source)["candidates"]) == CANDIDATES[:1]
+    with snapshot.open_snapshot(source, SKILL_INDEX_VERSION) as opened:
+        assert len(opened.data()["candidates"]) == 1
+
+
+def test_other_skill_version_invalidates_snapshot(tmp_path):
+    source = write_json(tmp_path / "data.json", CANDIDATES, VACANCIES)
+    HRDatabase.read_data_file(source)
+    assert snapshot.open_snapshot(source, SKILL_INDEX_VERSION + 1) is None
+
+
+def test_damaged_snapshot(tmp_path):
+    source = write_json(tmp_path / "data.json", CANDIDATES, VACANCIES)
+    HRDatabase.read_data_file(source)
+    path = snapshot.snapshot_path(source)
+    with snapshot.Snapshot(path) as opened:
+        _, _, offset, _ = opened.sections["candidates.name.data"]
+    with open(path, "r+b") as file:
+        file.seek(offset)
+        first = file.read(1)
+        file.seek(offset)
+        file.write(bytes([first[0] ^ 0xFF]))
+    with snapshot.open_snapshot(source, SKILL_INDEX_VERSION) as opened:
+        with pytest.raises(snapshot.SnapshotError):
+            list(opened.data()["candidates"])
+    with open(path, "r+b") as file:
+        file.truncate(10)
+    assert snapshot.open_snapshot(source, SKILL_INDEX_VERSION) is None
+
+
+def test_close_releases_mapping(tmp_path):
+    source = write_json(tmp_path / "data.json", CANDIDATES, VACANCIES)
+    HRDatabase.read_data_file(source)
+    opened = snapshot.open_snapshot(source, SKILL_INDEX_VERSION)
+    with opened:
+        assert len(opened.data()["candidates"]) == 2
+    assert opened.buffer.closed
+    with pytest.raises(ValueError):
+        opened.section("candidates.ids")
+
+
+def test_failed_write_removes_temp_file(tmp_path, snapshot_dir, monkeypatch):
+    source = write_json(tmp_path / "data.json", CANDIDATES, VACANCIES)
+
+    def failing_replace(src, dst):
+        raise OSError("нет места на диске")
+    monkeypatch.setattr(snapshot.os, "replace", failing_replace)
+    assert list(HRDatabase.read_data_file(source)["candidates"]) == CANDIDATES
+    assert os.listdir(snapshot_dir) == []